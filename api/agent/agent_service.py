@@ -5,17 +5,30 @@ Provides both sync and async interfaces for Azure Functions.
 
 import asyncio
 import logging
+import os
+import threading
+import time
 from typing import Optional, Generator
 from dataclasses import dataclass, field
 
-from semantic_kernel.contents import ChatMessageContent, FunctionCallContent, FunctionResultContent
-from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
-from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+# kernel_setup and the semantic_kernel agent stack are imported on first use,
+# so an intent fast-path answer on a cold worker does not pay for them
+from .router import ModelRouter, RouteDecision, ROUTE_LIGHT, ROUTE_HEAVY, LIGHT_ROUTE_PLUGINS
+from .intents import IntentRouter, ROUTE_FAST_PATH
 
-from .kernel_setup import create_kernel, create_agent, create_chat_history
+from deadline import current_deadline, record_timeout, upstream_stats, DeadlineExceeded, REQUEST_DEADLINE_SECONDS
+from openai_pool import get_chat_pool, classify_error
+from limiter import llm_slot, llm_has_spare_capacity, Overloaded
+from tracing import span, annotate
+from metrics import metrics
+from warmup import agent_readiness
 
 logger = logging.getLogger(__name__)
 
+# Start building the kernel in the background as soon as the service is created
+# (e.g. by a fast-path request), so the first LLM turn doesn't pay for it
+AGENT_BACKGROUND_INIT = os.environ.get("AGENT_BACKGROUND_INIT", "true").lower() == "true"
+
 
 @dataclass
 class ToolCall:
@@ -33,6 +46,9 @@ class AgentResponse:
     tool_calls: list = field(default_factory=list)
     citations: list = field(default_factory=list)
     error: Optional[str] = None
+    route: str = ROUTE_HEAVY
+    usage: dict = field(default_factory=dict)
+    timed_out: bool = False
 
 
 # Map internal function names to user-friendly status messages
@@ -64,55 +80,150 @@ class AgentService:
         self._kernel = None
         self._agent = None
         self._initialized = False
+        self._init_lock = threading.Lock()
+        self._router = ModelRouter()
+        self._intents = IntentRouter()
+        metrics.register_callback(
+            "intent_fast_path", "Intent pre-router hits and shadow-scored outcomes",
+            "gauge", self._intent_samples,
+        )
+
+    def _intent_samples(self):
+        for key, value in self._intents.stats.snapshot().items():
+            yield {"stat": key}, value
+
+    def warm_up(self):
+        """Build the kernel, chat services and plugins ahead of the first turn."""
+        self._ensure_initialized()
 
     def _ensure_initialized(self):
-        """Lazy initialization of kernel and agent."""
-        if not self._initialized:
+        """
+        Single-flight initialization of kernel and agent.
+        Concurrent first callers wait for the one build in progress instead of
+        constructing their own kernel; a failed build is retried by the next caller.
+        """
+        if self._initialized:
+            return
+
+        with self._init_lock:
+            if self._initialized:
+                return
+            agent_readiness.initializing()
             try:
-                self._kernel = create_kernel()
-                self._agent = create_agent(self._kernel)
-                self._initialized = True
-                logger.info("Agent service initialized successfully")
+                with span("agent.init"):
+                    from .kernel_setup import create_kernel, create_agent
+
+                    self._kernel = create_kernel()
+                    self._agent = create_agent(self._kernel)
             except Exception as e:
+                agent_readiness.failed(e)
                 logger.error(f"Failed to initialize agent: {e}")
                 raise
+            self._initialized = True
+            agent_readiness.ready()
+            logger.info("Agent service initialized successfully")
+
+    def start_background_init(self) -> Optional[threading.Thread]:
+        """Build the kernel in a background thread (no-op once initialized)."""
+        if self._initialized:
+            return None
+
+        def _run():
+            try:
+                self._ensure_initialized()
+            except Exception:
+                pass  # Recorded in agent_readiness; requests retry on demand
+
+        thread = threading.Thread(target=_run, name="agent-init", daemon=True)
+        thread.start()
+        return thread
 
     async def _invoke_agent_async(
         self,
         message: str,
         conversation_history: list,
-    ) -> tuple[str, list[ToolCall]]:
+        decision: RouteDecision,
+    ) -> tuple[str, list[ToolCall], dict]:
         """
         Invoke the agent asynchronously.
-        Returns (answer, tool_calls).
+        Returns (answer, tool_calls, usage).
         """
         self._ensure_initialized()
 
+        from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+        from .kernel_setup import pool_service_id, AGENT_SYSTEM_PROMPT, LIGHT_SYSTEM_PROMPT, LIGHT_SERVICE_ID
+
+        if decision.route == ROUTE_LIGHT:
+            # Smaller deployment, compact prompt, only the cheap plugins
+            function_choice = FunctionChoiceBehavior.Auto(
+                auto_invoke=True,
+                maximum_auto_invoke_attempts=2,
+                filters={"included_plugins": LIGHT_ROUTE_PLUGINS},
+            )
+            return await self._complete(
+                LIGHT_SERVICE_ID, LIGHT_SYSTEM_PROMPT, function_choice, message, conversation_history
+            )
+
+        function_choice = FunctionChoiceBehavior.Auto(
+            auto_invoke=True,
+            maximum_auto_invoke_attempts=5,
+        )
+
+        # Heavy route: pick a pool target, fail over once on 429/5xx to an untried one.
+        # The lease releases the target on any exit, including the deadline's cancellation.
+        pool = get_chat_pool()
+        tried: tuple = ()
+        while True:
+            try:
+                with pool.lease(exclude=tried) as target:
+                    tried = tried + (target,)
+                    return await self._complete(
+                        pool_service_id(target), AGENT_SYSTEM_PROMPT, function_choice, message, conversation_history
+                    )
+            except Exception as e:
+                kind = classify_error(e)
+                if len(tried) == 1 and len(pool.targets) > 1 and kind in ("throttled", "unavailable"):
+                    upstream_stats.incr("failovers", "agent")
+                    logger.warning(f"🔁 Agent failing over from '{tried[0].name}' ({kind})")
+                    continue
+                raise
+
+    async def _complete(
+        self,
+        service_id: str,
+        system_prompt: str,
+        function_choice: "FunctionChoiceBehavior",
+        message: str,
+        conversation_history: list,
+    ) -> tuple[str, list[ToolCall], dict]:
+        """Single chat completion (with auto function calling) on one kernel service."""
+        from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+        from semantic_kernel.contents import FunctionCallContent
+        from .kernel_setup import create_chat_history, build_system_prompt
+
         tool_calls: list[ToolCall] = []
 
         # Create chat history from conversation
-        history = create_chat_history(conversation_history)
+        history = create_chat_history(conversation_history, system_prompt=build_system_prompt(system_prompt))
         history.add_user_message(message)
 
         # Get execution settings with auto function calling
         settings = AzureChatPromptExecutionSettings(
-            service_id="azure-openai",
-            function_choice_behavior=FunctionChoiceBehavior.Auto(
-                auto_invoke=True,
-                maximum_auto_invoke_attempts=5,
-            ),
+            service_id=service_id,
+            function_choice_behavior=function_choice,
         )
 
         try:
             # Get chat completion service
-            chat_service = self._kernel.get_service("azure-openai")
-
-            # Invoke with function calling
-            result = await chat_service.get_chat_message_content(
-                chat_history=history,
-                settings=settings,
-                kernel=self._kernel,
-            )
+            chat_service = self._kernel.get_service(service_id)
+
+            # Invoke with function calling (tool spans are nested via the kernel filter)
+            with span("agent.llm", service_id=service_id):
+                result = await chat_service.get_chat_message_content(
+                    chat_history=history,
+                    settings=settings,
+                    kernel=self._kernel,
+                )
 
             # Extract function calls from history (they're added during execution)
             for msg in history.messages:
@@ -127,7 +238,7 @@ class AgentService:
                             ))
 
             answer = str(result.content) if result and result.content else "I couldn't generate a response."
-            return answer, tool_calls
+            return answer, tool_calls, _extract_usage(result)
 
         except Exception as e:
             logger.error(f"Agent invocation error: {e}")
@@ -151,16 +262,46 @@ class AgentService:
         if conversation_history is None:
             conversation_history = []
 
-        try:
-            # Run async code in a new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        start_time = time.time()
+
+        # Deterministic intents are answered without touching the LLM
+        with span("routing"):
+            intent = self._intents.match(message)
+        if intent is not None:
             try:
-                answer, tool_calls = loop.run_until_complete(
-                    self._invoke_agent_async(message, conversation_history)
+                with span(f"tool.{intent.tool}"):
+                    fast = self._intents.answer(intent)
+            except Exception as e:
+                logger.warning(f"Intent fast path failed, falling back to agent: {e}")
+            else:
+                if self._intents.should_shadow() and llm_has_spare_capacity():
+                    self._intents.shadow(intent, lambda: self._shadow_tools(message, conversation_history))
+                self._router.stats.record(ROUTE_FAST_PATH, time.time() - start_time)
+                annotate(agent_route=ROUTE_FAST_PATH)
+                return AgentResponse(
+                    answer=fast.answer,
+                    tool_calls=[{
+                        "tool": fast.tool,
+                        "status": "completed",
+                        "message": get_friendly_status(fast.tool, False),
+                    }],
+                    route=ROUTE_FAST_PATH,
                 )
-            finally:
-                loop.close()
+
+        with span("routing"):
+            decision = self._router.route(message, conversation_history)
+
+        try:
+            answer, tool_calls, usage = self._run_agent(message, conversation_history, decision)
+            self._intents.observe_agent_turn([tc.tool for tc in tool_calls])
+
+            self._router.stats.record(
+                decision.route,
+                time.time() - start_time,
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+            )
+            annotate(agent_route=decision.route, total_tokens=usage.get("total_tokens", 0))
 
             # Extract citations from answer if present (from RAG results)
             citations = []
@@ -170,15 +311,70 @@ class AgentService:
                 answer=answer,
                 tool_calls=[{"tool": tc.tool, "status": tc.status, "message": tc.message} for tc in tool_calls],
                 citations=citations,
+                route=decision.route,
+                usage=usage,
             )
 
+        except DeadlineExceeded as e:
+            logger.error(f"Agent invoke timed out: {e}")
+            self._router.stats.record(decision.route, time.time() - start_time, error=True)
+            return AgentResponse(
+                answer="",
+                error="Request timed out",
+                route=decision.route,
+                timed_out=True,
+            )
+        except Overloaded:
+            # Shed before any LLM call: the route answers 503 + Retry-After
+            raise
         except Exception as e:
             logger.error(f"Agent invoke error: {e}")
+            self._router.stats.record(decision.route, time.time() - start_time, error=True)
             return AgentResponse(
                 answer="",
                 error=str(e),
+                route=decision.route,
             )
 
+    def _shadow_tools(self, message: str, conversation_history: list) -> list:
+        """
+        Full agent run for scoring a fast-path answer; returns the tools it called.
+        Takes a limiter slot only if one is free right away, so it never queues
+        ahead of (or waits alongside) real requests.
+        """
+        with llm_slot(classify_error, max_wait=0):
+            _, tool_calls, _ = self._run_agent(message, conversation_history, RouteDecision(ROUTE_HEAVY, "shadow"))
+        return [tc.tool for tc in tool_calls]
+
+    def _run_agent(
+        self,
+        message: str,
+        conversation_history: list,
+        decision: RouteDecision,
+    ) -> tuple[str, list[ToolCall], dict]:
+        """
+        Run the async agent invocation in a new event loop, bounded by the request
+        deadline. The whole turn (tool calls included) holds one limiter slot.
+        """
+        with llm_slot(classify_error):
+            deadline = current_deadline()
+            timeout = deadline.timeout() if deadline is not None else REQUEST_DEADLINE_SECONDS
+
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                return loop.run_until_complete(
+                    asyncio.wait_for(
+                        self._invoke_agent_async(message, conversation_history, decision),
+                        timeout=timeout,
+                    )
+                )
+            except asyncio.TimeoutError as e:
+                record_timeout("agent")
+                raise DeadlineExceeded("Agent did not finish before the deadline") from e
+            finally:
+                loop.close()
+
     def invoke_with_status(
         self,
         message: str,
@@ -197,8 +393,6 @@ class AgentService:
             conversation_history = []
 
         try:
-            self._ensure_initialized()
-
             # For now, we do a simple invocation and report tools after
             # True streaming would require async generator support in Azure Functions
             response = self.invoke(message, conversation_history)
@@ -221,26 +415,50 @@ class AgentService:
                 "answer": response.answer,
                 "tool_calls": response.tool_calls,
                 "citations": response.citations,
+                "route": response.route,
             }
 
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"Agent invoke_with_status error: {e}")
             yield {"type": "error", "error": str(e)}
 
 
+def _extract_usage(result: Optional["ChatMessageContent"]) -> dict:
+    """Read token usage from the final completion's metadata, if reported."""
+    usage = (result.metadata or {}).get("usage") if result is not None else None
+    if usage is None:
+        return {}
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
 # Global singleton instance
 _agent_service: Optional[AgentService] = None
+_agent_service_lock = threading.Lock()
 
 
 def get_agent_service() -> AgentService:
     """Get or create the agent service singleton."""
     global _agent_service
     if _agent_service is None:
-        _agent_service = AgentService()
+        with _agent_service_lock:
+            if _agent_service is None:
+                _agent_service = AgentService()
+                if AGENT_BACKGROUND_INIT:
+                    _agent_service.start_background_init()
     return _agent_service
 
 
 def reset_agent_service():
     """Reset the agent service (useful for testing)."""
     global _agent_service
-    _agent_service = None
+    with _agent_service_lock:
+        _agent_service = None
+    agent_readiness.reset()
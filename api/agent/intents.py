@@ -0,0 +1,207 @@
+"""
+Intent Pre-Router - Answers deterministic intents without an LLM round trip.
+High-confidence DateTime and AboutMe questions are served straight from the
+plugins with templated output; everything else falls through to the agent.
+"""
+
+import os
+import re
+import random
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .plugins.about_me_plugin import AboutMePlugin
+from .plugins.datetime_plugin import DateTimePlugin
+
+from tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+ROUTE_FAST_PATH = "fast_path"
+ROUTE_SHADOW = "shadow"
+
+# Tools the pre-router can answer (used to score misroutes)
+FAST_PATH_TOOLS = {"DateTime-get_current_time", "AboutMe-get_profile"}
+
+# Log precision/recall every N scored events
+STATS_LOG_INTERVAL = 50
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A deterministic intent with its anchored trigger pattern."""
+    name: str
+    tool: str
+    pattern: re.Pattern
+    lang: str
+    section: Optional[str] = None
+
+
+def _anchored(pattern: str) -> re.Pattern:
+    """Whole-message match, ignoring trailing punctuation."""
+    return re.compile(rf"^\s*(?:{pattern})[\s?!.]*$", re.IGNORECASE)
+
+
+INTENTS = [
+    Intent("current_time", "DateTime-get_current_time", _anchored(
+        r"what(?:'s| is) the (?:current )?(?:time|date)(?: now| today)?|what time is it(?: now)?|"
+        r"current (?:time|date)|what(?:'s| is) today(?:'s date)?|what day is (?:it|today)"
+    ), "en"),
+    Intent("current_time", "DateTime-get_current_time", _anchored(
+        r"saat kaç|şu an saat kaç|bugün(?:ün tarihi)?(?: ne| nedir)?|bugün günlerden ne"
+    ), "tr"),
+    Intent("contact", "AboutMe-get_profile", _anchored(
+        r"how (?:do|can) i (?:contact|reach|email) mert|(?:what is |what's )?mert'?s (?:email|contact(?: info(?:rmation)?)?)|"
+        r"contact(?: info(?:rmation)?| details)?"
+    ), "en", "contact"),
+    Intent("contact", "AboutMe-get_profile", _anchored(
+        r"mert'?e nasıl ulaşırım|iletişim(?: bilgileri)?|mert'?in (?:e-?posta|mail|iletişim bilgileri)"
+    ), "tr", "contact"),
+    Intent("links", "AboutMe-get_profile", _anchored(
+        r"(?:what (?:is|are) )?mert'?s (?:links|linkedin|github|portfolio)|links"
+    ), "en", "links"),
+    Intent("bio", "AboutMe-get_profile", _anchored(
+        r"who is mert(?: koca)?|tell me about mert|about mert"
+    ), "en", "bio"),
+    Intent("bio", "AboutMe-get_profile", _anchored(
+        r"mert(?: koca)? kim(?:dir)?|mert hakkında"
+    ), "tr", "bio"),
+]
+
+TEMPLATES = {
+    ("current_time", "en"): "Here's the current date and time:\n\n{body}",
+    ("current_time", "tr"): "Güncel tarih ve saat:\n\n{body}",
+    ("contact", "en"): "You can reach Mert here:\n\n{body}",
+    ("contact", "tr"): "Mert'e buradan ulaşabilirsiniz:\n\n{body}",
+    ("links", "en"): "Here are Mert's profiles:\n\n{body}",
+    ("bio", "en"): "{body}",
+    ("bio", "tr"): "{body}",
+}
+
+
+@dataclass
+class FastPathResult:
+    """Answer produced by the pre-router."""
+    intent: str
+    tool: str
+    answer: str
+
+
+class IntentStats:
+    """Thread-safe precision/recall bookkeeping for the pre-router."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.true_positives = 0
+        self.false_positives = 0
+        self.false_negatives = 0
+        self._scored = 0
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_shadow(self, correct: bool):
+        """Score a fast-path answer against a shadow run of the full agent."""
+        with self._lock:
+            if correct:
+                self.true_positives += 1
+            else:
+                self.false_positives += 1
+            self._bump()
+
+    def record_miss(self):
+        """The agent used a fast-path tool for a turn the pre-router passed on."""
+        with self._lock:
+            self.false_negatives += 1
+            self._bump()
+
+    def _bump(self):
+        self._scored += 1
+        if self._scored % STATS_LOG_INTERVAL == 0:
+            snap = self._snapshot_locked()
+            logger.info(
+                f"🎯 Intent router - precision: {snap['precision']} | recall: {snap['recall']} | "
+                f"hits: {snap['hits']} | FP: {snap['false_positives']} | FN: {snap['false_negatives']}"
+            )
+
+    def _snapshot_locked(self) -> dict:
+        shadowed = self.true_positives + self.false_positives
+        precision = self.true_positives / shadowed if shadowed else None
+        # Estimate true positives among all hits from the shadowed precision
+        est_tp = self.hits * precision if precision is not None else self.hits
+        recall = est_tp / (est_tp + self.false_negatives) if (est_tp + self.false_negatives) else None
+        return {
+            "hits": self.hits,
+            "true_positives": self.true_positives,
+            "false_positives": self.false_positives,
+            "false_negatives": self.false_negatives,
+            "precision": round(precision, 3) if precision is not None else None,
+            "recall": round(recall, 3) if recall is not None else None,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return self._snapshot_locked()
+
+
+class IntentRouter:
+    """Matches deterministic intents and answers them from the plugins."""
+
+    def __init__(self, shadow_rate: Optional[float] = None):
+        self._about_me = AboutMePlugin()
+        self._datetime = DateTimePlugin()
+        self.enabled = os.environ.get("INTENT_FAST_PATH_ENABLED", "true").lower() == "true"
+        self.shadow_rate = shadow_rate if shadow_rate is not None else float(
+            os.environ.get("INTENT_SHADOW_SAMPLE_RATE", "0.02")
+        )
+        self.stats = IntentStats()
+
+    def match(self, message: str) -> Optional[Intent]:
+        """Return the first intent whose anchored pattern matches the whole message."""
+        if not self.enabled:
+            return None
+        for intent in INTENTS:
+            if intent.pattern.match(message):
+                return intent
+        return None
+
+    def answer(self, intent: Intent) -> FastPathResult:
+        """Run the plugin for an intent and wrap it in a template."""
+        if intent.tool == "DateTime-get_current_time":
+            body = self._datetime.get_current_time()
+        else:
+            body = self._about_me.get_profile(intent.section or "all")
+
+        template = TEMPLATES.get((intent.name, intent.lang), TEMPLATES.get((intent.name, "en"), "{body}"))
+        self.stats.record_hit()
+        logger.info(f"⚡ Intent fast path: {intent.name} ({intent.lang})")
+        return FastPathResult(intent=intent.name, tool=intent.tool, answer=template.format(body=body))
+
+    def should_shadow(self) -> bool:
+        """Sample fast-path hits for a shadow run of the full agent."""
+        return self.shadow_rate > 0 and random.random() < self.shadow_rate
+
+    def shadow(self, intent: Intent, run_agent: Callable[[], list]):
+        """
+        Run the full agent in the background and compare its tool choice.
+        run_agent returns the list of tool names the agent called. The run is
+        traced as route "shadow" and kept out of the stage/tool/upstream histograms.
+        """
+        def _run():
+            try:
+                with start_trace(ROUTE_SHADOW, record_metrics=False):
+                    tools = run_agent()
+                self.stats.record_shadow(intent.tool in tools)
+            except Exception as e:
+                logger.warning(f"Intent shadow run failed: {e}")
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def observe_agent_turn(self, tools: list):
+        """Score a turn the pre-router passed on: a lone fast-path tool call is a miss."""
+        if self.enabled and len(tools) == 1 and tools[0] in FAST_PATH_TOOLS:
+            self.stats.record_miss()
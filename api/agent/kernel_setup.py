@@ -4,14 +4,23 @@ Sets up Azure OpenAI service and configures the ChatCompletionAgent.
 """
 
 import os
+from functools import lru_cache
 from semantic_kernel import Kernel
 from semantic_kernel.agents import ChatCompletionAgent
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
 from semantic_kernel.contents.chat_history import ChatHistory
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+from semantic_kernel.filters import FilterTypes, FunctionInvocationContext
+from openai import AsyncAzureOpenAI
 
 from .plugins import RAGPlugin, WebSearchPlugin, AboutMePlugin, DateTimePlugin
+from .plugins.about_me_plugin import get_profile_store
+
+from openai_pool import get_chat_pool, DeploymentTarget
+from tracing import span
+
+# Token budget for the profile facts injected into the system prompt (0 disables)
+ABOUT_ME_PROMPT_MAX_TOKENS = int(os.environ.get("ABOUT_ME_PROMPT_MAX_TOKENS", 400))
 
 
 # Agent system prompt
@@ -59,41 +68,107 @@ You have access to the following tools:
 """
 
 
-def create_kernel() -> Kernel:
-    """Create and configure the Semantic Kernel with Azure OpenAI."""
-    kernel = Kernel()
+# Compact prompt for the light route (greetings, date/time, profile lookups)
+LIGHT_SYSTEM_PROMPT = """You are "Lundo", Mert's friendly AI assistant on his portfolio site.
+Answer briefly. Use DateTime tools for date/time questions and AboutMe-get_profile for details about Mert not covered below.
+Respond in the same language the user writes in (default English)."""
+
+# Service ids registered on the kernel
+PRIMARY_SERVICE_ID = "azure-openai"
+LIGHT_SERVICE_ID = "azure-openai-fast"
+
+
+@lru_cache(maxsize=8)
+def _compose_system_prompt(base_prompt: str, profile_block: str) -> str:
+    if not profile_block:
+        return base_prompt
+    return (
+        f"{base_prompt}\n"
+        "## About Mert (quick facts)\n"
+        "Answer basic bio, skills and contact questions from these facts directly, "
+        "without calling AboutMe-get_profile.\n\n"
+        f"{profile_block}\n"
+    )
+
+
+def build_system_prompt(base_prompt: str) -> str:
+    """System prompt with the cached profile block appended (memoized per profile version)."""
+    if ABOUT_ME_PROMPT_MAX_TOKENS <= 0:
+        return base_prompt
+    return _compose_system_prompt(base_prompt, get_profile_store().prompt_block(ABOUT_ME_PROMPT_MAX_TOKENS))
+
 
-    # Get configuration
-    api_key = os.environ.get("AZURE_OPENAI_API_KEY", "")
-    endpoint = os.environ["AZURE_OPENAI_ENDPOINT"]
-    deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+def pool_service_id(target: DeploymentTarget) -> str:
+    """Kernel service id for a deployment pool target (first target keeps the primary id)."""
+    if target is get_chat_pool().targets[0]:
+        return PRIMARY_SERVICE_ID
+    return f"{PRIMARY_SERVICE_ID}:{target.name}"
+
+
+def _create_chat_service(
+    deployment: str,
+    service_id: str,
+    endpoint: str = None,
+    api_key: str = None,
+) -> AzureChatCompletion:
+    """Create an Azure OpenAI chat service with Managed Identity support."""
+    api_key = api_key if api_key is not None else os.environ.get("AZURE_OPENAI_API_KEY", "")
+    endpoint = endpoint or os.environ["AZURE_OPENAI_ENDPOINT"]
     api_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
 
-    # Add Azure OpenAI Chat Completion service with Managed Identity support
     if api_key and not api_key.startswith("@Microsoft.KeyVault"):
+        if endpoint.startswith("http://"):
+            # Local stand-ins (scripts/fake_upstreams.py): SK only validates https endpoints,
+            # so requests go through an explicit client and the https URL is never called
+            return AzureChatCompletion(
+                deployment_name=deployment,
+                endpoint="https://" + endpoint[len("http://"):],
+                async_client=AsyncAzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version),
+                service_id=service_id,
+            )
+
         # Local development with API key
-        service = AzureChatCompletion(
+        return AzureChatCompletion(
             deployment_name=deployment,
             endpoint=endpoint,
             api_key=api_key,
             api_version=api_version,
-            service_id="azure-openai",
-        )
-    else:
-        # Production: Use Managed Identity
-        credential = DefaultAzureCredential()
-        token_provider = get_bearer_token_provider(
-            credential, "https://cognitiveservices.azure.com/.default"
-        )
-        service = AzureChatCompletion(
-            deployment_name=deployment,
-            endpoint=endpoint,
-            azure_ad_token_provider=token_provider,
-            api_version=api_version,
-            service_id="azure-openai",
+            service_id=service_id,
         )
 
-    kernel.add_service(service)
+    # Production: Use Managed Identity (token cache shared with the chat pool)
+    return AzureChatCompletion(
+        deployment_name=deployment,
+        endpoint=endpoint,
+        ad_token_provider=get_chat_pool().token_provider(),
+        api_version=api_version,
+        service_id=service_id,
+    )
+
+
+async def trace_tool_invocation(context: FunctionInvocationContext, next):
+    """Kernel filter: time every plugin (tool) invocation as a request span."""
+    with span(f"tool.{context.function.plugin_name}-{context.function.name}"):
+        await next(context)
+
+
+def create_kernel() -> Kernel:
+    """Create and configure the Semantic Kernel with Azure OpenAI."""
+    kernel = Kernel()
+
+    # One service per deployment pool target; AgentService picks one per turn
+    for target in get_chat_pool().targets:
+        kernel.add_service(_create_chat_service(
+            target.deployment,
+            pool_service_id(target),
+            endpoint=target.endpoint,
+            api_key=target.api_key,
+        ))
+
+    # Optional smaller deployment for trivial turns (see agent.router)
+    light_deployment = os.environ.get("AZURE_OPENAI_FAST_DEPLOYMENT", "")
+    if light_deployment:
+        kernel.add_service(_create_chat_service(light_deployment, LIGHT_SERVICE_ID))
 
     # Register all plugins
     kernel.add_plugin(RAGPlugin(), plugin_name="RAG")
@@ -101,6 +176,8 @@ def create_kernel() -> Kernel:
     kernel.add_plugin(AboutMePlugin(), plugin_name="AboutMe")
     kernel.add_plugin(DateTimePlugin(), plugin_name="DateTime")
 
+    kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, trace_tool_invocation)
+
     return kernel
 
 
@@ -108,7 +185,7 @@ def create_agent(kernel: Kernel) -> ChatCompletionAgent:
     """Create the orchestrating agent with all plugins."""
 
     # Get the chat service from kernel
-    chat_service = kernel.get_service("azure-openai")
+    chat_service = kernel.get_service(PRIMARY_SERVICE_ID)
 
     # Create the agent with auto function calling
     agent = ChatCompletionAgent(
@@ -121,9 +198,9 @@ def create_agent(kernel: Kernel) -> ChatCompletionAgent:
     return agent
 
 
-def create_chat_history(conversation_history: list = None) -> ChatHistory:
+def create_chat_history(conversation_history: list = None, system_prompt: str = None) -> ChatHistory:
     """Create a ChatHistory object from conversation history."""
-    history = ChatHistory()
+    history = ChatHistory(system_message=system_prompt) if system_prompt else ChatHistory()
 
     if conversation_history:
         for msg in conversation_history:
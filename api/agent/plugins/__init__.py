@@ -1,10 +1,23 @@
 """
 Agent plugins (tools) for Semantic Kernel.
+Plugins are imported on first access, so importing one plugin module
+(e.g. the intent pre-router's DateTime/AboutMe) does not load the others.
 """
 
-from .rag_plugin import RAGPlugin
-from .web_search_plugin import WebSearchPlugin
-from .about_me_plugin import AboutMePlugin
-from .datetime_plugin import DateTimePlugin
+import importlib
+
+_PLUGIN_MODULES = {
+    "RAGPlugin": ".rag_plugin",
+    "WebSearchPlugin": ".web_search_plugin",
+    "AboutMePlugin": ".about_me_plugin",
+    "DateTimePlugin": ".datetime_plugin",
+}
 
 __all__ = ["RAGPlugin", "WebSearchPlugin", "AboutMePlugin", "DateTimePlugin"]
+
+
+def __getattr__(name: str):
+    module = _PLUGIN_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
@@ -1,16 +1,57 @@
 """
 About Me Plugin - Returns personal info and resume context.
 This can be customized with your actual information.
+
+Profile sections are rendered once per profile version into an immutable
+cache; a JSON file (ABOUT_ME_PROFILE_PATH) is re-read when its mtime changes.
 """
 
 import os
 import json
+import time
+import threading
 import logging
-from typing import Annotated
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Annotated, Mapping, Optional
 from semantic_kernel.functions import kernel_function
 
 logger = logging.getLogger(__name__)
 
+# Try to import tiktoken for exact token counts, fall back to an estimate
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+_encoding = None
+
+# How often (seconds) to stat the profile file for changes
+PROFILE_RELOAD_CHECK_INTERVAL = float(os.environ.get("ABOUT_ME_RELOAD_INTERVAL", 5))
+
+SECTIONS = ("bio", "expertise", "current", "contact", "education", "links", "all")
+
+
+def count_tokens(text: str) -> int:
+    """Token count for a rendered section (estimated if tiktoken is missing)."""
+    global _encoding
+    if HAS_TIKTOKEN:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            return len(_encoding.encode(text))
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+    return max(1, len(text) // 4)
+
+
+@dataclass(frozen=True)
+class RenderedSection:
+    """A pre-rendered profile section."""
+    text: str
+    tokens: int
+
 
 class AboutMePlugin:
     """Plugin for personal information and resume data."""
@@ -47,23 +88,12 @@ computer vision and machine learning to practical implementations of RAG systems
         },
     }
 
-    def __init__(self):
-        self._profile = None
+    def __init__(self, store: "ProfileStore" = None):
+        self._store = store or get_profile_store()
 
     def _get_profile(self) -> dict:
         """Load profile data. Can be extended to load from file/DB."""
-        if self._profile is None:
-            # Try to load from environment or file
-            profile_json = os.environ.get("ABOUT_ME_PROFILE")
-            if profile_json:
-                try:
-                    self._profile = json.loads(profile_json)
-                except json.JSONDecodeError:
-                    logger.warning("Invalid ABOUT_ME_PROFILE JSON, using defaults")
-                    self._profile = self.DEFAULT_PROFILE
-            else:
-                self._profile = self.DEFAULT_PROFILE
-        return self._profile
+        return self._store.profile()
 
     @kernel_function(
         name="get_profile",
@@ -77,65 +107,176 @@ computer vision and machine learning to practical implementations of RAG systems
         ] = "all",
     ) -> Annotated[str, "Profile information formatted as markdown"]:
         """Get profile information."""
-        profile = self._get_profile()
+        sections = self._store.sections()
+        section = (section or "all").lower().strip()
+        key = section if section in SECTIONS else "all"
+        rendered = sections.get(key)
+        if rendered is None:
+            raise KeyError(f"Profile section '{key}' is unavailable (profile data is missing fields)")
+        return rendered.text
 
-        section = section.lower().strip()
 
-        if section == "bio":
-            return f"**{profile['name']}** - {profile['title']}\n\n{profile['bio']}"
+def _links(profile: dict, indent: str = "") -> str:
+    return "\n".join(f"{indent}- {k.title()}: {v}" for k, v in profile["links"].items())
 
-        elif section == "expertise":
-            expertise_list = "\n".join(f"- {e}" for e in profile["expertise"])
-            return f"**Expertise & Skills:**\n{expertise_list}"
 
-        elif section == "current":
-            current_list = "\n".join(f"- {c}" for c in profile["current_focus"])
-            return f"**Current Focus:**\n{current_list}"
+def _bullets(items: list, indent: str = "") -> str:
+    return "\n".join(f"{indent}- {item}" for item in items)
 
-        elif section == "contact":
-            return f"""**Contact Information:**
-- Email: {profile['email']}
-- Location: {profile['location']}
-- Portfolio: {profile['links'].get('portfolio', 'N/A')}"""
 
-        elif section == "education":
-            languages = ", ".join(profile.get("languages", []))
-            return f"""**Education & Background:**
-{profile['education']}
+_SECTION_RENDERERS = {
+    "bio": lambda p: f"**{p['name']}** - {p['title']}\n\n{p['bio']}",
+    "expertise": lambda p: f"**Expertise & Skills:**\n{_bullets(p['expertise'])}",
+    "current": lambda p: f"**Current Focus:**\n{_bullets(p['current_focus'])}",
+    "contact": lambda p: f"""**Contact Information:**
+- Email: {p['email']}
+- Location: {p['location']}
+- Portfolio: {p['links'].get('portfolio', 'N/A')}""",
+    "education": lambda p: f"""**Education & Background:**
+{p['education']}
 
-**Languages:** {languages}"""
-
-        elif section == "links":
-            links_list = "\n".join(f"- {k.title()}: {v}" for k, v in profile["links"].items())
-            return f"**Links & Profiles:**\n{links_list}"
-
-        else:  # "all" or default
-            expertise_list = "\n".join(f"  - {e}" for e in profile["expertise"])
-            current_list = "\n".join(f"  - {c}" for c in profile["current_focus"])
-            links_list = "\n".join(f"  - {k.title()}: {v}" for k, v in profile["links"].items())
-            languages = ", ".join(profile.get("languages", []))
-
-            return f"""# {profile['name']}
-**{profile['title']}** | {profile['location']}
+**Languages:** {", ".join(p.get("languages", []))}""",
+    "links": lambda p: f"**Links & Profiles:**\n{_links(p)}",
+    "all": lambda p: f"""# {p['name']}
+**{p['title']}** | {p['location']}
 
 ## About
-{profile['bio']}
+{p['bio']}
 
 ## Expertise
-{expertise_list}
+{_bullets(p['expertise'], "  ")}
 
 ## Currently Working On
-{current_list}
+{_bullets(p['current_focus'], "  ")}
 
 ## Education
-{profile['education']}
+{p['education']}
 
 ## Languages
-{languages}
+{", ".join(p.get("languages", []))}
 
 ## Links
-{links_list}
+{_links(p, "  ")}
 
 ## Contact
-Email: {profile['email']}
-"""
+Email: {p['email']}
+""",
+}
+
+# Sections joined into the compact system-prompt block
+PROMPT_SECTIONS = ("bio", "expertise", "contact", "links")
+
+
+def render_sections(profile: dict) -> Mapping[str, RenderedSection]:
+    """
+    Render every profile section once into an immutable mapping. A section
+    whose fields are missing or malformed is logged and left out, so only
+    requests for that section fail.
+    """
+    rendered = {}
+    for key, render in _SECTION_RENDERERS.items():
+        try:
+            rendered[key] = render(profile)
+        except (KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Profile section '{key}' not rendered: {type(e).__name__}: {e}")
+
+    # Compact block for the static system prompt (whatever rendered of it)
+    rendered["prompt"] = "\n\n".join(rendered[key] for key in PROMPT_SECTIONS if key in rendered)
+
+    return MappingProxyType({
+        key: RenderedSection(text=text, tokens=count_tokens(text))
+        for key, text in rendered.items()
+    })
+
+
+class ProfileStore:
+    """
+    Shared, memoized profile renderings.
+    Source precedence: ABOUT_ME_PROFILE_PATH file > ABOUT_ME_PROFILE env > defaults.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path if path is not None else os.environ.get("ABOUT_ME_PROFILE_PATH", "")
+        self._lock = threading.Lock()
+        self._profile: Optional[dict] = None
+        self._sections: Optional[Mapping[str, RenderedSection]] = None
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.version = 0
+
+    def _load_base_profile(self) -> dict:
+        """Profile from ABOUT_ME_PROFILE or the built-in defaults."""
+        profile_json = os.environ.get("ABOUT_ME_PROFILE")
+        if profile_json:
+            try:
+                return json.loads(profile_json)
+            except json.JSONDecodeError:
+                logger.warning("Invalid ABOUT_ME_PROFILE JSON, using defaults")
+        return AboutMePlugin.DEFAULT_PROFILE
+
+    def _load_file_profile(self) -> Optional[dict]:
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not load profile from {self._path}: {e}")
+            return None
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self._path).st_mtime
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """(Re)render sections if nothing is cached or the profile file changed."""
+        now = time.monotonic()
+        if self._sections is not None:
+            if not self._path or now - self._last_check < PROFILE_RELOAD_CHECK_INTERVAL:
+                return
+
+        with self._lock:
+            if self._sections is not None and self._path and now - self._last_check < PROFILE_RELOAD_CHECK_INTERVAL:
+                return
+            self._last_check = now
+
+            mtime = self._file_mtime() if self._path else None
+            if self._sections is not None and mtime == self._mtime:
+                return
+
+            profile = self._load_file_profile() if mtime is not None else None
+            if profile is None:
+                profile = self._load_base_profile()
+
+            self._profile = profile
+            self._sections = render_sections(profile)
+            self._mtime = mtime
+            self.version += 1
+            logger.info(f"Profile rendered (version {self.version}, {len(self._sections) - 1} sections)")
+
+    def profile(self) -> dict:
+        self._refresh()
+        return self._profile
+
+    def sections(self) -> Mapping[str, RenderedSection]:
+        self._refresh()
+        return self._sections
+
+    def prompt_block(self, max_tokens: int) -> str:
+        """Compact profile facts for the system prompt, or "" if over budget."""
+        block = self.sections()["prompt"]
+        return block.text if block.tokens <= max_tokens else ""
+
+
+_profile_store: Optional[ProfileStore] = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store() -> ProfileStore:
+    """Get or create the shared profile store."""
+    global _profile_store
+    if _profile_store is None:
+        with _profile_store_lock:
+            if _profile_store is None:
+                _profile_store = ProfileStore()
+    return _profile_store
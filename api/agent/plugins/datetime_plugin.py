@@ -1,22 +1,71 @@
 """
 DateTime Plugin - Current time and date calculations.
+Uses stdlib zoneinfo with a bounded LRU of resolved timezones.
 """
 
-from datetime import datetime, timedelta
-from typing import Annotated
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from typing import Annotated, Optional
 import logging
+import zoneinfo
+
+from semantic_kernel.functions import kernel_function
 
 logger = logging.getLogger(__name__)
 
-# Try to import pytz, fall back to basic timezone handling
-try:
-    import pytz
-    HAS_PYTZ = True
-except ImportError:
-    HAS_PYTZ = False
-    logger.warning("pytz not installed, using basic timezone handling")
+# Bounded caches for resolved timezones and formatted dates
+TIMEZONE_CACHE_SIZE = 128
+DATE_FORMAT_CACHE_SIZE = 256
+
+
+def _utc():
+    try:
+        return zoneinfo.ZoneInfo("UTC")
+    except zoneinfo.ZoneInfoNotFoundError:
+        return dt_timezone.utc
+
+
+@lru_cache(maxsize=1)
+def _timezone_names_by_lower() -> dict:
+    """Case-insensitive lookup table (only built on a cache miss with odd casing)."""
+    return {name.lower(): name for name in zoneinfo.available_timezones()}
+
+
+@lru_cache(maxsize=TIMEZONE_CACHE_SIZE)
+def resolve_timezone(tz_name: str):
+    """
+    Resolve a timezone name to a tzinfo.
+    Unknown names resolve to UTC and are cached too, so they warn only once.
+    """
+    try:
+        return zoneinfo.ZoneInfo(tz_name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        pass
+
+    # Accept names like "europe/istanbul" the way pytz did
+    canonical = _timezone_names_by_lower().get(tz_name.lower())
+    if canonical:
+        return zoneinfo.ZoneInfo(canonical)
+
+    logger.warning(f"Unknown timezone: {tz_name}, using UTC")
+    return _utc()
 
-from semantic_kernel.functions import kernel_function
+
+def timezone_display_name(tz) -> str:
+    """IANA key for display (matches pytz's ``zone`` attribute)."""
+    return getattr(tz, "key", None) or "UTC"
+
+
+@lru_cache(maxsize=DATE_FORMAT_CACHE_SIZE)
+def format_long_date(day: date) -> str:
+    """e.g. 'Monday, January 06, 2025'."""
+    return day.strftime('%A, %B %d, %Y')
+
+
+@lru_cache(maxsize=DATE_FORMAT_CACHE_SIZE)
+def _date_parts(day: date) -> tuple[str, str, str]:
+    """(long date, week of year, day of year) for a calendar day."""
+    return format_long_date(day), day.strftime('%W'), day.strftime('%j')
 
 
 class DateTimePlugin:
@@ -24,18 +73,9 @@ class DateTimePlugin:
 
     DEFAULT_TIMEZONE = "Europe/Istanbul"
 
-    def _get_timezone(self, timezone_name: str = None):
+    def _get_timezone(self, timezone_name: Optional[str] = None):
         """Get timezone object."""
-        tz_name = timezone_name or self.DEFAULT_TIMEZONE
-        if HAS_PYTZ:
-            try:
-                return pytz.timezone(tz_name)
-            except pytz.exceptions.UnknownTimeZoneError:
-                logger.warning(f"Unknown timezone: {tz_name}, using UTC")
-                return pytz.UTC
-        else:
-            # Fallback: return None, use naive datetime
-            return None
+        return resolve_timezone(timezone_name or self.DEFAULT_TIMEZONE)
 
     @kernel_function(
         name="get_current_time",
@@ -51,20 +91,15 @@ class DateTimePlugin:
         """Get current date and time."""
         try:
             tz = self._get_timezone(timezone)
-
-            if tz and HAS_PYTZ:
-                now = datetime.now(tz)
-                tz_display = tz.zone
-            else:
-                now = datetime.now()
-                tz_display = "Local Time"
+            now = datetime.now(tz)
+            long_date, week, day_of_year = _date_parts(now.date())
 
             return f"""**Current Date & Time:**
-- Date: {now.strftime('%A, %B %d, %Y')}
+- Date: {long_date}
 - Time: {now.strftime('%I:%M %p')} ({now.strftime('%H:%M')})
-- Timezone: {tz_display}
-- Week: {now.strftime('%W')} of {now.year}
-- Day of Year: {now.strftime('%j')}"""
+- Timezone: {timezone_display_name(tz)}
+- Week: {week} of {now.year}
+- Day of Year: {day_of_year}"""
 
         except Exception as e:
             logger.error(f"Error getting time: {e}")
@@ -82,11 +117,7 @@ class DateTimePlugin:
         """Calculate relative dates."""
         try:
             tz = self._get_timezone(timezone)
-
-            if tz and HAS_PYTZ:
-                now = datetime.now(tz)
-            else:
-                now = datetime.now()
+            now = datetime.now(tz)
 
             target = now + timedelta(days=days)
 
@@ -113,8 +144,8 @@ class DateTimePlugin:
                 duration = f"{abs_days} day{'s' if abs_days > 1 else ''}"
 
             return f"""**Date Calculation:**
-- Today: {now.strftime('%A, %B %d, %Y')}
-- {duration} {direction} {verb}: **{target.strftime('%A, %B %d, %Y')}**
+- Today: {format_long_date(now.date())}
+- {duration} {direction} {verb}: **{format_long_date(target.date())}**
 - Days difference: {days:+d} days"""
 
         except Exception as e:
@@ -133,15 +164,9 @@ class DateTimePlugin:
         """Calculate days until a specific date."""
         try:
             tz = self._get_timezone(timezone)
+            now = datetime.now(tz)
 
-            if tz and HAS_PYTZ:
-                now = datetime.now(tz)
-            else:
-                now = datetime.now()
-
-            target = datetime.strptime(target_date, "%Y-%m-%d")
-            if tz and HAS_PYTZ:
-                target = tz.localize(target)
+            target = datetime.strptime(target_date, "%Y-%m-%d").replace(tzinfo=tz)
 
             delta = target.date() - now.date()
             days = delta.days
@@ -154,8 +179,8 @@ class DateTimePlugin:
                 status = "**Today!**"
 
             return f"""**Days Until {target.strftime('%B %d, %Y')}:**
-- Today: {now.strftime('%A, %B %d, %Y')}
-- Target: {target.strftime('%A, %B %d, %Y')}
+- Today: {format_long_date(now.date())}
+- Target: {format_long_date(target.date())}
 - Status: {status}"""
 
         except ValueError:
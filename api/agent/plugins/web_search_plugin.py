@@ -1,5 +1,7 @@
 """
 Web Search Plugin - Real-time web search using Tavily API.
+Results are cached per normalized query and concurrent identical
+queries share a single outbound request.
 """
 
 import os
@@ -7,14 +9,26 @@ import logging
 from typing import Annotated
 from semantic_kernel.functions import kernel_function
 
+from coalescing import TTLCache, SingleFlight, normalize_query
+from deadline import upstream_timeout, record_timeout, DeadlineExceeded, TAVILY_TIMEOUT_SECONDS
+from tracing import span
+from metrics import CACHE_REQUESTS
+
 logger = logging.getLogger(__name__)
 
+# Result cache settings
+WEB_SEARCH_CACHE_TTL = float(os.environ.get("WEB_SEARCH_CACHE_TTL", 300))  # seconds
+WEB_SEARCH_CACHE_SIZE = int(os.environ.get("WEB_SEARCH_CACHE_SIZE", 256))
+
 
 class WebSearchPlugin:
     """Plugin for real-time web search using Tavily."""
 
-    def __init__(self):
-        self._client = None
+    def __init__(self, client=None, cache_ttl: float = WEB_SEARCH_CACHE_TTL, cache_size: int = WEB_SEARCH_CACHE_SIZE):
+        self._client = client
+        self._cache = TTLCache(max_entries=cache_size, ttl=cache_ttl)
+        self._inflight = SingleFlight()
+        self.outbound_requests = 0
 
     def _get_client(self):
         """Lazy initialization of Tavily client."""
@@ -25,7 +39,11 @@ class WebSearchPlugin:
                 api_key = os.environ.get("TAVILY_API_KEY")
                 if not api_key:
                     raise ValueError("TAVILY_API_KEY not configured")
-                self._client = TavilyClient(api_key=api_key)
+                # TAVILY_API_BASE_URL points at a local stand-in for load tests
+                self._client = TavilyClient(
+                    api_key=api_key,
+                    api_base_url=os.environ.get("TAVILY_API_BASE_URL") or None,
+                )
             except ImportError:
                 raise ImportError("tavily-python package is not installed")
         return self._client
@@ -41,37 +59,30 @@ class WebSearchPlugin:
     ) -> Annotated[str, "Web search results with titles, snippets, and URLs"]:
         """Perform web search using Tavily API."""
         try:
-            client = self._get_client()
-
             # Cap max_results between 1 and 10
             max_results = max(1, min(max_results, 10))
 
-            response = client.search(
-                query=query,
-                search_depth="basic",
-                max_results=max_results,
-                include_answer=True,
+            key = (normalize_query(query), max_results)
+            cached = self._cache.get(key)
+            if cached is not None:
+                CACHE_REQUESTS.labels("web_search", "hit").inc()
+                logger.info(f"🌐 Web search cache hit: '{query[:50]}'")
+                return cached
+
+            CACHE_REQUESTS.labels("web_search", "miss").inc()
+            result, shared = self._inflight.do(
+                key,
+                lambda: self._search_and_cache(key, query, max_results),
+                timeout=upstream_timeout(TAVILY_TIMEOUT_SECONDS),
             )
-
-            # Format results
-            results = []
-
-            # Include Tavily's AI-generated answer if available
-            if response.get("answer"):
-                results.append(f"**Quick Answer:** {response['answer']}\n")
-
-            results.append("**Web Sources:**")
-            for idx, item in enumerate(response.get("results", [])[:max_results], 1):
-                title = item.get("title", "Untitled")
-                url = item.get("url", "")
-                snippet = item.get("content", "")[:250]
-                results.append(f"{idx}. **{title}**\n   {snippet}...\n   Source: {url}")
-
-            if not response.get("results"):
-                return "No web results found for this query."
-
-            return "\n\n".join(results)
-
+            if shared:
+                CACHE_REQUESTS.labels("web_search", "coalesced").inc()
+                logger.info(f"🌐 Web search coalesced with in-flight request: '{query[:50]}'")
+            return result
+
+        except (DeadlineExceeded, TimeoutError):
+            record_timeout("tavily")
+            return "Web search timed out. Answer without web results."
         except ValueError as e:
             logger.warning(f"Tavily not configured: {e}")
             return "Web search is not available. TAVILY_API_KEY is not configured."
@@ -81,3 +92,60 @@ class WebSearchPlugin:
         except Exception as e:
             logger.error(f"Web search error: {e}")
             return f"Error searching the web: {str(e)}"
+
+    def _search_and_cache(self, key: tuple, query: str, max_results: int) -> str:
+        """Call Tavily and cache the formatted result (errors are not cached)."""
+        result = self._search(query, max_results)
+        self._cache.set(key, result)
+        return result
+
+    def _search(self, query: str, max_results: int) -> str:
+        """Single outbound Tavily request, formatted as markdown."""
+        client = self._get_client()
+        self.outbound_requests += 1
+
+        try:
+            from tavily.errors import TimeoutError as TavilyTimeoutError
+        except ImportError:
+            TavilyTimeoutError = TimeoutError
+
+        try:
+            with span("upstream.tavily"):
+                response = client.search(
+                    query=query,
+                    search_depth="basic",
+                    max_results=max_results,
+                    include_answer=True,
+                    timeout=upstream_timeout(TAVILY_TIMEOUT_SECONDS),
+                )
+        except TavilyTimeoutError as e:
+            raise DeadlineExceeded("Tavily timed out") from e
+
+        # Format results
+        results = []
+
+        # Include Tavily's AI-generated answer if available
+        if response.get("answer"):
+            results.append(f"**Quick Answer:** {response['answer']}\n")
+
+        results.append("**Web Sources:**")
+        for idx, item in enumerate(response.get("results", [])[:max_results], 1):
+            title = item.get("title", "Untitled")
+            url = item.get("url", "")
+            snippet = item.get("content", "")[:250]
+            results.append(f"{idx}. **{title}**\n   {snippet}...\n   Source: {url}")
+
+        if not response.get("results"):
+            return "No web results found for this query."
+
+        return "\n\n".join(results)
+
+    def cache_stats(self) -> dict:
+        """Cache and coalescing counters for this plugin instance."""
+        return {
+            "cache_hits": self._cache.hits,
+            "cache_misses": self._cache.misses,
+            "cache_entries": len(self._cache),
+            "coalesced": self._inflight.followers,
+            "outbound_requests": self.outbound_requests,
+        }
@@ -0,0 +1,141 @@
+"""
+Model Router - Sends low-complexity agent turns to a smaller deployment.
+Uses a cheap local heuristic; anything that might need RAG or web search
+stays on the primary (gpt-4o) deployment.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from metrics import AGENT_TURN_LATENCY, AGENT_TURN_TOKENS, AGENT_TURN_ERRORS
+
+logger = logging.getLogger(__name__)
+
+ROUTE_LIGHT = "light"
+ROUTE_HEAVY = "heavy"
+
+# Plugins the light route is allowed to call
+LIGHT_ROUTE_PLUGINS = ["DateTime", "AboutMe"]
+
+# Longer messages are rarely trivial; keep them on the primary model
+LIGHT_ROUTE_MAX_CHARS = 160
+
+# Anything that smells like research, documents or the web goes heavy
+HEAVY_PATTERN = re.compile(
+    r"\b(paper|papers|research|publication|study|studies|document|documents|pdf|"
+    r"search|web|internet|news|latest|explain|compare|summar\w*|why|how does|"
+    r"makale|araştır\w*|yayın\w*|doküman\w*|belge\w*|ara\b|internette|haber\w*|"
+    r"açıkla\w*|özetle\w*|neden|karşılaştır\w*)",
+    re.IGNORECASE,
+)
+
+GREETING_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|yo|hiya|good (morning|afternoon|evening)|thanks|thank you|"
+    r"merhaba|selam|slm|günaydın|iyi akşamlar|teşekkürler|sağ ?ol)[\s!.,?]*$",
+    re.IGNORECASE,
+)
+
+# Date/time questions about the present only (the light route has the DateTime
+# plugin but no web search): "what day did X happen" or "time complexity of ..."
+# must not match. Whole message, ignoring trailing punctuation.
+_NOW = r"(?:\s+(?:is it|now|right now|today))*(?:\s+in\s+[\w/ ]{2,30})?"
+DATETIME_PATTERN = re.compile(
+    r"^\s*(?:"
+    rf"what(?:'s| is)\s+the\s+(?:current\s+|local\s+)?(?:time|date|day)(?:\s+and\s+(?:time|date))?{_NOW}|"
+    rf"what\s+time\s+is\s+it{_NOW}|"
+    rf"current\s+(?:time|date)(?:\s+and\s+(?:time|date))?{_NOW}|"
+    r"what(?:'s| is)\s+today(?:'s\s+date)?|"
+    r"what\s+(?:day|date)(?:\s+of\s+the\s+week)?\s+(?:is\s+(?:it|today|tomorrow)|was\s+(?:it\s+)?yesterday)(?:\s+today)?|"
+    r"what\s+(?:day|date)\s+(?:will\s+it\s+be|was\s+it)\s+(?:in\s+\d+\s+days|\d+\s+days\s+(?:ago|from\s+now))|"
+    r"(?:how\s+many\s+)?days\s+(?:left\s+)?(?:until|till)\s+[\w\-' ]{2,40}|"
+    r"saat\s+kaç|şu\s+an\s+saat\s+kaç|bugün(?:ün\s+tarihi)?(?:\s+ne|\s+nedir)?|bugün\s+günlerden\s+ne|"
+    r"(?:bugün|yarın|dün)\s+(?:hangi\s+gün|ayın\s+kaçı)|[\w\-' ]{2,40}?\s+kaç\s+gün\s+(?:var|kaldı)"
+    r")[\s?!.]*$",
+    re.IGNORECASE,
+)
+
+ABOUT_ME_PATTERN = re.compile(
+    r"\b(who is mert|who are you|about mert|mert'?s (bio|background|contact|email|"
+    r"linkedin|github|expertise|skills|education|languages)|contact|e-?mail|linkedin|"
+    r"github|portfolio|resume|cv|bio|mert kimdir|mert kim|kimsin|iletişim|özgeçmiş)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RouteDecision:
+    """Routing decision for a single agent turn."""
+    route: str
+    reason: str
+
+
+def classify_turn(message: str, conversation_history: Optional[list] = None) -> RouteDecision:
+    """
+    Classify an agent turn as light or heavy.
+    Conservative: only clearly trivial turns are routed to the light model.
+    """
+    text = message.strip()
+
+    if len(text) > LIGHT_ROUTE_MAX_CHARS:
+        return RouteDecision(ROUTE_HEAVY, "long_message")
+
+    if HEAVY_PATTERN.search(text):
+        return RouteDecision(ROUTE_HEAVY, "heavy_keyword")
+
+    if GREETING_PATTERN.match(text):
+        return RouteDecision(ROUTE_LIGHT, "greeting")
+
+    # Follow-ups ("tell me more", "and then?") depend on earlier context
+    if conversation_history:
+        last = conversation_history[-1]
+        if last.get("role") == "assistant" and len(text.split()) <= 4:
+            return RouteDecision(ROUTE_HEAVY, "follow_up")
+
+    if DATETIME_PATTERN.search(text):
+        return RouteDecision(ROUTE_LIGHT, "datetime")
+
+    if ABOUT_ME_PATTERN.search(text):
+        return RouteDecision(ROUTE_LIGHT, "about_me")
+
+    return RouteDecision(ROUTE_HEAVY, "default")
+
+
+class RouteStats:
+    """Per-route latency, token and error metrics (exported on /metrics)."""
+
+    def record(self, route: str, latency_s: float, prompt_tokens: int = 0, completion_tokens: int = 0, error: bool = False):
+        """Record a completed agent turn."""
+        AGENT_TURN_LATENCY.labels(route).observe(latency_s)
+        if prompt_tokens:
+            AGENT_TURN_TOKENS.labels(route, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            AGENT_TURN_TOKENS.labels(route, "completion").inc(completion_tokens)
+        if error:
+            AGENT_TURN_ERRORS.labels(route).inc()
+
+
+class ModelRouter:
+    """Chooses the chat service for an agent turn."""
+
+    def __init__(self, light_deployment: Optional[str] = None):
+        self.light_deployment = light_deployment if light_deployment is not None else os.environ.get(
+            "AZURE_OPENAI_FAST_DEPLOYMENT", ""
+        )
+        self.stats = RouteStats()
+
+    @property
+    def enabled(self) -> bool:
+        """Routing is only active when a light deployment is configured."""
+        return bool(self.light_deployment)
+
+    def route(self, message: str, conversation_history: Optional[list] = None) -> RouteDecision:
+        """Pick a route for this turn."""
+        if not self.enabled:
+            return RouteDecision(ROUTE_HEAVY, "routing_disabled")
+
+        decision = classify_turn(message, conversation_history)
+        logger.info(f"🔀 Agent route: {decision.route} ({decision.reason})")
+        return decision
@@ -0,0 +1,221 @@
+"""
+Request deadlines and tail-latency hedging for outbound calls.
+A deadline is set once per request and read by every upstream call
+(OpenAI, Search via OpenAI, Tavily, Semantic Kernel) to size its timeout.
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from typing import Callable, Optional, TypeVar
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# End-to-end budget for one request (Functions default timeout is much longer)
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 25))
+
+# Per-call caps, further limited by whatever is left of the deadline
+OPENAI_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_TIMEOUT_SECONDS", 20))
+TAVILY_TIMEOUT_SECONDS = float(os.environ.get("TAVILY_TIMEOUT_SECONDS", 8))
+
+# Hedging: after the observed p95, send a duplicate to a secondary deployment
+HEDGING_ENABLED = os.environ.get("HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_DEPLOYMENT = os.environ.get("AZURE_OPENAI_HEDGE_DEPLOYMENT", "")
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", 0.95))
+HEDGE_MIN_SAMPLES = 20
+
+# Smallest timeout worth sending upstream
+MIN_UPSTREAM_TIMEOUT = 0.5
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request deadline passed before or during an upstream call."""
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEADLINE PROPAGATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Deadline:
+    """Absolute point in time by which a request must finish."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout for the next upstream call; raises if too little time is left."""
+        remaining = self.remaining()
+        if remaining < MIN_UPSTREAM_TIMEOUT:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return min(remaining, cap) if cap is not None else remaining
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None):
+    """Set the request deadline for everything called inside this block."""
+    deadline = Deadline(seconds if seconds is not None else REQUEST_DEADLINE_SECONDS)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def upstream_timeout(cap: float) -> float:
+    """Timeout for an outbound call: the per-call cap, bounded by the request deadline."""
+    deadline = current_deadline()
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class UpstreamStats:
+    """Thread-safe counters for timeouts and hedging."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+
+    def incr(self, name: str, upstream: str):
+        key = f"{upstream}.{name}"
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+
+upstream_stats = UpstreamStats()
+
+
+def _upstream_samples():
+    for key, value in upstream_stats.snapshot().items():
+        upstream, _, event = key.partition(".")
+        yield {"upstream": upstream, "event": event}, value
+
+
+metrics.register_callback(
+    "upstream_events_total", "Upstream timeouts, hedges and failovers", "counter", _upstream_samples
+)
+
+
+def record_timeout(upstream: str):
+    upstream_stats.incr("timeouts", upstream)
+    logger.warning(f"⏱️ Upstream timeout: {upstream}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HEDGED REQUESTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LatencyTracker:
+    """Rolling window of recent latencies for picking the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Shared pool for hedged calls (outbound I/O only)
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+def _submit(fn: Callable[[float], T], timeout: float):
+    ctx = contextvars.copy_context()
+    return _hedge_executor.submit(ctx.run, fn, timeout)
+
+
+def hedged_call(
+    upstream: str,
+    primary: Callable[[float], T],
+    secondary: Optional[Callable[[float], T]],
+    tracker: LatencyTracker,
+    cap: float,
+) -> T:
+    """
+    Call primary(timeout); if it is slower than the tracked p95 and a secondary
+    is available, also call secondary(timeout) and return whichever succeeds first.
+    The losing call is left to finish in the background (sync HTTP can't be cancelled).
+    """
+    timeout = upstream_timeout(cap)
+    hedge_after = tracker.percentile(HEDGE_PERCENTILE) if HEDGING_ENABLED and secondary else None
+    start = time.monotonic()
+
+    if hedge_after is None or hedge_after >= timeout:
+        result = primary(timeout)
+        tracker.record(time.monotonic() - start)
+        return result
+
+    first = _submit(primary, timeout)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        result = first.result()
+        tracker.record(time.monotonic() - start)
+        return result
+
+    upstream_stats.incr("hedges", upstream)
+    second = _submit(secondary, upstream_timeout(cap))
+    pending = {first, second}
+    last_error: Optional[BaseException] = None
+
+    while pending:
+        remaining = max(0.0, timeout - (time.monotonic() - start))
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    upstream_stats.incr("hedge_wins", upstream)
+                tracker.record(time.monotonic() - start)
+                return future.result()
+            last_error = future.exception()
+
+    if last_error is not None:
+        raise last_error
+    raise DeadlineExceeded(f"{upstream} did not respond before the deadline")
+
@@ -0,0 +1,165 @@
+"""
+Near-duplicate detection and diversification for chunks.
+
+Indexing: the same paper often exists in several versions (preprint, journal,
+supplement), and repeated front matter produces identical chunks. A MinHash
+signature over word shingles estimates Jaccard similarity; LSH banding finds
+candidate pairs without comparing every chunk to every other, so
+near-duplicates are skipped before they are embedded and stored
+(scripts/index_documents.py).
+
+Retrieval: maximal marginal relevance picks the next chunk by relevance minus
+its similarity to chunks already picked, and drops candidates that repeat an
+earlier one outright, so the top_n chunks sent to the model cover more ground
+(local_retrieval.py).
+"""
+
+import re
+import zlib
+import threading
+from typing import Optional
+
+import numpy as np
+
+from lexical import fold
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Words per shingle
+SHINGLE_SIZE = 5
+# Hash functions per signature = bands x rows; 32 x 4 puts the LSH
+# 50%-candidate point near Jaccard 0.42, well under the threshold
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+# Estimated Jaccard at or above which a chunk is a near-duplicate
+DEFAULT_DUPLICATE_THRESHOLD = 0.85
+
+# Universal hashing (a * x + b) mod p, p > 2^32; a, b, x < 2^32 keeps it within uint64
+_PRIME = np.uint64((1 << 32) + 15)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Folded word n-grams (whole text as one shingle when shorter than n)."""
+    words = _WORD.findall(fold(text))
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MINHASH + LSH
+# ═══════════════════════════════════════════════════════════════════════════
+
+class MinHasher:
+    """Fixed-seed MinHash signatures (same seed = comparable signatures)."""
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, permutations, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, permutations, dtype=np.uint64)
+
+    def signature(self, shingle_set: set) -> np.ndarray:
+        if not shingle_set:
+            return np.full(len(self.a), _MAX_HASH, dtype=np.uint64)
+        x = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64, count=len(shingle_set)
+        )
+        hashed = (self.a[:, None] * x[None, :] + self.b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    Incremental near-duplicate filter. add() returns the key of an earlier
+    near-duplicate (the new text is not stored) or None (the text is kept).
+    Thread-safe, for the indexer's parallel mode.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+                 permutations: int = MINHASH_PERMUTATIONS, bands: int = LSH_BANDS):
+        if permutations % bands:
+            raise ValueError(f"{permutations} permutations do not split into {bands} bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.hasher = MinHasher(permutations)
+        self._buckets = [dict() for _ in range(bands)]
+        self._signatures = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.duplicates = 0
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, signature: np.ndarray) -> Optional[tuple[str, float]]:
+        """Best earlier (key, estimated Jaccard) at or above the threshold."""
+        best = None
+        seen = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            for candidate in band.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+        return best
+
+    def add(self, key: str, text: str) -> Optional[str]:
+        signature = self.hasher.signature(shingles(text))
+        with self._lock:
+            self.checked += 1
+            match = self.find(signature)
+            if match is not None:
+                self.duplicates += 1
+                return match[0]
+            self._signatures[key] = signature
+            for band, band_key in zip(self._buckets, self._band_keys(signature)):
+                band.setdefault(band_key, []).append(key)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RETRIEVAL DIVERSIFICATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def mmr(relevance, similarity: np.ndarray, k: int, lambda_: float = 0.7,
+        duplicate_threshold: float = 1.0) -> list[int]:
+    """
+    Maximal marginal relevance over candidates ordered best first.
+
+    relevance: per-candidate scores (any scale, min-max normalized here);
+    similarity: candidate x candidate cosine matrix. Candidates at least
+    duplicate_threshold similar to a picked one are never picked. Returns
+    candidate indices in pick order (may be fewer than k).
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    if n == 0 or k <= 0:
+        return []
+    spread = float(relevance.max() - relevance.min())
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(n, dtype=np.float32)
+
+    picked = [0]
+    redundancy = similarity[0].astype(np.float32).copy()
+    available = np.ones(n, dtype=bool)
+    available[0] = False
+    available &= redundancy < duplicate_threshold
+    while len(picked) < k and available.any():
+        marginal = lambda_ * relevance - (1 - lambda_) * redundancy
+        marginal[~available] = -np.inf
+        best = int(np.argmax(marginal))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+        available &= redundancy < duplicate_threshold
+    return picked
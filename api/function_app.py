@@ -3,21 +3,30 @@ Azure Function App - Secure RAG API
 With rate limiting, request validation, and origin protection.
 """
 
-import os
-import json
 import logging
-import time
+from typing import Optional
+
 import azure.functions as func
-from openai import AzureOpenAI
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 
 from security import (
     secure_endpoint,
     validate_chat_request,
     get_cors_headers,
     sanitize_input,
+    validate_metrics_token,
     RATE_LIMIT_CHAT_MAX,
+    METRICS_TOKEN,
 )
+from deadline import DeadlineExceeded, upstream_timeout, REQUEST_DEADLINE_SECONDS
+from limiter import Overloaded
+from coalescing import SingleFlight, normalize_query
+from openai_pool import get_chat_pool
+from tracing import span, annotate, current_trace
+from metrics import metrics, CACHE_REQUESTS
+from responses import json_response, error_response
+from warmup import prewarm, start_background_prewarm, PREWARM_ON_START
+from health import liveness, deep_check
+from settings import get_settings, retrieval_profile_scope, RETRIEVAL_PROFILES
 
 # Initialize Function App
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
@@ -26,75 +35,137 @@ app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Heavy imports (openai, azure.identity, semantic_kernel, search models) are deferred
+# to the routes that need them; see scripts/import_budget.py
+if PREWARM_ON_START:
+    start_background_prewarm()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # AZURE OPENAI CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════
-AZURE_OPENAI_ENDPOINT = os.environ.get("AZURE_OPENAI_ENDPOINT", "")
-AZURE_OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-CHAT_DEPLOYMENT = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
-EMBEDDING_DEPLOYMENT = os.environ.get("AZURE_EMBEDDING_DEPLOYMENT", "text-embedding-3-large")
-
-
-def get_openai_client() -> AzureOpenAI:
-    """Azure OpenAI client oluştur (Managed Identity ile)."""
-    # Try Managed Identity first, fallback to API key for local dev
-    api_key = os.environ.get("AZURE_OPENAI_API_KEY", "")
-
-    if api_key and not api_key.startswith("@Microsoft.KeyVault"):
-        # Local development with API key
-        logger.info("Using API key for Azure OpenAI authentication")
-        return AzureOpenAI(
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-            api_key=api_key,
-            api_version=AZURE_OPENAI_API_VERSION,
+# Endpoints/deployments for chat live in openai_pool (AZURE_OPENAI_POOL or single deployment);
+# Search / embedding settings are resolved once in settings.py
+
+TIMEOUT_ERROR = "The request timed out. Please try again."
+OVERLOADED_ERROR = "The service is busy. Please try again shortly."
+
+RAG_SYSTEM_PROMPT = (
+    "Sen yardımcı bir asistansın. Soruları sadece sağlanan dokümanlara dayanarak cevapla. "
+    "Eğer cevap dokümanlarda yoksa, bunu açıkça belirt. "
+    "Kaynaklarını belirt."
+)
+
+
+def get_data_source_config(profile: str) -> dict:
+    """Azure AI Search 'On Your Data' yapılandırması (settings'ten, istek başına yeniden kurulmaz)."""
+    return get_settings().data_source_config(profile)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REQUEST COALESCING
+# ═══════════════════════════════════════════════════════════════════════════
+# Bursts of identical first questions (a shared link) wait on one upstream call.
+# Admission and rate limiting still run per request before the handler.
+
+_chat_inflight = SingleFlight()
+
+
+def coalesced(route: str, body, profile: Optional[str], fn):
+    """
+    Run fn once for concurrent identical first questions on a route.
+    Only requests without history are coalesced; a follower waits at most
+    until its own deadline. Returns (result, shared).
+    """
+    if body.conversation_history:
+        return fn(), False
+
+    key = (route, profile, normalize_query(body.message))
+    led = False
+
+    def lead():
+        # Only the leader runs fn: it is the one miss; followers count as coalesced
+        nonlocal led
+        led = True
+        CACHE_REQUESTS.labels(route, "miss").inc()
+        return fn()
+
+    try:
+        result, shared = _chat_inflight.do(key, lead, timeout=upstream_timeout(REQUEST_DEADLINE_SECONDS))
+    except DeadlineExceeded:
+        raise
+    except TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded waiting for in-flight call")
+    finally:
+        if not led:
+            CACHE_REQUESTS.labels(route, "coalesced").inc()
+    if shared:
+        annotate(coalesced=True)
+        logger.info(f"🔗 {route} coalesced with in-flight request: '{body.message[:50]}'")
+    return result, shared
+
+
+def rag_answer(user_message: str, conversation_history: list, retrieval_profile: str):
+    """Retrieve, generate and extract citations; returns (answer, citations, usage)."""
+    # Build messages
+    messages = [{"role": "system", "content": RAG_SYSTEM_PROMPT}]
+    messages.extend(conversation_history)
+    messages.append({"role": "user", "content": user_message})
+
+    # Azure OpenAI call (timed as the "upstream.openai" span)
+    logger.info(f"🔍 Starting RAG query for: '{user_message[:50]}...'")
+    settings = get_settings()
+
+    if settings.retrieval_backend == "local":
+        # Retrieve from the in-process snapshot and ground the prompt here (no Search hop)
+        from local_retrieval import retrieve, format_sources
+
+        hits = retrieve(user_message, RETRIEVAL_PROFILES[retrieval_profile])
+        messages[0] = {"role": "system", "content": f"{RAG_SYSTEM_PROMPT}\n\nDokümanlar:\n{format_sources(hits)}"}
+        response = get_chat_pool().chat_completion(
+            messages=messages,
+            max_tokens=800,
+            temperature=0.7,
         )
+        source_citations = [hit.citation() for hit in hits]
     else:
-        # Production: Use Managed Identity
-        logger.info("Using Managed Identity for Azure OpenAI authentication")
-        credential = DefaultAzureCredential()
-        token_provider = get_bearer_token_provider(
-            credential,
-            "https://cognitiveservices.azure.com/.default"
-        )
-        return AzureOpenAI(
-            azure_endpoint=AZURE_OPENAI_ENDPOINT,
-            azure_ad_token_provider=token_provider,
-            api_version=AZURE_OPENAI_API_VERSION,
+        data_source_profile = retrieval_profile
+        if settings.lexical_shortcut:
+            # Keyword questions with a clear BM25 winner skip the query embedding and reranker
+            from lexical import keyword_query
+
+            with span("retrieval.lexical"):
+                if keyword_query(user_message):
+                    data_source_profile = f"{retrieval_profile}:keyword"
+                    annotate(retrieval_path="lexical")
+
+        response = get_chat_pool().chat_completion(
+            messages=messages,
+            max_tokens=800,
+            temperature=0.7,
+            extra_body={
+                "data_sources": [get_data_source_config(data_source_profile)],
+            },
         )
+        source_citations = None
 
+    # Extract response
+    with span("citations"):
+        choice = response.choices[0]
+        answer = choice.message.content
 
-def get_data_source_config() -> dict:
-    """Azure AI Search 'On Your Data' yapılandırması (Managed Identity ile)."""
-    # Check if we're using API key (local dev) or Managed Identity (production)
-    search_key = os.environ.get("AZURE_SEARCH_KEY", "")
-    use_managed_identity = not search_key or search_key.startswith("@Microsoft.KeyVault")
+        if source_citations is None:
+            context = getattr(choice.message, "context", None) or {}
+            source_citations = context.get("citations", [])
 
-    auth_config = {
-        "type": "system_assigned_managed_identity" if use_managed_identity else "api_key"
-    }
-    if not use_managed_identity:
-        auth_config["key"] = search_key
-        logger.info("Using API key for Azure AI Search authentication")
-    else:
-        logger.info("Using Managed Identity for Azure AI Search authentication")
-
-    return {
-        "type": "azure_search",
-        "parameters": {
-            "endpoint": os.environ["AZURE_SEARCH_ENDPOINT"],
-            "index_name": os.environ.get("AZURE_SEARCH_INDEX", "documents-index"),
-            "authentication": auth_config,
-            "query_type": "vector_semantic_hybrid",
-            "semantic_configuration": "default",
-            "embedding_dependency": {
-                "type": "deployment_name",
-                "deployment_name": EMBEDDING_DEPLOYMENT,
-            },
-            "top_n_documents": 5,
-            "in_scope": True,
-            "strictness": 3,
-        },
-    }
+        citations = []
+        for citation in source_citations:
+            citations.append({
+                "title": sanitize_input(citation.get("title", ""), 200),
+                "content": sanitize_input(citation.get("content", ""), 300),
+                "filepath": sanitize_input(citation.get("filepath", ""), 500),
+            })
+
+    return answer, citations, response.usage
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -107,114 +178,58 @@ def chat(req: func.HttpRequest) -> func.HttpResponse:
     RAG Chat - Azure AI Search'teki dokümanlarda arayarak cevap verir.
     Rate limited to 10 requests per minute per IP.
     """
-    start_time = time.time()
     headers = get_cors_headers(req)
 
     # Validate request
-    validation_start = time.time()
     is_valid, error, body = validate_chat_request(req)
-    validation_time = time.time() - validation_start
 
     if not is_valid:
-        return func.HttpResponse(
-            json.dumps({"error": error}),
-            status_code=400,
-            headers=headers,
-        )
+        return error_response(error, 400, headers)
 
     try:
-        user_message = body["message"]
-        conversation_history = body["conversation_history"]
-
-        logger.info(f"⏱️ Request validation: {validation_time:.3f}s")
-
-        # Build messages
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "Sen yardımcı bir asistansın. Soruları sadece sağlanan dokümanlara dayanarak cevapla. "
-                    "Eğer cevap dokümanlarda yoksa, bunu açıkça belirt. "
-                    "Kaynaklarını belirt."
-                ),
-            }
-        ]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": user_message})
-
-        # Azure OpenAI call
-        logger.info(f"🔍 Starting RAG query for: '{user_message[:50]}...'")
-        openai_start = time.time()
-
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model=CHAT_DEPLOYMENT,
-            messages=messages,
-            max_tokens=800,
-            temperature=0.7,
-            extra_body={
-                "data_sources": [get_data_source_config()],
-            },
+        settings = get_settings()
+        retrieval_profile = settings.retrieval_profile("chat", body.retrieval_profile)
+        annotate(retrieval_profile=retrieval_profile, retrieval_backend=settings.retrieval_backend)
+
+        (answer, citations, usage), shared = coalesced(
+            "chat",
+            body,
+            retrieval_profile,
+            lambda: rag_answer(body.message, body.conversation_history, retrieval_profile),
         )
 
-        openai_time = time.time() - openai_start
-        logger.info(f"⏱️ Azure OpenAI + Search: {openai_time:.3f}s")
-
-        # Extract response
-        response_processing_start = time.time()
-        choice = response.choices[0]
-        answer = choice.message.content
-
-        # Extract citations
-        citations = []
-        if hasattr(choice.message, "context") and choice.message.context:
-            for citation in choice.message.context.get("citations", []):
-                citations.append({
-                    "title": sanitize_input(citation.get("title", ""), 200),
-                    "content": sanitize_input(citation.get("content", ""), 300),
-                    "filepath": sanitize_input(citation.get("filepath", ""), 500),
-                })
-
-        response_processing_time = time.time() - response_processing_start
-        total_time = time.time() - start_time
-
-        logger.info(f"⏱️ Response processing: {response_processing_time:.3f}s")
-        logger.info(f"⏱️ Total request time: {total_time:.3f}s | Tokens: {response.usage.total_tokens}")
-        logger.info(f"📊 Breakdown - Validation: {validation_time:.3f}s | OpenAI+Search: {openai_time:.3f}s | Processing: {response_processing_time:.3f}s")
-
-        return func.HttpResponse(
-            json.dumps({
-                "answer": answer,
-                "citations": citations,
-                "usage": {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens,
-                },
-                "timing": {
-                    "total_ms": round(total_time * 1000),
-                    "openai_search_ms": round(openai_time * 1000),
-                    "processing_ms": round(response_processing_time * 1000),
-                }
-            }),
-            status_code=200,
-            headers=headers,
-        )
+        if not shared:
+            annotate(total_tokens=usage.total_tokens)
+        trace = current_trace()
+        stages = trace.breakdown()
+
+        return json_response({
+            "answer": answer,
+            "citations": citations,
+            "retrieval_profile": retrieval_profile,
+            "usage": {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "total_tokens": usage.total_tokens,
+            },
+            "timing": {
+                "total_ms": round(trace.elapsed_ms()),
+                "openai_search_ms": round(stages.get("upstream.openai", 0)),
+                "processing_ms": round(stages.get("citations", 0)),
+                "stages": stages,
+            }
+        }, 200, headers, req)
 
+    except DeadlineExceeded:
+        return error_response(TIMEOUT_ERROR, 504, headers)
+    except Overloaded as e:
+        return error_response(OVERLOADED_ERROR, 503, {**headers, "Retry-After": str(e.retry_after)})
     except KeyError as e:
         logger.error(f"Missing environment variable: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "Server configuration error"}),
-            status_code=500,
-            headers=headers,
-        )
+        return error_response("Server configuration error", 500, headers)
     except Exception as e:
         logger.error(f"Chat error: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "An error occurred processing your request"}),
-            status_code=500,
-            headers=headers,
-        )
+        return error_response("An error occurred processing your request", 500, headers)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -232,84 +247,102 @@ def chat_simple(req: func.HttpRequest) -> func.HttpResponse:
     # Validate request
     is_valid, error, body = validate_chat_request(req)
     if not is_valid:
-        return func.HttpResponse(
-            json.dumps({"error": error}),
-            status_code=400,
-            headers=headers,
-        )
+        return error_response(error, 400, headers)
 
     try:
-        user_message = body["message"]
-        conversation_history = body["conversation_history"]
+        user_message = body.message
+        conversation_history = body.conversation_history
 
         messages = [{"role": "system", "content": "Sen yardımcı bir asistansın."}]
         messages.extend(conversation_history)
         messages.append({"role": "user", "content": user_message})
 
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model=CHAT_DEPLOYMENT,
+        response = get_chat_pool().chat_completion(
             messages=messages,
             max_tokens=800,
             temperature=0.7,
         )
 
-        return func.HttpResponse(
-            json.dumps({
+        return json_response(
+            {
                 "answer": response.choices[0].message.content,
                 "usage": {
                     "prompt_tokens": response.usage.prompt_tokens,
                     "completion_tokens": response.usage.completion_tokens,
                     "total_tokens": response.usage.total_tokens,
                 }
-            }),
-            status_code=200,
-            headers=headers,
+            },
+            200,
+            headers,
+            req,
         )
 
+    except DeadlineExceeded:
+        return error_response(TIMEOUT_ERROR, 504, headers)
+    except Overloaded as e:
+        return error_response(OVERLOADED_ERROR, 503, {**headers, "Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"Chat error: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "An error occurred processing your request"}),
-            status_code=500,
-            headers=headers,
-        )
+        return error_response("An error occurred processing your request", 500, headers)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
-# HEALTH CHECK (More lenient rate limit)
+# HEALTH CHECK (not rate limited: liveness is a precomputed response,
+# deep mode is cached for HEALTH_DEEP_TTL seconds)
 # ═══════════════════════════════════════════════════════════════════════════
 @app.route(route="health", methods=["GET", "OPTIONS"])
-@secure_endpoint(max_requests=60, require_signature=False)
 def health(req: func.HttpRequest) -> func.HttpResponse:
-    """Health check endpoint."""
+    """
+    Public liveness by default; ?deep=1 probes OpenAI, Search and Tavily in
+    parallel and reports upstream latencies, pool state and agent readiness.
+    Deep mode needs the METRICS_TOKEN bearer token (404 when none is configured).
+    """
     headers = get_cors_headers(req)
+    if req.method == "OPTIONS":
+        return func.HttpResponse(status_code=204, headers=headers)
+
+    if req.params.get("deep") in ("1", "true"):
+        if not METRICS_TOKEN:
+            return func.HttpResponse(status_code=404)
+        if not validate_metrics_token(req):
+            return func.HttpResponse(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        report, status_code = deep_check()
+        return json_response(report, status_code, headers, req)
+
+    body, status_code = liveness()
+    return func.HttpResponse(body, status_code=status_code, headers=headers)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WARM-UP (Premium/Dedicated plans call this before routing traffic to a new instance)
+# ═══════════════════════════════════════════════════════════════════════════
+@app.warm_up_trigger("warmup")
+def warmup(warmup) -> None:
+    """Build clients, tokens and the agent kernel before the first request."""
+    prewarm()
 
-    required_vars = [
-        "AZURE_OPENAI_API_KEY",
-        "AZURE_SEARCH_ENDPOINT",
-        "AZURE_SEARCH_KEY",
-    ]
-
-    missing = [var for var in required_vars if not os.environ.get(var)]
-
-    if missing:
-        return func.HttpResponse(
-            json.dumps({
-                "status": "unhealthy",
-                "message": "Service not fully configured",
-            }),
-            status_code=503,
-            headers=headers,
-        )
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS (Prometheus scrape, bearer token protected)
+# ═══════════════════════════════════════════════════════════════════════════
+@app.route(route="metrics", methods=["GET"])
+def prometheus_metrics(req: func.HttpRequest) -> func.HttpResponse:
+    """
+    Latency histograms and counters of this worker in Prometheus text format.
+    Hidden (404) unless METRICS_TOKEN is configured; not rate limited so scrapes
+    don't compete with user traffic.
+    """
+    if not METRICS_TOKEN:
+        return func.HttpResponse(status_code=404)
+
+    if not validate_metrics_token(req):
+        return func.HttpResponse(status_code=401, headers={"WWW-Authenticate": "Bearer"})
 
     return func.HttpResponse(
-        json.dumps({
-            "status": "healthy",
-            "version": "2.0.0",
-        }),
+        metrics.render(),
         status_code=200,
-        headers=headers,
+        mimetype="text/plain",
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
     )
 
 
@@ -334,28 +367,24 @@ def init_index(req: func.HttpRequest) -> func.HttpResponse:
             VectorSearch,
             HnswAlgorithmConfiguration,
             VectorSearchProfile,
+            ScalarQuantizationCompression,
+            ScalarQuantizationParameters,
+            BinaryQuantizationCompression,
+            RescoringOptions,
             SemanticConfiguration,
             SemanticField,
             SemanticPrioritizedFields,
             SemanticSearch,
         )
-        from azure.core.credentials import AzureKeyCredential
-
-        # Use Managed Identity for production, API key for local dev
-        search_key = os.environ.get("AZURE_SEARCH_KEY", "")
-        if search_key and not search_key.startswith("@Microsoft.KeyVault"):
-            logger.info("Using API key for Search index creation")
-            credential = AzureKeyCredential(search_key)
-        else:
-            logger.info("Using Managed Identity for Search index creation")
-            credential = DefaultAzureCredential()
 
+        # Managed Identity in production, API key for local dev
+        settings = get_settings()
         index_client = SearchIndexClient(
-            endpoint=os.environ["AZURE_SEARCH_ENDPOINT"],
-            credential=credential,
+            endpoint=settings.search_endpoint,
+            credential=settings.search_credential(),
         )
 
-        index_name = os.environ.get("AZURE_SEARCH_INDEX", "documents-index")
+        index_name = settings.search_index
 
         fields = [
             SearchField(name="id", type=SearchFieldDataType.String, key=True, filterable=True),
@@ -367,19 +396,44 @@ def init_index(req: func.HttpRequest) -> func.HttpResponse:
                 name="content_vector",
                 type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
                 searchable=True,
-                vector_search_dimensions=3072,
+                vector_search_dimensions=settings.vector_dimensions,
                 vector_search_profile_name="vector-profile",
             ),
         ]
 
+        # Optional compression: quantized vectors for HNSW, originals kept for rescoring
+        # (and for scripts/export_snapshot.py)
+        compressions = []
+        compression_name = None
+        if settings.vector_compression != "none":
+            compression_name = f"{settings.vector_compression}-compression"
+            rescoring = RescoringOptions(
+                enable_rescoring=True,
+                default_oversampling=4.0 if settings.vector_compression == "scalar" else 10.0,
+                rescore_storage_method="preserveOriginals",
+            )
+            if settings.vector_compression == "scalar":
+                compressions.append(ScalarQuantizationCompression(
+                    compression_name=compression_name,
+                    rescoring_options=rescoring,
+                    parameters=ScalarQuantizationParameters(quantized_data_type="int8"),
+                ))
+            else:
+                compressions.append(BinaryQuantizationCompression(
+                    compression_name=compression_name,
+                    rescoring_options=rescoring,
+                ))
+
         vector_search = VectorSearch(
             algorithms=[HnswAlgorithmConfiguration(name="hnsw-config")],
             profiles=[
                 VectorSearchProfile(
                     name="vector-profile",
                     algorithm_configuration_name="hnsw-config",
+                    compression_name=compression_name,
                 ),
             ],
+            compressions=compressions or None,
         )
 
         semantic_config = SemanticConfiguration(
@@ -401,22 +455,21 @@ def init_index(req: func.HttpRequest) -> func.HttpResponse:
 
         result = index_client.create_or_update_index(index)
 
-        return func.HttpResponse(
-            json.dumps({
+        return json_response(
+            {
                 "success": True,
                 "message": f"Index '{result.name}' created successfully",
-            }),
-            status_code=200,
-            headers=headers,
+                "vector_dimensions": settings.vector_dimensions,
+                "vector_compression": settings.vector_compression,
+            },
+            200,
+            headers,
+            req,
         )
 
     except Exception as e:
         logger.error(f"Index creation error: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "Failed to create index"}),
-            status_code=500,
-            headers=headers,
-        )
+        return error_response("Failed to create index", 500, headers)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -435,54 +488,52 @@ def agent_chat(req: func.HttpRequest) -> func.HttpResponse:
     # Validate request
     is_valid, error, body = validate_chat_request(req)
     if not is_valid:
-        return func.HttpResponse(
-            json.dumps({"error": error}),
-            status_code=400,
-            headers=headers,
-        )
+        return error_response(error, 400, headers)
 
     try:
-        from agent import get_agent_service
-
-        user_message = body["message"]
-        conversation_history = body["conversation_history"]
+        with span("agent.load"):
+            from agent import get_agent_service
 
-        # Invoke the agent
+        # Invoke the agent (identical concurrent first questions share one run)
         agent_service = get_agent_service()
-        result = agent_service.invoke(user_message, conversation_history)
+
+        def invoke():
+            with retrieval_profile_scope(body.retrieval_profile):
+                return agent_service.invoke(body.message, body.conversation_history)
+
+        result, _ = coalesced("agent", body, body.retrieval_profile, invoke)
+
+        if result.timed_out:
+            return error_response(TIMEOUT_ERROR, 504, headers)
 
         if result.error:
             logger.error(f"Agent error: {result.error}")
-            return func.HttpResponse(
-                json.dumps({"error": "An error occurred processing your request"}),
-                status_code=500,
-                headers=headers,
-            )
+            return error_response("An error occurred processing your request", 500, headers)
 
-        return func.HttpResponse(
-            json.dumps({
+        return json_response(
+            {
                 "answer": result.answer,
                 "tool_calls": result.tool_calls,
                 "citations": result.citations,
-            }),
-            status_code=200,
-            headers=headers,
+                "route": result.route,
+                "usage": result.usage,
+                "timing": current_trace().timing(),
+            },
+            200,
+            headers,
+            req,
         )
 
+    except DeadlineExceeded:
+        return error_response(TIMEOUT_ERROR, 504, headers)
+    except Overloaded as e:
+        return error_response(OVERLOADED_ERROR, 503, {**headers, "Retry-After": str(e.retry_after)})
     except ImportError as e:
         logger.error(f"Agent module import error: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "Agent module not available. Please check dependencies."}),
-            status_code=500,
-            headers=headers,
-        )
+        return error_response("Agent module not available. Please check dependencies.", 500, headers)
     except Exception as e:
         logger.error(f"Agent chat error: {e}")
-        return func.HttpResponse(
-            json.dumps({"error": "An error occurred processing your request"}),
-            status_code=500,
-            headers=headers,
-        )
+        return error_response("An error occurred processing your request", 500, headers)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -500,39 +551,55 @@ def agent_chat_stream(req: func.HttpRequest) -> func.HttpResponse:
     # Validate request
     is_valid, error, body = validate_chat_request(req)
     if not is_valid:
-        return func.HttpResponse(
-            json.dumps({"events": [{"type": "error", "error": error}]}),
-            status_code=400,
-            headers=headers,
+        return json_response(
+            {"events": [{"type": "error", "error": error}]},
+            400,
+            headers,
         )
 
     try:
-        from agent import get_agent_service
-
-        user_message = body["message"]
-        conversation_history = body["conversation_history"]
+        with span("agent.load"):
+            from agent import get_agent_service
 
-        # Invoke the agent with status updates
+        # Invoke the agent with status updates (identical concurrent first questions share one run)
         agent_service = get_agent_service()
-        events = list(agent_service.invoke_with_status(user_message, conversation_history))
 
-        return func.HttpResponse(
-            json.dumps({"events": events}),
-            status_code=200,
-            headers=headers,
+        def invoke():
+            with retrieval_profile_scope(body.retrieval_profile):
+                return list(agent_service.invoke_with_status(body.message, body.conversation_history))
+
+        events, _ = coalesced("agent-stream", body, body.retrieval_profile, invoke)
+
+        return json_response(
+            {"events": events, "timing": current_trace().timing()},
+            200,
+            headers,
+            req,
         )
 
+    except DeadlineExceeded:
+        return json_response(
+            {"events": [{"type": "error", "error": TIMEOUT_ERROR}]},
+            504,
+            headers,
+        )
+    except Overloaded as e:
+        return json_response(
+            {"events": [{"type": "error", "error": OVERLOADED_ERROR}]},
+            503,
+            {**headers, "Retry-After": str(e.retry_after)},
+        )
     except ImportError as e:
         logger.error(f"Agent module import error: {e}")
-        return func.HttpResponse(
-            json.dumps({"events": [{"type": "error", "error": "Agent module not available"}]}),
-            status_code=500,
-            headers=headers,
+        return json_response(
+            {"events": [{"type": "error", "error": "Agent module not available"}]},
+            500,
+            headers,
         )
     except Exception as e:
         logger.error(f"Agent stream error: {e}")
-        return func.HttpResponse(
-            json.dumps({"events": [{"type": "error", "error": str(e)}]}),
-            status_code=500,
-            headers=headers,
+        return json_response(
+            {"events": [{"type": "error", "error": str(e)}]},
+            500,
+            headers,
         )
@@ -0,0 +1,187 @@
+"""
+Health checks - precomputed liveness and cached deep readiness probes.
+Liveness is a constant response; deep mode probes OpenAI, Search and Tavily
+in parallel at most once per HEALTH_DEEP_TTL seconds per worker.
+"""
+
+import os
+import json
+import time
+import logging
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from coalescing import TTLCache, SingleFlight
+from warmup import agent_readiness
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+API_VERSION = "2.0.0"
+
+# Deep probe results are reused for this long (probes can't amplify load)
+HEALTH_DEEP_TTL = float(os.environ.get("HEALTH_DEEP_TTL", 30))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get("HEALTH_PROBE_TIMEOUT", 5))
+
+TAVILY_BASE_URL = "https://api.tavily.com"
+
+
+def missing_config() -> list[str]:
+    """
+    Settings without which the API can't serve. Keys are optional: without
+    AZURE_OPENAI_API_KEY / AZURE_SEARCH_KEY the app uses managed identity.
+    """
+    missing = []
+    if not (os.environ.get("AZURE_OPENAI_ENDPOINT") or os.environ.get("AZURE_OPENAI_POOL")):
+        missing.append("AZURE_OPENAI_ENDPOINT")
+    if not os.environ.get("AZURE_SEARCH_ENDPOINT"):
+        missing.append("AZURE_SEARCH_ENDPOINT")
+    return missing
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LIVENESS
+# ═══════════════════════════════════════════════════════════════════════════
+
+_MISSING = missing_config()
+
+# Encoded bodies per agent readiness state (the only thing that changes at runtime)
+_liveness_bodies: dict[str, bytes] = {}
+
+
+def liveness() -> tuple[bytes, int]:
+    """Precomputed (body, status_code) for the plain /health probe."""
+    state = agent_readiness.state
+    body = _liveness_bodies.get(state)
+    if body is None:
+        if _MISSING:
+            payload = {"status": "unhealthy", "message": "Service not fully configured"}
+        else:
+            payload = {"status": "healthy", "version": API_VERSION, "agent": state}
+        body = json.dumps(payload).encode()
+        _liveness_bodies[state] = body
+    return body, 503 if _MISSING else 200
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEEP PROBES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _timed(probe) -> dict:
+    start = time.perf_counter()
+    try:
+        detail = probe() or {}
+        result = {"ok": True, **detail}
+    except Exception as e:
+        result = {"ok": False, "error": f"{type(e).__name__}: {str(e)[:160]}"}
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def _probe_openai() -> list[dict]:
+    """List models on every pool target (no tokens consumed)."""
+    from openai_pool import get_chat_pool
+
+    pool = get_chat_pool()
+    results = []
+    for target in pool.targets:
+        client = pool.client_for(target).with_options(timeout=HEALTH_PROBE_TIMEOUT, max_retries=0)
+        result = _timed(lambda: client.models.list() and None)
+        results.append({"target": target.name, **result})
+    return results
+
+
+_search_client = None
+
+
+def _get_search_client():
+    global _search_client
+    settings = get_settings()
+    if _search_client is None or _search_client[0] is not settings:
+        from azure.search.documents import SearchClient
+
+        client = SearchClient(
+            endpoint=settings.search_endpoint,
+            index_name=settings.search_index,
+            credential=settings.search_credential(),
+            retry_total=0,
+        )
+        _search_client = (settings, client)
+    return _search_client[1]
+
+
+def _probe_search() -> dict:
+    """Document count of the RAG index."""
+    return _timed(lambda: {"documents": _get_search_client().get_document_count(timeout=HEALTH_PROBE_TIMEOUT)})
+
+
+def _probe_tavily() -> dict:
+    """Reachability of the Tavily API (any HTTP response counts; searches cost credits)."""
+    if not os.environ.get("TAVILY_API_KEY"):
+        return {"ok": False, "error": "TAVILY_API_KEY not configured", "latency_ms": 0.0}
+
+    def probe():
+        url = os.environ.get("TAVILY_API_BASE_URL") or TAVILY_BASE_URL
+        try:
+            with urllib.request.urlopen(url, timeout=HEALTH_PROBE_TIMEOUT) as response:
+                return {"http_status": response.status}
+        except urllib.error.HTTPError as e:
+            return {"http_status": e.code}
+
+    return _timed(probe)
+
+
+_probe_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="health")
+_deep_cache = TTLCache(max_entries=1, ttl=HEALTH_DEEP_TTL)
+_deep_inflight = SingleFlight()
+
+
+def _run_deep_checks() -> dict:
+    openai = _probe_executor.submit(_probe_openai)
+    search = _probe_executor.submit(_probe_search)
+    tavily = _probe_executor.submit(_probe_tavily)
+    upstreams = {
+        "openai": openai.result(),
+        "search": search.result(),
+        "tavily": tavily.result(),
+    }
+
+    from openai_pool import get_chat_pool
+
+    required_ok = any(t["ok"] for t in upstreams["openai"]) and upstreams["search"]["ok"]
+    all_ok = required_ok and all(t["ok"] for t in upstreams["openai"]) and upstreams["tavily"]["ok"]
+    report = {
+        "status": "healthy" if all_ok else ("degraded" if required_ok else "unhealthy"),
+        "version": API_VERSION,
+        "checked_at": time.time(),
+        "upstreams": upstreams,
+        # Public endpoint: no endpoint URLs in the report
+        "pool": [{k: v for k, v in t.items() if k != "endpoint"} for t in get_chat_pool().state()],
+    }
+    if report["status"] != "healthy":
+        logger.warning(f"Deep health check: {report['status']}")
+    _deep_cache.set("deep", report)
+    return report
+
+
+def deep_check() -> tuple[dict, int]:
+    """Cached deep readiness report and its status code (503 only if a required upstream is down)."""
+    if _MISSING:
+        return {"status": "unhealthy", "message": "Service not fully configured", "missing": _MISSING}, 503
+
+    report = _deep_cache.get("deep")
+    if report is None:
+        # Concurrent deep probes share one run
+        report, _ = _deep_inflight.do("deep", _run_deep_checks)
+
+    result = {
+        **report,
+        "age_s": round(time.time() - report["checked_at"], 1),
+        "agent": agent_readiness.snapshot(),
+    }
+    return result, 503 if report["status"] == "unhealthy" else 200
@@ -0,0 +1,306 @@
+"""
+Lexical Index - in-process BM25 over the snapshot's chunk texts.
+
+Keyword and exact-title questions ("the connectome paper") don't need a query
+embedding: when the BM25 winner is clear, retrieval can skip the embedding
+call (and, on the Azure backend, use a keyword-only data source). Otherwise
+lexical results can be fused with vector results by reciprocal rank.
+
+Stored next to the vector snapshot as compact arrays (CSR postings):
+    lex_meta.json    vocabulary (sorted) and BM25 parameters
+    lex_offsets.i64  n_terms + 1 offsets into the postings
+    lex_docs.i32     posting rows, grouped by term
+    lex_tf.u16       term frequency per posting (title tokens weighted)
+    lex_doclen.f32   weighted document lengths
+"""
+
+import os
+import re
+import json
+import math
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Title tokens count this many times (cheap BM25F)
+TITLE_WEIGHT = 3
+
+# A lexical result is "confident" when the top chunk covers most of the query's
+# IDF mass and clearly beats the runner-up
+LEXICAL_MIN_COVERAGE = float(os.environ.get("LEXICAL_MIN_COVERAGE", 0.8))
+LEXICAL_MIN_MARGIN = float(os.environ.get("LEXICAL_MIN_MARGIN", 1.3))
+
+# Reciprocal rank fusion constant (Cormack et al.)
+RRF_K = 60
+
+LEXICAL_FORMAT = 1
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TOKENIZATION (Turkish / English)
+# ═══════════════════════════════════════════════════════════════════════════
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Fold Turkish letters so "hastalığı" and "hastaligi" match (users often type without them)
+_TURKISH_FOLD = str.maketrans({"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u"})
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the this to was were what
+when where which who why will with about does do did can could should would into than then there
+these those their them they we you your our my me i he she his her not no yes also
+acaba ama ve veya ile bu şu o bir de da mi mı mu mü ne neden nasıl nedir hangi için gibi kadar
+daha çok en her hiç ki ya yani olan olarak ise sonra önce şey bu nu ben sen biz siz onlar
+paper papers article study document documents pdf makale makalede makaledeki çalışma doküman
+""".translate(_TURKISH_FOLD).split())
+
+# Turkish inflectional suffixes (folded), longest first; stripped only if the stem stays >= 4 chars
+_TR_SUFFIXES = tuple(sorted("""
+lari leri larin lerin larda lerde lardan lerden lar ler
+sinda sinde sindan sinden sinin sini sina sine
+inda inde indan inden ina ine inin nin nun dan den tan ten
+da de ta te yla yle la le in un si su
+""".split(), key=len, reverse=True))
+
+_EN_SUFFIXES = ("ies", "sses", "es", "s")
+
+
+def fold(text: str) -> str:
+    """Lowercase with Turkish-aware I handling, fold Turkish letters, strip diacritics."""
+    text = text.replace("İ", "i").replace("I", "i").lower().translate(_TURKISH_FOLD)
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=1 << 16)
+def _term(token: str) -> Optional[str]:
+    """Index term for a folded token, or None for stopwords and one-letter tokens."""
+    if len(token) < 2 or token in STOPWORDS:
+        return None
+    for suffix in _TR_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[: -len(suffix)]
+    for suffix in _EN_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            if suffix == "ies":
+                return token[:-3] + "y"
+            if suffix == "sses":
+                return token[:-2]
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Index/query terms: folded words minus stopwords, apostrophe suffixes and light stemming."""
+    # "connectome'un" -> "connectome" (Turkish case suffix after an apostrophe)
+    text = re.sub(r"['’]\w+", " ", text)
+    terms = [_term(token) for token in _TOKEN.findall(fold(text))]
+    return [term for term in terms if term is not None]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INDEX
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class LexicalResult:
+    """Ranked rows with BM25 scores and whether the winner is clear enough to use alone."""
+
+    rows: list
+    scores: list
+    confident: bool
+
+
+class LexicalIndex:
+    """BM25 over CSR postings (rows are snapshot row numbers)."""
+
+    def __init__(self, terms: list, offsets, docs, tf, doclen, k1: float = BM25_K1, b: float = BM25_B):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.docs = docs
+        self.tf = tf
+        self.doclen = np.asarray(doclen, dtype=np.float32)
+        self.count = len(self.doclen)
+        self.k1 = k1
+        self.b = b
+        avgdl = float(self.doclen.mean()) if self.count else 1.0
+        # Per-document BM25 length normalization, precomputed
+        self._norm = (k1 * (1 - b + b * self.doclen / max(avgdl, 1e-9))).astype(np.float32)
+        df = np.diff(np.asarray(offsets, dtype=np.int64))
+        self._idf = np.log1p((self.count - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts: list, titles: Optional[list] = None) -> "LexicalIndex":
+        vocabulary: dict[str, int] = {}
+        posting_terms, posting_rows, posting_tf = [], [], []
+        doclen = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text or ""))
+            if titles is not None:
+                for term in tokenize(titles[row] or ""):
+                    counts[term] += TITLE_WEIGHT
+            doclen[row] = sum(counts.values())
+            for term in counts:
+                posting_terms.append(vocabulary.setdefault(term, len(vocabulary)))
+            posting_rows.extend([row] * len(counts))
+            posting_tf.extend(counts.values())
+
+        # Renumber terms alphabetically, then group postings by term (rows stay ascending)
+        terms = sorted(vocabulary)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[[vocabulary[term] for term in terms]] = np.arange(len(terms))
+        term_ids = rank[np.asarray(posting_terms, dtype=np.int64)]
+        rows = np.asarray(posting_rows, dtype=np.int32)
+        order = np.lexsort((rows, term_ids))
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(term_ids, minlength=len(terms)))
+        tf = np.minimum(np.asarray(posting_tf, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)
+        return cls(terms, offsets, rows[order], tf[order], doclen)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.asarray(self.offsets, dtype=np.int64).tofile(os.path.join(path, "lex_offsets.i64"))
+        np.asarray(self.docs, dtype=np.int32).tofile(os.path.join(path, "lex_docs.i32"))
+        np.asarray(self.tf, dtype=np.uint16).tofile(os.path.join(path, "lex_tf.u16"))
+        self.doclen.tofile(os.path.join(path, "lex_doclen.f32"))
+        with open(os.path.join(path, "lex_meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": LEXICAL_FORMAT,
+                "count": self.count,
+                "postings": len(self.docs),
+                "k1": self.k1,
+                "b": self.b,
+                "terms": self.terms,
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with open(os.path.join(path, "lex_meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != LEXICAL_FORMAT:
+            raise ValueError(f"Unsupported lexical index format {meta.get('format')} in {path}")
+
+        def view(name: str, dtype, length: int):
+            return np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=(length,))
+
+        terms = meta["terms"]
+        return cls(
+            terms,
+            view("lex_offsets.i64", np.int64, len(terms) + 1),
+            view("lex_docs.i32", np.int32, meta["postings"]),
+            view("lex_tf.u16", np.uint16, meta["postings"]),
+            view("lex_doclen.f32", np.float32, meta["count"]),
+            k1=meta["k1"],
+            b=meta["b"],
+        )
+
+    def search(self, query: str, k: int) -> LexicalResult:
+        """Top-k rows by BM25; unknown query terms count against confidence."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.count:
+            return LexicalResult([], [], False)
+
+        scores = np.zeros(self.count, dtype=np.float32)
+        known = []
+        for term in terms:
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            rows = self.docs[start:end]
+            tf = self.tf[start:end].astype(np.float32)
+            scores[rows] += self._idf[term_id] * tf * (self.k1 + 1) / (tf + self._norm[rows])
+            known.append(term_id)
+        if not known:
+            return LexicalResult([], [], False)
+
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] > 0]
+        rows = [int(r) for r in top]
+        ranked = [float(scores[r]) for r in rows]
+        return LexicalResult(rows, ranked, self._confident(terms, known, rows, ranked))
+
+    def _confident(self, terms: list, known: list, rows: list, scores: list) -> bool:
+        if not rows:
+            return False
+        # Unknown terms get the maximum IDF: a query about something unindexed isn't confident
+        max_idf = float(self._idf.max()) if len(self._idf) else 1.0
+        total = sum(float(self._idf[t]) for t in known) + max_idf * (len(terms) - len(known))
+        best = rows[0]
+        matched = 0.0
+        for term_id in known:
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            # Postings are sorted by row, so membership is a binary search
+            i = start + int(np.searchsorted(self.docs[start:end], best))
+            if i < end and self.docs[i] == best:
+                matched += float(self._idf[term_id])
+        coverage = matched / total if total else 0.0
+        margin = scores[0] / scores[1] if len(scores) > 1 and scores[1] > 0 else math.inf
+        return coverage >= LEXICAL_MIN_COVERAGE and margin >= LEXICAL_MIN_MARGIN
+
+
+def reciprocal_rank_fusion(rankings: list, k: int, rrf_k: int = RRF_K) -> list[tuple[int, float]]:
+    """Fuse ranked row lists into (row, score) top-k, best first."""
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(fused.items(), key=lambda item: -item[1])[:k]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SHARED INDEX
+# ═══════════════════════════════════════════════════════════════════════════
+
+_lexical_index: Optional[LexicalIndex] = None
+_lexical_loaded = False
+_lexical_lock = threading.Lock()
+
+
+def keyword_query(query: str) -> bool:
+    """True if BM25 over the snapshot answers this query confidently (no embedding needed)."""
+    index = get_lexical_index()
+    return index is not None and index.search(query, 2).confident
+
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    """Lexical index of the local snapshot, or None if there is no snapshot."""
+    global _lexical_index, _lexical_loaded
+    if not _lexical_loaded:
+        with _lexical_lock:
+            if not _lexical_loaded:
+                from settings import LOCAL_SNAPSHOT_PATH
+                try:
+                    _lexical_index = LexicalIndex.load(LOCAL_SNAPSHOT_PATH)
+                    logger.info(f"🔤 Lexical index loaded: {len(_lexical_index.terms)} terms, "
+                                f"{_lexical_index.count} chunks")
+                except FileNotFoundError:
+                    _lexical_index = None
+                _lexical_loaded = True
+    return _lexical_index
+
+
+def reset_lexical_index():
+    """Drop the shared index (useful for testing or after a new snapshot is deployed)."""
+    global _lexical_index, _lexical_loaded
+    _lexical_index = None
+    _lexical_loaded = False
@@ -0,0 +1,274 @@
+"""
+Adaptive Concurrency Limiter - AIMD limit on in-flight LLM calls.
+
+host.json caps concurrent HTTP requests statically, but the real ceiling is
+the Azure OpenAI TPM quota. The limiter learns it per worker: the limit
+grows by about one slot per round of successful calls and is cut
+multiplicatively on 429s, timeouts or slow calls. Calls over the limit
+queue briefly (bounded by LIMITER_MAX_WAIT and the request deadline); the
+rest are shed with Overloaded, which the routes turn into a fast 503 with
+Retry-After instead of letting everything retry and time out together.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from deadline import current_deadline, MIN_UPSTREAM_TIMEOUT
+from tracing import span, annotate
+from metrics import metrics, LIMITER_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+LIMITER_ENABLED = os.environ.get("LIMITER_ENABLED", "true").lower() == "true"
+LIMITER_INITIAL_LIMIT = float(os.environ.get("LIMITER_INITIAL_LIMIT", 20))
+LIMITER_MIN_LIMIT = float(os.environ.get("LIMITER_MIN_LIMIT", 2))
+# Never above host.json maxConcurrentRequests
+LIMITER_MAX_LIMIT = float(os.environ.get("LIMITER_MAX_LIMIT", 100))
+# Longest a call waits for a slot before it is shed (seconds)
+LIMITER_MAX_WAIT = float(os.environ.get("LIMITER_MAX_WAIT", 2))
+# Calls allowed to wait at once; beyond this they are shed immediately
+LIMITER_MAX_QUEUE = int(os.environ.get("LIMITER_MAX_QUEUE", 50))
+# A successful call slower than this counts as congestion (seconds)
+LIMITER_LATENCY_THRESHOLD = float(os.environ.get("LIMITER_LATENCY_THRESHOLD", 12))
+# Multiplicative decrease on congestion
+LIMITER_BACKOFF = 0.7
+# Optional background calls (intent shadow runs) only start below this share of the limit
+LIMITER_SPARE_FRACTION = 0.5
+
+# Outcome kinds (see openai_pool.classify_error) that signal congestion
+CONGESTION_KINDS = ("throttled", "timeout")
+
+# Bounds for the Retry-After hint on shed requests (seconds)
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 30
+
+
+class Overloaded(Exception):
+    """The call was shed: no slot freed up within the allowed wait."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Upstream concurrency limit reached, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+# Set while the current context holds a slot: nested calls (e.g. the RAG tool
+# inside an agent turn) run under the outer slot instead of taking a second one
+_holding: contextvars.ContextVar[bool] = contextvars.ContextVar("limiter_slot", default=False)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LIMITER
+# ═══════════════════════════════════════════════════════════════════════════
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded wait queue. Thread-safe."""
+
+    def __init__(
+        self,
+        name: str = "openai",
+        initial_limit: float = LIMITER_INITIAL_LIMIT,
+        min_limit: float = LIMITER_MIN_LIMIT,
+        max_limit: float = LIMITER_MAX_LIMIT,
+        max_wait: float = LIMITER_MAX_WAIT,
+        max_queue: int = LIMITER_MAX_QUEUE,
+        latency_threshold: float = LIMITER_LATENCY_THRESHOLD,
+    ):
+        self.name = name
+        self.limit = max(min_limit, min(initial_limit, max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.latency_threshold = latency_threshold
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._queued = 0
+        self._latency = 0.0
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.shed = 0
+
+    # ── admission ─────────────────────────────────────────────────────────
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: about one call latency."""
+        return int(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(self._latency))))
+
+    def _shed(self) -> Overloaded:
+        self.shed += 1
+        LIMITER_REQUESTS.labels(self.name, "shed").inc()
+        return Overloaded(self.retry_after())
+
+    def acquire(self, max_wait: Optional[float] = None):
+        """Take a slot, waiting at most max_wait seconds; raises Overloaded otherwise."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._cond:
+            if self._in_flight < int(self.limit):
+                self._in_flight += 1
+                self.admitted += 1
+                LIMITER_REQUESTS.labels(self.name, "admitted").inc()
+                return
+            if self._queued >= self.max_queue or max_wait <= 0:
+                raise self._shed()
+
+            LIMITER_REQUESTS.labels(self.name, "queued").inc()
+            self._queued += 1
+            give_up_at = time.monotonic() + max_wait
+            try:
+                while self._in_flight >= int(self.limit):
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        raise self._shed()
+                    self._cond.wait(remaining)
+            finally:
+                self._queued -= 1
+            self._in_flight += 1
+            self.admitted += 1
+            LIMITER_REQUESTS.labels(self.name, "admitted").inc()
+
+    def release(self, latency: float, kind: Optional[str] = None):
+        """
+        Return a slot and adapt the limit. kind is None on success, else the
+        failure class of the call ("error" when it says nothing about load).
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._latency = latency if self._latency == 0 else 0.8 * self._latency + 0.2 * latency
+
+            now = time.monotonic()
+            congested = kind in CONGESTION_KINDS or (kind is None and latency > self.latency_threshold)
+            if congested:
+                # Calls started before the cut report congestion too: cut once per call latency
+                if now - self._last_decrease >= max(1.0, self._latency):
+                    self.limit = max(self.min_limit, self.limit * LIMITER_BACKOFF)
+                    self._last_decrease = now
+                    logger.warning(
+                        f"🚦 {self.name} limiter: {kind or 'slow call'} ({latency:.1f}s), limit -> {self.limit:.1f}"
+                    )
+            elif kind is None and self._in_flight * 2 >= int(self.limit):
+                # Only grow while the limit is actually being used
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            free = int(self.limit) - self._in_flight
+            if free > 0:
+                self._cond.notify(free)
+
+    def has_spare_capacity(self, fraction: float = LIMITER_SPARE_FRACTION) -> bool:
+        """True when nothing is queued and less than fraction of the limit is in flight."""
+        with self._cond:
+            return self._queued == 0 and self._in_flight < int(self.limit) * fraction
+
+    @contextmanager
+    def slot(
+        self,
+        classify: Optional[Callable[[BaseException], Optional[str]]] = None,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        Hold a slot for the enclosed call. Waits at most max_wait (default
+        the limiter's), and never past the request deadline; classify maps an
+        exception to its failure kind.
+        """
+        if _holding.get():
+            yield
+            return
+
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = current_deadline()
+        if deadline is not None:
+            max_wait = min(max_wait, deadline.remaining() - MIN_UPSTREAM_TIMEOUT)
+
+        try:
+            with span("limiter"):
+                self.acquire(max_wait)
+        except Overloaded:
+            annotate(limiter="shed")
+            raise
+
+        token = _holding.set(True)
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            kind = classify(e) if classify is not None else None
+            self.release(time.monotonic() - start, kind or "error")
+            raise
+        else:
+            self.release(time.monotonic() - start)
+        finally:
+            _holding.reset(token)
+
+    def state(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "latency_ewma": round(self._latency, 3),
+            }
+
+
+# Shared limiter for LLM calls (one per worker process)
+_llm_limiter: Optional[AdaptiveLimiter] = None
+_llm_limiter_lock = threading.Lock()
+
+
+def get_llm_limiter() -> Optional[AdaptiveLimiter]:
+    """Get or create the shared LLM limiter (None when LIMITER_ENABLED=false)."""
+    global _llm_limiter
+    if not LIMITER_ENABLED:
+        return None
+    if _llm_limiter is None:
+        with _llm_limiter_lock:
+            if _llm_limiter is None:
+                _llm_limiter = AdaptiveLimiter()
+                metrics.register_callback(
+                    "upstream_limiter_state", "Adaptive limiter limit, in-flight and queued calls",
+                    "gauge", _limiter_samples,
+                )
+    return _llm_limiter
+
+
+@contextmanager
+def llm_slot(
+    classify: Optional[Callable[[BaseException], Optional[str]]] = None,
+    max_wait: Optional[float] = None,
+):
+    """Hold a slot of the shared LLM limiter (no-op when disabled)."""
+    limiter = get_llm_limiter()
+    if limiter is None:
+        yield
+        return
+    with limiter.slot(classify, max_wait):
+        yield
+
+
+def llm_has_spare_capacity() -> bool:
+    """Whether optional background LLM work may start now (always when disabled)."""
+    limiter = get_llm_limiter()
+    return limiter is None or limiter.has_spare_capacity()
+
+
+def _limiter_samples():
+    limiter = _llm_limiter
+    if limiter is None:
+        return
+    state = limiter.state()
+    for field in ("limit", "in_flight", "queued"):
+        yield {"limiter": limiter.name, "field": field}, state[field]
+
+
+def reset_llm_limiter():
+    """Drop the shared limiter (useful for testing)."""
+    global _llm_limiter
+    _llm_limiter = None
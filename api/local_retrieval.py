@@ -0,0 +1,378 @@
+"""
+Local Retrieval - in-process vector search over a memory-mapped snapshot of
+the Azure AI Search index (RETRIEVAL_BACKEND=local).
+
+Snapshot layout (written by write_snapshot / scripts/export_snapshot.py):
+    meta.json        count, dims, coarse_dims, index, embedding deployment
+    vectors.f16      count x dims float16, L2-normalized (exact rescoring)
+    coarse.f32       count x coarse_dims float32, leading dims renormalized
+    coarse.i8        count x coarse_dims int8 + coarse_scale.f32 (per-row scale)
+    docs.jsonl       one {"id", "title", "source", "chunk_id", "content"} per row
+    docs.idx         count + 1 uint64 byte offsets into docs.jsonl
+
+Every file is opened read-only with mmap, so worker processes on one host
+share the pages. LOCAL_RETRIEVAL_QUANTIZATION=none scores every float16
+vector at full dimension (exact). "f32" and "int8" are approximate: they
+shortlist on the coarse matrix (text-embedding-3 vectors keep most of their
+signal in the leading dimensions), then rescore the shortlist exactly, so a
+chunk that ranks low on the coarse dims is missed. Query embeddings still come from
+the Azure OpenAI embedding deployment, unless the snapshot's BM25 index
+(lexical.py, also written here) answers the query confidently.
+"""
+
+import os
+import json
+import mmap
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from dedup import mmr
+from lexical import LexicalIndex, get_lexical_index, reciprocal_rank_fusion
+from settings import LOCAL_SNAPSHOT_PATH, get_settings
+from tracing import span, annotate
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# "none": exact full-dimension scan (slowest). Approximate coarse shortlist + exact
+# rescoring: "f32" on the float32 coarse matrix, "int8" on the quantized one (4x smaller)
+LOCAL_RETRIEVAL_QUANTIZATION = os.environ.get("LOCAL_RETRIEVAL_QUANTIZATION", "f32").lower()
+# Fuse BM25 and vector rankings (reciprocal rank) when the snapshot has a lexical index
+LOCAL_RETRIEVAL_HYBRID = os.environ.get("LOCAL_RETRIEVAL_HYBRID", "true").lower() == "true"
+# Shortlist rescored exactly per query in the f32/int8 modes: max(k * factor, minimum)
+LOCAL_RETRIEVAL_RESCORE_FACTOR = int(os.environ.get("LOCAL_RETRIEVAL_RESCORE_FACTOR", 10))
+LOCAL_RETRIEVAL_MIN_CANDIDATES = 64
+# Maximal marginal relevance over the candidates (1.0 = plain relevance order)
+LOCAL_RETRIEVAL_MMR_LAMBDA = float(os.environ.get("LOCAL_RETRIEVAL_MMR_LAMBDA", 0.7))
+# Candidates at least this cosine-similar to a chosen chunk are dropped (repeats)
+LOCAL_RETRIEVAL_DUPLICATE_COSINE = float(os.environ.get("LOCAL_RETRIEVAL_DUPLICATE_COSINE", 0.95))
+
+SNAPSHOT_FORMAT = 1
+DEFAULT_COARSE_DIMS = 256
+
+# Rows per block when the int8 / float16 matrix is widened to float32
+_BLOCK_ROWS = 8192
+
+
+@dataclass(frozen=True)
+class Hit:
+    """A retrieved chunk (score: cosine, BM25 or fused reciprocal rank, depending on the path)."""
+
+    row: int
+    score: float
+    id: str
+    title: str
+    source: str
+    chunk_id: int
+    content: str
+
+    def citation(self) -> dict:
+        """Same shape as the 'On Your Data' citations returned by /chat."""
+        return {"title": self.title, "content": self.content, "filepath": self.source}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SNAPSHOT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def write_snapshot(path: str, vectors, docs: list, coarse_dims: int = DEFAULT_COARSE_DIMS, **meta) -> dict:
+    """
+    Write a snapshot directory from row-aligned vectors (count x dims) and doc
+    dicts (id, title, source, chunk_id, content). Returns the metadata written.
+    """
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    count, dims = vectors.shape
+    if count != len(docs):
+        raise ValueError(f"{count} vectors but {len(docs)} documents")
+    coarse_dims = min(coarse_dims, dims)
+    os.makedirs(path, exist_ok=True)
+
+    vectors.astype(np.float16).tofile(os.path.join(path, "vectors.f16"))
+
+    coarse = _normalize(vectors[:, :coarse_dims])
+    coarse.tofile(os.path.join(path, "coarse.f32"))
+    scale = np.maximum(np.abs(coarse).max(axis=1), 1e-12) / 127.0
+    np.round(coarse / scale[:, None]).astype(np.int8).tofile(os.path.join(path, "coarse.i8"))
+    scale.astype(np.float32).tofile(os.path.join(path, "coarse_scale.f32"))
+
+    offsets = np.zeros(count + 1, dtype=np.uint64)
+    with open(os.path.join(path, "docs.jsonl"), "wb") as f:
+        for i, doc in enumerate(docs):
+            line = json.dumps({
+                "id": doc["id"],
+                "title": doc.get("title", ""),
+                "source": doc.get("source", ""),
+                "chunk_id": doc.get("chunk_id", 0),
+                "content": doc.get("content", ""),
+            }, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets[i + 1] = offsets[i] + len(line)
+    offsets.tofile(os.path.join(path, "docs.idx"))
+
+    LexicalIndex.build(
+        [doc.get("content", "") for doc in docs], [doc.get("title", "") for doc in docs]
+    ).save(path)
+
+    info = {
+        "format": SNAPSHOT_FORMAT,
+        "count": count,
+        "dims": dims,
+        "coarse_dims": coarse_dims,
+        "created_at": time.time(),
+        **meta,
+    }
+    # meta.json last: a snapshot without it is incomplete
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+class VectorSnapshot:
+    """Read-only, memory-mapped view of a snapshot directory."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.meta.get('format')} in {path}")
+
+        self.path = path
+        self.count = self.meta["count"]
+        self.dims = self.meta["dims"]
+        self.coarse_dims = self.meta["coarse_dims"]
+
+        def view(name: str, dtype, shape):
+            return np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=shape)
+
+        self.vectors = view("vectors.f16", np.float16, (self.count, self.dims))
+        self.coarse_f32 = view("coarse.f32", np.float32, (self.count, self.coarse_dims))
+        self.coarse_i8 = view("coarse.i8", np.int8, (self.count, self.coarse_dims))
+        self.coarse_scale = view("coarse_scale.f32", np.float32, (self.count,))
+        self.offsets = view("docs.idx", np.uint64, (self.count + 1,))
+
+        with open(os.path.join(path, "docs.jsonl"), "rb") as f:
+            self._docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def doc(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._docs[start:end])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SEARCH
+# ═══════════════════════════════════════════════════════════════════════════
+
+QUANTIZATIONS = ("none", "f32", "int8")
+
+
+class LocalRetriever:
+    """Batched top-k cosine search: exact scan, or coarse shortlist + exact rescoring."""
+
+    def __init__(self, snapshot: VectorSnapshot, quantization: str = "none", rescore_factor: int = 10):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}' (expected one of {', '.join(QUANTIZATIONS)})")
+        self.snapshot = snapshot
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+
+    def _exact_scores(self, queries: np.ndarray) -> np.ndarray:
+        """count x batch cosine scores over the full-dimension float16 vectors."""
+        snap = self.snapshot
+        q = queries.T
+        scores = np.empty((snap.count, q.shape[1]), dtype=np.float32)
+        for start in range(0, snap.count, _BLOCK_ROWS):
+            block = snap.vectors[start:start + _BLOCK_ROWS].astype(np.float32)
+            scores[start:start + _BLOCK_ROWS] = block @ q
+        return scores
+
+    def _coarse_scores(self, queries: np.ndarray) -> np.ndarray:
+        """count x batch approximate scores."""
+        snap = self.snapshot
+        q = _normalize(queries[:, :snap.coarse_dims]).T
+        if self.quantization == "f32":
+            return snap.coarse_f32 @ q
+
+        scores = np.empty((snap.count, q.shape[1]), dtype=np.float32)
+        for start in range(0, snap.count, _BLOCK_ROWS):
+            block = snap.coarse_i8[start:start + _BLOCK_ROWS].astype(np.float32)
+            scores[start:start + _BLOCK_ROWS] = block @ q
+        scores *= snap.coarse_scale[:, None]
+        return scores
+
+    def search_vectors(self, queries, k: int) -> list[list[tuple[int, float]]]:
+        """(row, score) top-k per query vector, best first."""
+        snap = self.snapshot
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] < snap.dims:
+            raise ValueError(f"Query has {queries.shape[1]} dims, snapshot has {snap.dims}")
+        # Longer text-embedding-3 vectors shorten like `dimensions` does: truncate + renormalize
+        queries = _normalize(queries[:, :snap.dims])
+        k = min(k, snap.count)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.quantization == "none":
+            scores = self._exact_scores(queries)
+            results = []
+            for column in scores.T:
+                top = np.argpartition(-column, k - 1)[:k] if k < snap.count else np.arange(snap.count)
+                top = top[np.argsort(-column[top])]
+                results.append([(int(row), float(column[row])) for row in top])
+            return results
+
+        candidates = min(snap.count, max(k * self.rescore_factor, LOCAL_RETRIEVAL_MIN_CANDIDATES))
+        if candidates < snap.count:
+            coarse = self._coarse_scores(queries)
+            shortlist = np.argpartition(-coarse, candidates - 1, axis=0)[:candidates].T
+        else:
+            shortlist = np.broadcast_to(np.arange(snap.count), (len(queries), snap.count))
+
+        results = []
+        for query, rows in zip(queries, shortlist):
+            rows = np.sort(rows)  # sequential reads from the memmap
+            exact = snap.vectors[rows].astype(np.float32) @ query
+            top = np.argsort(-exact)[:k]
+            results.append([(int(rows[i]), float(exact[i])) for i in top])
+        return results
+
+    def diversify(self, ranked: list[tuple[int, float]], k: int,
+                  lambda_: float = LOCAL_RETRIEVAL_MMR_LAMBDA,
+                  duplicate_cosine: float = LOCAL_RETRIEVAL_DUPLICATE_COSINE) -> list[tuple[int, float]]:
+        """Up to k of the ranked (row, score) pairs, picked by MMR over chunk vectors."""
+        if len(ranked) <= 1 or (lambda_ >= 1.0 and duplicate_cosine > 1.0):
+            return ranked[:k]
+        vectors = self.snapshot.vectors[[row for row, _ in ranked]].astype(np.float32)
+        picked = mmr([score for _, score in ranked], vectors @ vectors.T, k, lambda_, duplicate_cosine)
+        return [ranked[i] for i in picked]
+
+    def hits(self, ranked: list[tuple[int, float]]) -> list[Hit]:
+        """Attach document fields to (row, score) pairs."""
+        hits = []
+        for row, score in ranked:
+            doc = self.snapshot.doc(row)
+            hits.append(Hit(
+                row=row,
+                score=score,
+                id=doc["id"],
+                title=doc.get("title", ""),
+                source=doc.get("source", ""),
+                chunk_id=doc.get("chunk_id", 0),
+                content=doc.get("content", ""),
+            ))
+        return hits
+
+    def search(self, queries, k: int) -> list[list[Hit]]:
+        """Top-k hits with document fields per query vector."""
+        return [self.hits(ranked) for ranked in self.search_vectors(queries, k)]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RAG HELPERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def filter_by_strictness(ranked: list[tuple[int, float]], strictness: int) -> list[tuple[int, float]]:
+    """
+    Approximates 'On Your Data' strictness (1-5): drop (row, cosine) pairs
+    scoring well below the best one, with a tighter margin at higher strictness.
+    """
+    if not ranked:
+        return ranked
+    margin = 0.04 * (6 - strictness)
+    floor = ranked[0][1] - margin
+    return [pair for pair in ranked if pair[1] >= floor]
+
+
+def format_sources(hits: list[Hit]) -> str:
+    """Retrieved chunks as a prompt block, numbered to match [docN] citations."""
+    return "\n\n".join(
+        f"[doc{i}] {hit.title} ({hit.source})\n{hit.content}" for i, hit in enumerate(hits, 1)
+    )
+
+
+def retrieve(query: str, profile) -> list[Hit]:
+    """
+    The profile's top documents from the local snapshot. A confident BM25 result
+    is returned without embedding the query; otherwise vector results are fused
+    with BM25 by reciprocal rank (LOCAL_RETRIEVAL_HYBRID) or filtered by the
+    profile's strictness on their own. Every path picks the final top_n from a
+    larger candidate list by MMR, skipping near-duplicate chunks.
+    """
+    from openai_pool import get_chat_pool
+
+    settings = get_settings()
+    retriever = get_local_retriever()
+    top_n = profile.top_n_documents
+    candidates = max(top_n * 4, 20)
+
+    lexical_result = None
+    lexical = get_lexical_index() if (settings.lexical_shortcut or LOCAL_RETRIEVAL_HYBRID) else None
+    if lexical is not None:
+        with span("retrieval.lexical"):
+            lexical_result = lexical.search(query, candidates)
+        if settings.lexical_shortcut and lexical_result.confident:
+            annotate(retrieval_path="lexical")
+            return _diversified_hits(retriever, list(zip(lexical_result.rows, lexical_result.scores)), top_n)
+
+    vector = get_chat_pool().embeddings(
+        [query], model=settings.embedding_deployment, **settings.embedding_kwargs()
+    )[0]
+    with span("retrieval.local"):
+        if LOCAL_RETRIEVAL_HYBRID and lexical_result is not None and lexical_result.rows:
+            annotate(retrieval_path="hybrid")
+            ranked = retriever.search_vectors([vector], candidates)[0]
+            fused = reciprocal_rank_fusion([[row for row, _ in ranked], lexical_result.rows], candidates)
+            return _diversified_hits(retriever, fused, top_n)
+
+        annotate(retrieval_path="vector")
+        ranked = retriever.search_vectors([vector], candidates)[0]
+        return _diversified_hits(retriever, filter_by_strictness(ranked, profile.strictness), top_n)
+
+
+def _diversified_hits(retriever: LocalRetriever, ranked: list[tuple[int, float]], top_n: int) -> list[Hit]:
+    with span("retrieval.mmr"):
+        chosen = retriever.diversify(ranked, top_n)
+    # Slots left empty because the remaining candidates repeated a chosen chunk
+    if len(chosen) < min(top_n, len(ranked)):
+        annotate(retrieval_duplicates_dropped=min(top_n, len(ranked)) - len(chosen))
+    return retriever.hits(chosen)
+
+
+# Shared retriever (one mmap per worker process, pages shared across processes)
+_local_retriever: Optional[LocalRetriever] = None
+_local_retriever_lock = threading.Lock()
+
+
+def get_local_retriever() -> LocalRetriever:
+    """Get or open the local retriever for LOCAL_SNAPSHOT_PATH."""
+    global _local_retriever
+    if _local_retriever is None:
+        with _local_retriever_lock:
+            if _local_retriever is None:
+                snapshot = VectorSnapshot(LOCAL_SNAPSHOT_PATH)
+                _local_retriever = LocalRetriever(
+                    snapshot, LOCAL_RETRIEVAL_QUANTIZATION, LOCAL_RETRIEVAL_RESCORE_FACTOR
+                )
+                logger.info(
+                    f"📦 Local snapshot loaded: {snapshot.count} chunks x {snapshot.dims} dims "
+                    f"(coarse {snapshot.coarse_dims}, quantization={LOCAL_RETRIEVAL_QUANTIZATION})"
+                )
+    return _local_retriever
+
+
+def reset_local_retriever():
+    """Drop the shared retriever (useful for testing or after a new snapshot is deployed)."""
+    global _local_retriever
+    _local_retriever = None
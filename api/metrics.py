@@ -0,0 +1,302 @@
+"""
+In-process metrics - HDR-style latency histograms and counters.
+Recording bisects the value into a flat int list of bucket counts with no lock
+(see scripts/bench_metrics.py): under the GIL a thread switch inside an
+increment can rarely drop a sample, which is fine for monitoring. The
+registry renders Prometheus text format for the protected /metrics route.
+"""
+
+import math
+import bisect
+import threading
+from typing import Callable, Iterable, Optional
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HISTOGRAM LAYOUT
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Linear sub-buckets per power of two: worst-case relative error ~1/(2*SUB_BUCKETS)
+SUB_BUCKETS = 16
+
+# Covered range 2**MIN_EXPONENT .. 2**MAX_EXPONENT (~0.1µs .. ~1e12 in recorded units)
+MIN_EXPONENT = -23
+MAX_EXPONENT = 40
+
+BUCKET_COUNT = (MAX_EXPONENT - MIN_EXPONENT) * SUB_BUCKETS
+
+# Quantiles exported for every histogram
+EXPORTED_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+_ldexp = math.ldexp
+_bisect = bisect.bisect_right
+
+
+def _bucket_bound(index: int, offset: float = 0.0) -> float:
+    """Lower bound of a bucket (offset 0.5 gives its midpoint)."""
+    exponent = index // SUB_BUCKETS + MIN_EXPONENT
+    sub = index % SUB_BUCKETS
+    return _ldexp(0.5 + (sub + offset) / (2 * SUB_BUCKETS), exponent)
+
+
+def _bucket_midpoint(index: int) -> float:
+    """Representative value of a bucket."""
+    return _bucket_bound(index, 0.5)
+
+
+# Lower bounds of buckets 1..BUCKET_COUNT-1: bisect gives the bucket index,
+# clamped to the covered range at both ends
+_BUCKET_BOUNDS = [_bucket_bound(index) for index in range(1, BUCKET_COUNT)]
+
+
+class Histogram:
+    """Log-linear histogram with ~3% relative error; recording is one C-level bisect."""
+
+    __slots__ = ("_counts", "sum", "max")
+
+    def __init__(self):
+        self._counts = [0] * BUCKET_COUNT
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self._counts[_bisect(_BUCKET_BOUNDS, value)] += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> tuple[list, int, float, float]:
+        """(bucket counts, count, sum, max)."""
+        counts = list(self._counts)
+        return counts, sum(counts), self.sum, self.max
+
+    def quantiles(self, qs: Iterable[float] = EXPORTED_QUANTILES) -> dict:
+        """Quantile -> value (None when empty)."""
+        counts, total, _, maximum = self.snapshot()
+
+        qs = sorted(qs)
+        if total == 0:
+            return {q: None for q in qs}
+
+        result = {}
+        cumulative = 0
+        pending = iter(qs)
+        q = next(pending)
+        for index, c in enumerate(counts):
+            if not c:
+                continue
+            cumulative += c
+            while q is not None and cumulative >= q * total:
+                result[q] = min(_bucket_midpoint(index), maximum)
+                q = next(pending, None)
+            if q is None:
+                break
+        return result
+
+
+class Counter:
+    """Monotonic counter."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REGISTRY
+# ═══════════════════════════════════════════════════════════════════════════
+
+class MetricFamily:
+    """A named metric with fixed label names; children are created on first use."""
+
+    def __init__(self, name: str, help_text: str, kind: str, label_names: tuple, factory: Callable):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = label_names
+        self._factory = factory
+        self._children: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Child metric for the given label values (positional, in label_names order)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def children(self) -> list:
+        with self._lock:
+            return list(self._children.items())
+
+
+class MetricsRegistry:
+    """Metric families plus scrape-time callbacks for state owned elsewhere."""
+
+    def __init__(self):
+        self._families: dict[str, MetricFamily] = {}
+        self._callbacks: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, help_text: str, kind: str, label_names, factory) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(name, help_text, kind, tuple(label_names), factory)
+                self._families[name] = family
+            return family
+
+    def histogram(self, name: str, help_text: str, label_names: Iterable[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "summary", label_names, Histogram)
+
+    def counter(self, name: str, help_text: str, label_names: Iterable[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "counter", label_names, Counter)
+
+    def register_callback(self, name: str, help_text: str, kind: str, fn: Callable[[], Iterable[tuple]]):
+        """
+        Export values read at scrape time. fn() yields (labels_dict, value) pairs.
+        Re-registering a name replaces the previous callback.
+        """
+        with self._lock:
+            self._callbacks[name] = (help_text, kind, fn)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            families = list(self._families.values())
+            callbacks = list(self._callbacks.items())
+
+        lines = []
+        for family in families:
+            children = family.children()
+            if not children:
+                continue
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in children:
+                labels = dict(zip(family.label_names, values))
+                if isinstance(child, Histogram):
+                    for q, v in child.quantiles().items():
+                        if v is not None:
+                            lines.append(f"{family.name}{_format_labels(labels, quantile=q)} {_format_value(v)}")
+                    _, count, total, _ = child.snapshot()
+                    lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{family.name}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{family.name}{_format_labels(labels)} {_format_value(child.value)}")
+
+        for name, (help_text, kind, fn) in callbacks:
+            try:
+                samples = list(fn())
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._families.clear()
+            self._callbacks.clear()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict, quantile: Optional[float] = None) -> str:
+    items = [f'{k}="{_escape(v)}"' for k, v in labels.items()]
+    if quantile is not None:
+        items.append(f'quantile="{quantile}"')
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(round(float(value), 6))
+
+
+# Process-wide registry (per worker, like the rate limiter)
+metrics = MetricsRegistry()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRIC CATALOGUE
+# ═══════════════════════════════════════════════════════════════════════════
+
+REQUEST_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "End-to-end handler latency per route", ["route"]
+)
+REQUESTS_TOTAL = metrics.counter(
+    "http_requests_total", "Responses per route and status code", ["route", "status"]
+)
+RATE_LIMIT_REJECTIONS = metrics.counter(
+    "rate_limit_rejections_total", "Requests rejected by the per-IP limiter", ["route", "reason"]
+)
+UPSTREAM_LATENCY = metrics.histogram(
+    "upstream_duration_seconds", "Outbound call latency per upstream", ["upstream"]
+)
+TOOL_LATENCY = metrics.histogram(
+    "tool_duration_seconds", "Agent tool (plugin function) latency", ["tool"]
+)
+STAGE_LATENCY = metrics.histogram(
+    "stage_duration_seconds", "Latency of other request stages", ["stage"]
+)
+REQUEST_TOKENS = metrics.histogram(
+    "request_tokens", "Total tokens per request", ["route"]
+)
+AGENT_TURN_LATENCY = metrics.histogram(
+    "agent_turn_duration_seconds", "Agent turn latency per model route", ["route"]
+)
+AGENT_TURN_TOKENS = metrics.counter(
+    "agent_turn_tokens_total", "Agent turn tokens per model route and kind (prompt, completion)", ["route", "kind"]
+)
+AGENT_TURN_ERRORS = metrics.counter(
+    "agent_turn_errors_total", "Failed agent turns per model route", ["route"]
+)
+RESPONSE_BYTES = metrics.histogram(
+    "http_response_bytes", "Response body bytes on the wire per route and encoding", ["route", "encoding"]
+)
+LIMITER_REQUESTS = metrics.counter(
+    "upstream_limiter_requests_total", "Adaptive limiter decisions (admitted, queued, shed)", ["limiter", "result"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "cache_requests_total", "Cache lookups by result (hit, miss, coalesced)", ["cache", "result"]
+)
+
+# Span name prefix -> histogram family (see tracing.span)
+_SPAN_FAMILIES = {"upstream": UPSTREAM_LATENCY, "tool": TOOL_LATENCY}
+
+# Span name -> labelled histogram, so recording a span skips the family lookup
+_span_histograms: dict[str, Histogram] = {}
+
+
+def _span_histogram(name: str) -> Histogram:
+    prefix, _, rest = name.partition(".")
+    family = _SPAN_FAMILIES.get(prefix)
+    if family is not None and rest:
+        child = family.labels(rest)
+    else:
+        child = STAGE_LATENCY.labels(name)
+    _span_histograms[name] = child
+    return child
+
+
+def observe_span(name: str, seconds: float):
+    """Record a finished tracing span ('upstream.x', 'tool.x' or a plain stage name)."""
+    child = _span_histograms.get(name)
+    if child is None:
+        child = _span_histogram(name)
+    child.observe(seconds)
@@ -0,0 +1,459 @@
+"""
+Azure OpenAI deployment pool - weighted load balancing and failover.
+Spreads chat completions over several endpoint/deployment pairs, picks the
+least-loaded healthy target, and fails over on 429/5xx/connection errors.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from deadline import (
+    hedged_call,
+    current_deadline,
+    upstream_timeout,
+    record_timeout,
+    upstream_stats,
+    LatencyTracker,
+    DeadlineExceeded,
+    HEDGE_DEPLOYMENT,
+    OPENAI_TIMEOUT_SECONDS,
+    MIN_UPSTREAM_TIMEOUT,
+    REQUEST_DEADLINE_SECONDS,
+)
+from tracing import span
+from metrics import metrics
+from limiter import llm_slot
+
+logger = logging.getLogger(__name__)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+AZURE_OPENAI_API_VERSION = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
+
+# Cooldown after a failure (doubles per consecutive failure, capped)
+POOL_BASE_COOLDOWN = float(os.environ.get("OPENAI_POOL_BASE_COOLDOWN", 5))
+POOL_MAX_COOLDOWN = float(os.environ.get("OPENAI_POOL_MAX_COOLDOWN", 120))
+
+# Default wait after a 429 without a Retry-After header
+DEFAULT_RETRY_AFTER = 10.0
+
+# Attempts per call (at least one per target); SDK clients never retry on their own,
+# so every attempt gets a timeout bounded by the request deadline
+POOL_MAX_ATTEMPTS = int(os.environ.get("OPENAI_POOL_MAX_ATTEMPTS", 3))
+# Pause before retrying a target that already failed this call (doubles per round)
+POOL_RETRY_BACKOFF = 0.5
+
+
+@dataclass
+class DeploymentTarget:
+    """One endpoint/deployment pair and its live health state."""
+    name: str
+    endpoint: str
+    deployment: str
+    weight: float = 1.0
+    api_key: str = ""
+    outstanding: int = 0
+    cooldown_until: float = 0.0
+    consecutive_failures: int = 0
+    successes: int = 0
+    failures: int = 0
+    throttled: int = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def load(self) -> float:
+        """Outstanding requests per unit of weight (lower is better)."""
+        return (self.outstanding + 1) / max(self.weight, 0.01)
+
+    def state(self) -> dict:
+        now = time.monotonic()
+        return {
+            "deployment": self.deployment,
+            "endpoint": self.endpoint,
+            "weight": self.weight,
+            "healthy": self.healthy(now),
+            "cooldown_s": round(max(0.0, self.cooldown_until - now), 1),
+            "outstanding": self.outstanding,
+            "successes": self.successes,
+            "failures": self.failures,
+            "throttled": self.throttled,
+        }
+
+
+def _is_usable_key(api_key: str) -> bool:
+    return bool(api_key) and not api_key.startswith("@Microsoft.KeyVault")
+
+
+def load_targets_from_env() -> list[DeploymentTarget]:
+    """
+    Build targets from AZURE_OPENAI_POOL (JSON list) or the single-deployment settings.
+
+    AZURE_OPENAI_POOL example:
+        [{"name": "swc", "endpoint": "https://a.openai.azure.com", "deployment": "gpt-4o", "weight": 2},
+         {"name": "eus", "endpoint": "https://b.openai.azure.com", "deployment": "gpt-4o",
+          "api_key_env": "AZURE_OPENAI_API_KEY_EUS"}]
+    """
+    default_key = os.environ.get("AZURE_OPENAI_API_KEY", "")
+    pool_json = os.environ.get("AZURE_OPENAI_POOL", "")
+
+    if pool_json:
+        try:
+            entries = json.loads(pool_json)
+            targets = []
+            for i, entry in enumerate(entries):
+                key_env = entry.get("api_key_env")
+                targets.append(DeploymentTarget(
+                    name=entry.get("name", f"target{i}"),
+                    endpoint=entry["endpoint"],
+                    deployment=entry.get("deployment", os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")),
+                    weight=float(entry.get("weight", 1.0)),
+                    api_key=os.environ.get(key_env, "") if key_env else default_key,
+                ))
+            if targets:
+                return targets
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid AZURE_OPENAI_POOL, using single deployment: {e}")
+
+    return [DeploymentTarget(
+        name="primary",
+        endpoint=os.environ.get("AZURE_OPENAI_ENDPOINT", ""),
+        deployment=os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o"),
+        api_key=default_key,
+    )]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ERROR CLASSIFICATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _root_cause(error: BaseException) -> BaseException:
+    """Unwrap SDK wrappers (e.g. Semantic Kernel's ServiceResponseException)."""
+    seen = set()
+    while error.__cause__ is not None and id(error) not in seen:
+        seen.add(id(error))
+        error = error.__cause__
+    return error
+
+
+def _retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """Return 'throttled', 'unavailable' or 'timeout' for failover-worthy errors, else None."""
+    import openai
+
+    cause = _root_cause(error)
+    if isinstance(cause, (openai.APITimeoutError, DeadlineExceeded)):
+        return "timeout"
+    if isinstance(cause, openai.RateLimitError):
+        return "throttled"
+    if isinstance(cause, openai.APIStatusError) and cause.status_code >= 500:
+        return "unavailable"
+    if isinstance(cause, openai.APIConnectionError):
+        return "unavailable"
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DEPLOYMENT POOL
+# ═══════════════════════════════════════════════════════════════════════════
+
+class DeploymentPool:
+    """Weighted least-outstanding-request pool with health tracking."""
+
+    def __init__(self, targets: list[DeploymentTarget], client_factory: Optional[Callable] = None):
+        if not targets:
+            raise ValueError("DeploymentPool needs at least one target")
+        self.targets = targets
+        self._lock = threading.Lock()
+        self._clients: dict = {}
+        self._client_factory = client_factory or self._default_client_factory
+        self._token_provider = None
+        self.latency = LatencyTracker()
+
+    # ── target selection ──────────────────────────────────────────────────
+
+    def acquire(self, exclude: tuple = ()) -> Optional[DeploymentTarget]:
+        """Pick the healthy target with the lowest weighted load and reserve a slot."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [t for t in self.targets if t not in exclude]
+            if not candidates:
+                return None
+            healthy = [t for t in candidates if t.healthy(now)]
+            if healthy:
+                target = min(healthy, key=DeploymentTarget.load)
+            else:
+                # Everything is cooling down: try the one that recovers first
+                target = min(candidates, key=lambda t: t.cooldown_until)
+            target.outstanding += 1
+            return target
+
+    def release(self, target: DeploymentTarget, error: Optional[BaseException] = None):
+        """Return a slot and update health from the outcome."""
+        kind = classify_error(error) if error is not None else None
+        with self._lock:
+            target.outstanding = max(0, target.outstanding - 1)
+            if error is None:
+                target.successes += 1
+                target.consecutive_failures = 0
+                target.cooldown_until = 0.0
+                return
+            if kind is None:
+                # Caller error (400 etc.): not the deployment's fault
+                return
+
+            target.failures += 1
+            target.consecutive_failures += 1
+            if kind == "throttled":
+                target.throttled += 1
+                cooldown = _retry_after_seconds(_root_cause(error)) or DEFAULT_RETRY_AFTER
+            else:
+                cooldown = min(POOL_MAX_COOLDOWN, POOL_BASE_COOLDOWN * 2 ** (target.consecutive_failures - 1))
+            target.cooldown_until = time.monotonic() + cooldown
+
+        logger.warning(f"⚠️ OpenAI target '{target.name}' {kind}; cooling down {cooldown:.1f}s")
+
+    @contextmanager
+    def lease(self, exclude: tuple = ()):
+        """Reserve a target for the duration of a call; health is updated on exit."""
+        target = self.acquire(exclude)
+        if target is None:
+            raise RuntimeError("No Azure OpenAI target available")
+        try:
+            yield target
+        except BaseException as e:
+            self.release(target, e)
+            raise
+        else:
+            self.release(target)
+
+    # ── clients ───────────────────────────────────────────────────────────
+
+    def token_provider(self):
+        """Shared Entra ID token provider (one credential and token cache per worker)."""
+        if self._token_provider is None:
+            from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+            self._token_provider = get_bearer_token_provider(
+                DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default"
+            )
+        return self._token_provider
+
+    def _default_client_factory(self, target: DeploymentTarget):
+        from openai import AzureOpenAI
+
+        # No in-client retries: the SDK would give every retry the full timeout and
+        # overrun the request deadline; retry and failover happen in _call_with_failover
+        if _is_usable_key(target.api_key):
+            return AzureOpenAI(
+                azure_endpoint=target.endpoint,
+                api_key=target.api_key,
+                api_version=AZURE_OPENAI_API_VERSION,
+                max_retries=0,
+            )
+        return AzureOpenAI(
+            azure_endpoint=target.endpoint,
+            azure_ad_token_provider=self.token_provider(),
+            api_version=AZURE_OPENAI_API_VERSION,
+            max_retries=0,
+        )
+
+    def client_for(self, target: DeploymentTarget):
+        """Cached client per endpoint/key (shared HTTP connection pool)."""
+        key = (target.endpoint, target.api_key)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._client_factory(target)
+                    self._clients[key] = client
+        return client
+
+    def warm(self):
+        """Build every target's client and fetch the first Entra ID token ahead of traffic."""
+        for target in self.targets:
+            self.client_for(target)
+        if any(not _is_usable_key(t.api_key) for t in self.targets):
+            self.token_provider()()
+
+    # ── calls ─────────────────────────────────────────────────────────────
+
+    def _attempt(self, target: DeploymentTarget, deployment: str, timeout: float, kwargs: dict):
+        client = self.client_for(target)
+        return client.chat.completions.create(model=deployment, timeout=timeout, **kwargs)
+
+    def _retry_pause(self, retry_round: int) -> bool:
+        """
+        Wait before another round over the targets: the backoff, or until the
+        first target's cooldown (e.g. a 429's Retry-After) ends if that is later.
+        False (no wait) when the deadline ends before a target is usable again.
+        """
+        with self._lock:
+            recovers_in = min(t.cooldown_until for t in self.targets) - time.monotonic()
+        pause = max(POOL_RETRY_BACKOFF * 2 ** (retry_round - 1), recovers_in)
+        deadline = current_deadline()
+        # Outside a request (warm-up, scripts) wait at most one request's budget
+        budget = deadline.remaining() if deadline is not None else REQUEST_DEADLINE_SECONDS
+        if budget - pause < MIN_UPSTREAM_TIMEOUT:
+            return False
+        time.sleep(pause)
+        return True
+
+    def _call_with_failover(self, timeout_cap: float, first_exclude: tuple, attempt: Callable, upstream: str):
+        """
+        Try targets in load order until one succeeds; after every target failed,
+        retry after the backoff or the earliest cooldown, whichever is later, while
+        the request deadline allows (POOL_MAX_ATTEMPTS in total); otherwise the
+        last upstream error is raised.
+        Each attempt's timeout is min(timeout_cap, remaining deadline).
+        """
+        tried: tuple = first_exclude
+        last_error: Optional[BaseException] = None
+        retry_round = 0
+
+        for _ in range(max(len(self.targets), POOL_MAX_ATTEMPTS)):
+            target = self.acquire(exclude=tried)
+            if target is None:
+                if last_error is None:
+                    break
+                retry_round += 1
+                if not self._retry_pause(retry_round):
+                    break
+                tried = ()
+                target = self.acquire()
+            tried = tried + (target,)
+            try:
+                result = attempt(target, upstream_timeout(timeout_cap))
+            except DeadlineExceeded as e:
+                self.release(target, e)
+                raise
+            except Exception as e:
+                self.release(target, e)
+                kind = classify_error(e)
+                if kind is None or kind == "timeout":
+                    raise
+                last_error = e
+                upstream_stats.incr("failovers", upstream)
+                logger.warning(f"🔁 Failing over from '{target.name}' ({kind})")
+                continue
+            self.release(target)
+            return result
+
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError("No Azure OpenAI target available")
+
+    def chat_completion(self, upstream: str = "openai", **kwargs):
+        """
+        Chat completion with failover, bounded by the request deadline.
+        Hedges to another pool target (or AZURE_OPENAI_HEDGE_DEPLOYMENT) when enabled.
+        Runs under the shared adaptive limiter. Raises DeadlineExceeded on
+        timeout and limiter.Overloaded when shed.
+        """
+        import openai
+
+        def attempt(target: DeploymentTarget, timeout: float):
+            return self._attempt(target, target.deployment, timeout, kwargs)
+
+        def primary(timeout: float):
+            return self._call_with_failover(timeout, (), attempt, upstream)
+
+        secondary = None
+        if len(self.targets) > 1:
+            secondary = primary
+        elif HEDGE_DEPLOYMENT and HEDGE_DEPLOYMENT != self.targets[0].deployment:
+            target = self.targets[0]
+
+            def secondary(timeout: float):
+                return self._attempt(target, HEDGE_DEPLOYMENT, timeout, kwargs)
+
+        try:
+            with llm_slot(classify_error), span(f"upstream.{upstream}"):
+                return hedged_call(upstream, primary, secondary, self.latency, OPENAI_TIMEOUT_SECONDS)
+        except openai.APITimeoutError as e:
+            record_timeout(upstream)
+            raise DeadlineExceeded(f"{upstream} timed out") from e
+        except DeadlineExceeded:
+            record_timeout(upstream)
+            raise
+
+    def embeddings(self, inputs: list, model: str, upstream: str = "embedding", **kwargs) -> list:
+        """
+        Embedding vectors for inputs (one per input, in order) from the `model`
+        deployment, with failover across pool targets. Raises DeadlineExceeded on timeout.
+        """
+        import openai
+
+        def attempt(target: DeploymentTarget, timeout: float):
+            client = self.client_for(target)
+            return client.embeddings.create(model=model, input=inputs, timeout=timeout, **kwargs)
+
+        try:
+            with span(f"upstream.{upstream}"):
+                response = self._call_with_failover(OPENAI_TIMEOUT_SECONDS, (), attempt, upstream)
+        except openai.APITimeoutError as e:
+            record_timeout(upstream)
+            raise DeadlineExceeded(f"{upstream} timed out") from e
+        except DeadlineExceeded:
+            record_timeout(upstream)
+            raise
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def state(self) -> list[dict]:
+        with self._lock:
+            return [{"name": t.name, **t.state()} for t in self.targets]
+
+
+# Shared chat pool (one per worker process)
+_chat_pool: Optional[DeploymentPool] = None
+_chat_pool_lock = threading.Lock()
+
+
+def get_chat_pool() -> DeploymentPool:
+    """Get or create the shared chat deployment pool."""
+    global _chat_pool
+    if _chat_pool is None:
+        with _chat_pool_lock:
+            if _chat_pool is None:
+                _chat_pool = DeploymentPool(load_targets_from_env())
+                metrics.register_callback(
+                    "openai_pool_target_state", "Per-target outstanding requests and health",
+                    "gauge", _pool_samples,
+                )
+    return _chat_pool
+
+
+def _pool_samples():
+    pool = _chat_pool
+    if pool is None:
+        return
+    for target in pool.state():
+        yield {"target": target["name"], "field": "outstanding"}, target["outstanding"]
+        yield {"target": target["name"], "field": "healthy"}, target["healthy"]
+        yield {"target": target["name"], "field": "throttled"}, target["throttled"]
+
+
+def reset_chat_pool():
+    """Drop the shared pool (useful for testing)."""
+    global _chat_pool
+    _chat_pool = None
@@ -0,0 +1,140 @@
+"""
+Response Layer - JSON HTTP responses for the routes.
+
+Bodies are serialized with orjson when installed (stdlib json otherwise),
+fixed error bodies are encoded once and reused, and large bodies (answers
+with citations) are compressed with brotli or gzip when the client accepts
+it. Body size per route/encoding is recorded in the metrics registry,
+serialization and compression time as request stages.
+"""
+
+import os
+import json
+import gzip
+from functools import lru_cache
+from typing import Optional
+
+import azure.functions as func
+
+from metrics import RESPONSE_BYTES
+from tracing import current_trace, span
+
+# Try to import orjson (several times faster, returns bytes), fall back to the stdlib
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Try to import brotli, fall back to gzip only
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Bodies smaller than this are sent uncompressed (headers + CPU outweigh the savings)
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+# Low levels: answers are a few KB, latency matters more than the last percent
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENCODING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def dumps(payload) -> bytes:
+    """UTF-8 JSON bytes (orjson, or stdlib json for types orjson rejects)."""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+@lru_cache(maxsize=256)
+def error_body(message: str) -> bytes:
+    """Encoded {"error": message}; fixed messages are encoded only once."""
+    return dumps({"error": message})
+
+
+def accepted_encoding(req: Optional[func.HttpRequest]) -> Optional[str]:
+    """Best supported Content-Encoding the client accepts ("br", "gzip" or None)."""
+    if req is None:
+        return None
+    accepted = set()
+    for part in req.headers.get("Accept-Encoding", "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name)
+    if HAS_BROTLI and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RESPONSES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _route() -> str:
+    trace = current_trace()
+    return trace.route if trace is not None else "unknown"
+
+
+def _vary_accept_encoding(headers: dict) -> dict:
+    """headers with Accept-Encoding added to Vary (kept alongside any existing values)."""
+    vary = headers.get("Vary", "")
+    if "accept-encoding" in vary.lower():
+        return headers
+    return {**headers, "Vary": f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"}
+
+
+def _send(body: bytes, status_code: int, headers: dict, req: Optional[func.HttpRequest]) -> func.HttpResponse:
+    encoding = None
+    if req is not None:
+        # Negotiable response: caches must key on Accept-Encoding whether or not
+        # this body ends up compressed (small bodies, clients without gzip/br)
+        headers = _vary_accept_encoding(headers)
+        if len(body) >= RESPONSE_COMPRESS_MIN_BYTES:
+            encoding = accepted_encoding(req)
+        if encoding is not None:
+            with span("compression"):
+                body = compress(body, encoding)
+            headers = {**headers, "Content-Encoding": encoding}
+    RESPONSE_BYTES.labels(_route(), encoding or "identity").observe(len(body))
+    return func.HttpResponse(body, status_code=status_code, headers=headers)
+
+
+def json_response(
+    payload,
+    status_code: int = 200,
+    headers: Optional[dict] = None,
+    req: Optional[func.HttpRequest] = None,
+) -> func.HttpResponse:
+    """
+    Serialize payload as the response body. Pass the request to allow
+    compression (only bodies of at least RESPONSE_COMPRESS_MIN_BYTES).
+    """
+    with span("serialization"):
+        body = dumps(payload)
+    return _send(body, status_code, headers or {}, req)
+
+
+def error_response(message: str, status_code: int, headers: Optional[dict] = None) -> func.HttpResponse:
+    """{"error": message} from the pre-encoded body cache (never compressed: always small)."""
+    return _send(error_body(message), status_code, headers or {}, None)
@@ -4,16 +4,33 @@ Implements rate limiting, request validation, and authentication.
 """
 
 import os
+import re
 import time
 import hashlib
 import hmac
 import logging
+from dataclasses import dataclass
 from functools import wraps
 from typing import Optional, Callable
 from collections import defaultdict
 import azure.functions as func
 import json
 
+# Try to import orjson (faster, parses bytes directly), fall back to the stdlib
+try:
+    import orjson
+    _json_loads = orjson.loads
+    HAS_ORJSON = True
+except ImportError:
+    _json_loads = json.loads
+    HAS_ORJSON = False
+
+from deadline import deadline_scope
+from tracing import start_trace, span
+from metrics import REQUESTS_TOTAL, RATE_LIMIT_REJECTIONS
+from responses import error_response
+from settings import RETRIEVAL_PROFILES
+
 logger = logging.getLogger(__name__)
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -34,6 +51,17 @@ ALLOWED_ORIGINS = os.environ.get(
 # API Key for additional protection (optional, set in Azure)
 API_SECRET_KEY = os.environ.get("API_SECRET_KEY", "")
 
+# Bearer token for the /metrics scrape endpoint (endpoint is disabled when unset)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Request body limits. The byte cap is checked before any JSON parsing; the
+# default fits a maximal chat body (4000-char message + 20 x 2000-char
+# history) in UTF-8, and anything beyond it would be truncated anyway.
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_REQUEST_BYTES", 128 * 1024))
+MAX_MESSAGE_LENGTH = 4000
+MAX_HISTORY_MESSAGES = 20
+MAX_HISTORY_CONTENT_LENGTH = 2000
+
 # ═══════════════════════════════════════════════════════════════════════════
 # IN-MEMORY RATE LIMITER (Use Redis for production scaling)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -184,6 +212,13 @@ def validate_request_signature(req: func.HttpRequest) -> bool:
     return hmac.compare_digest(signature, expected_signature)
 
 
+def validate_metrics_token(req: func.HttpRequest) -> bool:
+    """Check the scraper's 'Authorization: Bearer <METRICS_TOKEN>' header."""
+    if not METRICS_TOKEN:
+        return False
+    return hmac.compare_digest(req.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}")
+
+
 def validate_content_type(req: func.HttpRequest) -> bool:
     """Ensure POST requests have correct content type."""
     if req.method == "POST":
@@ -192,21 +227,17 @@ def validate_content_type(req: func.HttpRequest) -> bool:
     return True
 
 
+# Null bytes and control characters (except newlines/tabs)
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+
+
 def sanitize_input(text: str, max_length: int = 2000) -> str:
     """Sanitize user input to prevent injection attacks."""
     if not text:
         return ""
 
-    # Truncate to max length
-    text = text[:max_length]
-
-    # Remove null bytes and control characters (except newlines/tabs)
-    text = "".join(
-        char for char in text
-        if char == "\n" or char == "\t" or (ord(char) >= 32 and ord(char) != 127)
-    )
-
-    return text.strip()
+    # Truncate to max length, then remove control characters
+    return _CONTROL_CHARS.sub("", text[:max_length]).strip()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -225,122 +256,193 @@ def secure_endpoint(max_requests: int = RATE_LIMIT_MAX_REQUESTS, require_signatu
         @wraps(fn)
         def wrapper(req: func.HttpRequest) -> func.HttpResponse:
             headers = get_cors_headers(req)
-            client_ip = get_client_ip(req)
 
             # Handle CORS preflight
             if req.method == "OPTIONS":
                 return func.HttpResponse(status_code=204, headers=headers)
 
-            # Check if IP is blocked
-            if rate_limiter.is_blocked(client_ip):
-                retry_after = rate_limiter.get_retry_after(client_ip, RATE_LIMIT_WINDOW)
-                headers["Retry-After"] = str(retry_after)
-                return func.HttpResponse(
-                    json.dumps({"error": "Too many requests. You have been temporarily blocked."}),
-                    status_code=429,
-                    headers=headers,
-                )
-
-            # Check rate limit
-            allowed, remaining = rate_limiter.check_rate_limit(
-                client_ip, max_requests, RATE_LIMIT_WINDOW
-            )
-
-            headers["X-RateLimit-Limit"] = str(max_requests)
-            headers["X-RateLimit-Remaining"] = str(remaining)
-            headers["X-RateLimit-Reset"] = str(int(time.time()) + RATE_LIMIT_WINDOW)
-
-            if not allowed:
-                retry_after = rate_limiter.get_retry_after(client_ip, RATE_LIMIT_WINDOW)
-                headers["Retry-After"] = str(retry_after)
-                logger.warning(f"Rate limit exceeded for {client_ip}")
-                return func.HttpResponse(
-                    json.dumps({"error": "Rate limit exceeded. Please try again later."}),
-                    status_code=429,
-                    headers=headers,
-                )
-
-            # Validate content type for POST
-            if not validate_content_type(req):
-                return func.HttpResponse(
-                    json.dumps({"error": "Invalid content type. Use application/json."}),
-                    status_code=415,
-                    headers=headers,
-                )
-
-            # Validate signature if required
-            if require_signature and not validate_request_signature(req):
-                logger.warning(f"Invalid signature from {client_ip}")
-                return func.HttpResponse(
-                    json.dumps({"error": "Invalid or missing request signature."}),
-                    status_code=401,
-                    headers=headers,
-                )
-
-            # Call the actual function
-            try:
-                response = fn(req)
-                return response
-            except Exception as e:
-                logger.error(f"Error in {fn.__name__}: {e}")
-                return func.HttpResponse(
-                    json.dumps({"error": "Internal server error"}),
-                    status_code=500,
-                    headers=headers,
-                )
+            with start_trace(fn.__name__):
+                response = _handle(fn, req, headers, max_requests, require_signature)
+            REQUESTS_TOTAL.labels(fn.__name__, str(response.status_code)).inc()
+            return response
 
         return wrapper
     return decorator
 
 
-# ═══════════════════════════════════════════════════════════════════════════
-# REQUEST VALIDATION
-# ═══════════════════════════════════════════════════════════════════════════
-
-def validate_chat_request(req: func.HttpRequest) -> tuple[bool, Optional[str], Optional[dict]]:
-    """
-    Validate chat request body.
-    Returns (is_valid, error_message, parsed_body)
-    """
+def _handle(
+    fn: Callable,
+    req: func.HttpRequest,
+    headers: dict,
+    max_requests: int,
+    require_signature: bool,
+) -> func.HttpResponse:
+    """Admission checks, then the handler under a request deadline."""
+    with span("admission"):
+        rejection = _check_admission(req, headers, max_requests, require_signature, fn.__name__)
+    if rejection is not None:
+        return rejection
+
+    # Call the actual function (outbound calls share one request deadline)
     try:
-        body = req.get_json()
-    except ValueError:
-        return False, "Invalid JSON body", None
+        with deadline_scope():
+            return fn(req)
+    except Exception as e:
+        logger.error(f"Error in {fn.__name__}: {e}")
+        return error_response("Internal server error", 500, headers)
+
+
+def _check_admission(
+    req: func.HttpRequest,
+    headers: dict,
+    max_requests: int,
+    require_signature: bool,
+    route: str,
+) -> Optional[func.HttpResponse]:
+    """Blocklist, rate limit, content type and signature checks. Returns a rejection or None."""
+    client_ip = get_client_ip(req)
+
+    # Check if IP is blocked
+    if rate_limiter.is_blocked(client_ip):
+        RATE_LIMIT_REJECTIONS.labels(route, "blocked").inc()
+        retry_after = rate_limiter.get_retry_after(client_ip, RATE_LIMIT_WINDOW)
+        headers["Retry-After"] = str(retry_after)
+        return error_response("Too many requests. You have been temporarily blocked.", 429, headers)
+
+    # Check rate limit
+    allowed, remaining = rate_limiter.check_rate_limit(
+        client_ip, max_requests, RATE_LIMIT_WINDOW
+    )
 
-    message = body.get("message", "")
+    headers["X-RateLimit-Limit"] = str(max_requests)
+    headers["X-RateLimit-Remaining"] = str(remaining)
+    headers["X-RateLimit-Reset"] = str(int(time.time()) + RATE_LIMIT_WINDOW)
 
-    if not message:
-        return False, "Message is required", None
+    if not allowed:
+        retry_after = rate_limiter.get_retry_after(client_ip, RATE_LIMIT_WINDOW)
+        headers["Retry-After"] = str(retry_after)
+        RATE_LIMIT_REJECTIONS.labels(route, "limit").inc()
+        logger.warning(f"Rate limit exceeded for {client_ip}")
+        return error_response("Rate limit exceeded. Please try again later.", 429, headers)
 
-    if not isinstance(message, str):
-        return False, "Message must be a string", None
+    # Validate content type for POST
+    if not validate_content_type(req):
+        return error_response("Invalid content type. Use application/json.", 415, headers)
 
-    # Sanitize message
-    sanitized_message = sanitize_input(message, max_length=4000)
+    # Reject oversized bodies before anything parses them
+    if req.method == "POST" and body_too_large(req):
+        return error_response("Request body too large.", 413, headers)
 
-    if len(sanitized_message) < 1:
-        return False, "Message cannot be empty", None
+    # Validate signature if required
+    if require_signature and not validate_request_signature(req):
+        logger.warning(f"Invalid signature from {client_ip}")
+        return error_response("Invalid or missing request signature.", 401, headers)
 
-    # Validate conversation history if present
-    history = body.get("conversation_history", [])
-    if not isinstance(history, list):
-        return False, "Conversation history must be an array", None
+    return None
 
-    # Limit history length to prevent abuse
-    if len(history) > 20:
-        history = history[-20:]
 
-    # Sanitize history messages
-    sanitized_history = []
-    for msg in history:
-        if isinstance(msg, dict) and "role" in msg and "content" in msg:
-            if msg["role"] in ("user", "assistant"):
-                sanitized_history.append({
-                    "role": msg["role"],
-                    "content": sanitize_input(str(msg["content"]), max_length=2000)
-                })
+# ═══════════════════════════════════════════════════════════════════════════
+# REQUEST VALIDATION
+# ═══════════════════════════════════════════════════════════════════════════
 
-    return True, None, {
-        "message": sanitized_message,
-        "conversation_history": sanitized_history
-    }
+def body_too_large(req: func.HttpRequest, limit: int = MAX_REQUEST_BYTES) -> bool:
+    """Declared (Content-Length) or actual body size above the limit."""
+    declared = req.headers.get("Content-Length", "")
+    if declared.isdigit() and int(declared) > limit:
+        return True
+    return len(req.get_body()) > limit
+
+
+@dataclass(frozen=True, slots=True)
+class ChatRequest:
+    """A validated chat body: sanitized message, last history turns, optional profile."""
+
+    message: str
+    conversation_history: list
+    retrieval_profile: Optional[str] = None
+
+
+class ChatRequestParser:
+    """
+    Chat body schema, compiled once: limits, allowed roles and profile names
+    are bound up front, and parse() decodes, truncates and sanitizes in one
+    pass (only the kept history turns are ever touched).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_REQUEST_BYTES,
+        max_message: int = MAX_MESSAGE_LENGTH,
+        max_history: int = MAX_HISTORY_MESSAGES,
+        max_history_content: int = MAX_HISTORY_CONTENT_LENGTH,
+        profiles=RETRIEVAL_PROFILES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_message = max_message
+        self.max_history = max_history
+        self.max_history_content = max_history_content
+        self.roles = frozenset(("user", "assistant"))
+        self.profiles = frozenset(profiles)
+        self.profile_error = f"retrieval_profile must be one of: {', '.join(profiles)}"
+
+    def parse(self, raw: bytes) -> tuple[Optional[str], Optional[ChatRequest]]:
+        """(error, None) or (None, ChatRequest)."""
+        if len(raw) > self.max_bytes:
+            return "Request body too large", None
+        try:
+            body = _json_loads(raw)
+        except (ValueError, RecursionError):  # decode errors, invalid UTF-8, deep nesting
+            return "Invalid JSON body", None
+        if not isinstance(body, dict):
+            return "Invalid JSON body", None
+
+        message = body.get("message")
+        if not message:
+            return "Message is required", None
+        if not isinstance(message, str):
+            return "Message must be a string", None
+        message = _CONTROL_CHARS.sub("", message[:self.max_message]).strip()
+        if not message:
+            return "Message cannot be empty", None
+
+        history = body.get("conversation_history")
+        if history is None:
+            history = ()
+        elif not isinstance(history, list):
+            return "Conversation history must be an array", None
+
+        # Only the last turns are kept (and looked at)
+        turns = []
+        for msg in history[-self.max_history:]:
+            if type(msg) is dict:
+                role = msg.get("role")
+                if type(role) is str and role in self.roles and "content" in msg:
+                    content = msg["content"]
+                    if type(content) is not str:
+                        content = str(content)
+                    turns.append({
+                        "role": role,
+                        "content": _CONTROL_CHARS.sub("", content[:self.max_history_content]).strip(),
+                    })
+
+        # Optional retrieval profile override (fast / balanced / thorough)
+        retrieval_profile = body.get("retrieval_profile")
+        if retrieval_profile is not None and (
+            type(retrieval_profile) is not str or retrieval_profile not in self.profiles
+        ):
+            return self.profile_error, None
+
+        return None, ChatRequest(message, turns, retrieval_profile)
+
+
+_chat_parser = ChatRequestParser()
+
+
+def validate_chat_request(req: func.HttpRequest) -> tuple[bool, Optional[str], Optional[ChatRequest]]:
+    """
+    Validate chat request body.
+    Returns (is_valid, error_message, parsed_body)
+    """
+    with span("validation"):
+        error, body = _chat_parser.parse(req.get_body())
+    return error is None, error, body
@@ -0,0 +1,281 @@
+"""
+Settings - configuration resolved once per worker instead of per request.
+Shared by function_app (chat, init-index), RAGPlugin and the health probes.
+
+Reload: bump the CONFIG_VERSION app setting or send SIGHUP to the worker.
+
+Retrieval profiles (fast / balanced / thorough) trade recall for latency and
+prompt tokens. Routes pick a default via RETRIEVAL_PROFILE_<ROUTE> (falling back
+to RETRIEVAL_PROFILE); a request may override it with "retrieval_profile".
+Tune the table with scripts/eval_retrieval.py.
+"""
+
+import os
+import copy
+import signal
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_INDEX = "documents-index"
+DEFAULT_EMBEDDING_DEPLOYMENT = "text-embedding-3-large"
+# text-embedding-3-large native size; EMBEDDING_DIMENSIONS shortens it (index must match)
+NATIVE_EMBEDDING_DIMENSIONS = 3072
+
+# Vector compression in the Search index: none, scalar (int8) or binary
+VECTOR_COMPRESSIONS = ("none", "scalar", "binary")
+
+# "azure_search": On Your Data data source; "local": memory-mapped snapshot (local_retrieval.py)
+RETRIEVAL_BACKENDS = ("azure_search", "local")
+
+LOCAL_SNAPSHOT_PATH = os.environ.get(
+    "LOCAL_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot")
+)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RETRIEVAL PROFILES
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class RetrievalProfile:
+    """Search parameters for the "On Your Data" data source."""
+
+    name: str
+    top_n_documents: int
+    strictness: int
+    query_type: str = "vector_semantic_hybrid"
+
+
+RETRIEVAL_PROFILES = {
+    # Fewer, stricter chunks and no semantic reranker: lowest latency and prompt tokens
+    "fast": RetrievalProfile("fast", top_n_documents=3, strictness=4, query_type="vector_simple_hybrid"),
+    "balanced": RetrievalProfile("balanced", top_n_documents=5, strictness=3),
+    "thorough": RetrievalProfile("thorough", top_n_documents=10, strictness=2),
+}
+DEFAULT_RETRIEVAL_PROFILE = "balanced"
+
+# Routes whose default profile can be set with RETRIEVAL_PROFILE_<ROUTE>
+RETRIEVAL_ROUTES = ("chat", "agent")
+
+# Profile requested by the current request (agent tools read it deep in the kernel)
+_requested_profile: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "retrieval_profile", default=None
+)
+
+
+@contextmanager
+def retrieval_profile_scope(name: Optional[str]):
+    """Make a per-request profile override visible to RAG tools invoked in this context."""
+    token = _requested_profile.set(name)
+    try:
+        yield
+    finally:
+        _requested_profile.reset(token)
+
+
+def _profile_from_env(variable: str, fallback: str) -> str:
+    name = os.environ.get(variable, "").strip().lower()
+    if not name:
+        return fallback
+    if name not in RETRIEVAL_PROFILES:
+        logger.warning(f"Unknown retrieval profile {variable}={name!r}, using {fallback}")
+        return fallback
+    return name
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SETTINGS
+# ═══════════════════════════════════════════════════════════════════════════
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable snapshot of the Search / embedding configuration."""
+
+    search_endpoint: str
+    search_index: str
+    search_key: str = field(repr=False)
+    embedding_deployment: str
+    # None = the model's native size (no `dimensions` parameter sent)
+    embedding_dimensions: Optional[int] = None
+    vector_compression: str = "none"
+    version: str = ""
+    retrieval_backend: str = "azure_search"
+    # Skip the query embedding when the snapshot's BM25 index has a clear winner (lexical.py)
+    lexical_shortcut: bool = False
+    # Route -> default retrieval profile name (read-only: shared across requests)
+    route_profiles: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    # Prebuilt "On Your Data" data source per profile (read-only; see data_source_config)
+    data_sources: Mapping[str, dict] = field(default_factory=lambda: MappingProxyType({}), repr=False, compare=False)
+
+    @property
+    def use_managed_identity(self) -> bool:
+        """No usable key (unset or an unresolved Key Vault reference) -> managed identity."""
+        return not self.search_key or self.search_key.startswith("@Microsoft.KeyVault")
+
+    @property
+    def vector_dimensions(self) -> int:
+        """Dimensions of content_vector in the index and of query embeddings."""
+        return self.embedding_dimensions or NATIVE_EMBEDDING_DIMENSIONS
+
+    def embedding_kwargs(self) -> dict:
+        """Extra arguments for embeddings.create (text-embedding-3 `dimensions`)."""
+        return {"dimensions": self.embedding_dimensions} if self.embedding_dimensions else {}
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        search_endpoint = os.environ.get("AZURE_SEARCH_ENDPOINT", "")
+        search_index = os.environ.get("AZURE_SEARCH_INDEX", DEFAULT_SEARCH_INDEX)
+        search_key = os.environ.get("AZURE_SEARCH_KEY", "")
+        embedding_deployment = os.environ.get("AZURE_EMBEDDING_DEPLOYMENT", DEFAULT_EMBEDDING_DEPLOYMENT)
+        default_profile = _profile_from_env("RETRIEVAL_PROFILE", DEFAULT_RETRIEVAL_PROFILE)
+        embedding_dimensions = int(os.environ.get("EMBEDDING_DIMENSIONS", 0)) or None
+        vector_compression = os.environ.get("VECTOR_COMPRESSION", "none").strip().lower()
+        if vector_compression not in VECTOR_COMPRESSIONS:
+            logger.warning(f"Unknown VECTOR_COMPRESSION={vector_compression!r}, using none")
+            vector_compression = "none"
+        retrieval_backend = os.environ.get("RETRIEVAL_BACKEND", "azure_search").strip().lower()
+        if retrieval_backend not in RETRIEVAL_BACKENDS:
+            logger.warning(f"Unknown RETRIEVAL_BACKEND={retrieval_backend!r}, using azure_search")
+            retrieval_backend = "azure_search"
+        settings = cls(
+            search_endpoint=search_endpoint,
+            search_index=search_index,
+            search_key=search_key,
+            embedding_deployment=embedding_deployment,
+            embedding_dimensions=embedding_dimensions,
+            vector_compression=vector_compression,
+            version=os.environ.get("CONFIG_VERSION", ""),
+            retrieval_backend=retrieval_backend,
+            lexical_shortcut=(
+                os.environ.get("LEXICAL_SHORTCUT", "true").lower() == "true"
+                and os.path.exists(os.path.join(LOCAL_SNAPSHOT_PATH, "lex_meta.json"))
+            ),
+            route_profiles=MappingProxyType({
+                route: _profile_from_env(f"RETRIEVAL_PROFILE_{route.upper()}", default_profile)
+                for route in RETRIEVAL_ROUTES
+            }),
+        )
+        if search_endpoint:
+            data_sources = {}
+            for profile in RETRIEVAL_PROFILES.values():
+                data_sources[profile.name] = settings.build_data_source(profile)
+                # Keyword-only variant: no query embedding, no semantic ranker
+                keyword = replace(profile, name=f"{profile.name}:keyword", query_type="simple")
+                data_sources[keyword.name] = settings.build_data_source(keyword)
+            settings = replace(settings, data_sources=MappingProxyType(data_sources))
+        return settings
+
+    def build_data_source(self, profile: RetrievalProfile) -> dict:
+        """Data source dict for an arbitrary profile (prebuilt for the named ones)."""
+        if self.use_managed_identity:
+            authentication = {"type": "system_assigned_managed_identity"}
+        else:
+            authentication = {"type": "api_key", "key": self.search_key}
+
+        parameters = {
+            "endpoint": self.search_endpoint,
+            "index_name": self.search_index,
+            "authentication": authentication,
+            "query_type": profile.query_type,
+            "top_n_documents": profile.top_n_documents,
+            "in_scope": True,
+            "strictness": profile.strictness,
+        }
+        if "semantic" in profile.query_type:
+            parameters["semantic_configuration"] = "default"
+        if profile.query_type.startswith("vector"):
+            parameters["embedding_dependency"] = {
+                "type": "deployment_name",
+                "deployment_name": self.embedding_deployment,
+                **self.embedding_kwargs(),
+            }
+        return {"type": "azure_search", "parameters": parameters}
+
+    def retrieval_profile(self, route: str, requested: Optional[str] = None) -> str:
+        """Profile for this call: explicit request, then the request-scoped override, then the route default."""
+        return (
+            requested
+            or _requested_profile.get()
+            or self.route_profiles.get(route, DEFAULT_RETRIEVAL_PROFILE)
+        )
+
+    def data_source_config(self, profile: str = DEFAULT_RETRIEVAL_PROFILE) -> dict:
+        """
+        Azure AI Search data source for chat completions (the caller's own copy of
+        the prebuilt one); KeyError if Search isn't configured.
+        """
+        if not self.data_sources:
+            raise KeyError("AZURE_SEARCH_ENDPOINT")
+        return copy.deepcopy(self.data_sources[profile])
+
+    def search_credential(self):
+        """Credential for the Search SDK clients (API key locally, managed identity in production)."""
+        if self.use_managed_identity:
+            from azure.identity import DefaultAzureCredential
+            return DefaultAzureCredential()
+
+        from azure.core.credentials import AzureKeyCredential
+        return AzureKeyCredential(self.search_key)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CURRENT SETTINGS
+# ═══════════════════════════════════════════════════════════════════════════
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+_reload_requested = False
+
+
+def reload_settings(reason: str = "startup") -> Settings:
+    """Resolve configuration from the environment and swap it in atomically."""
+    global _settings, _reload_requested
+    with _settings_lock:
+        _reload_requested = False
+        settings = Settings.from_env()
+        _settings = settings
+    auth = "Managed Identity" if settings.use_managed_identity else "API key"
+    logger.info(
+        f"⚙️ Settings loaded ({reason}, version={settings.version or '-'}): "
+        f"index={settings.search_index}, search auth={auth}, "
+        f"retrieval={settings.retrieval_backend} {dict(settings.route_profiles)}"
+    )
+    return settings
+
+
+def get_settings() -> Settings:
+    """Current settings; reloads when CONFIG_VERSION changed or SIGHUP was received."""
+    settings = _settings
+    if settings is None:
+        return reload_settings()
+    if _reload_requested:
+        return reload_settings("SIGHUP")
+    if os.environ.get("CONFIG_VERSION", "") != settings.version:
+        return reload_settings("CONFIG_VERSION changed")
+    return settings
+
+
+def _request_reload(signum, frame):
+    # Only flag it: taking the settings lock inside a signal handler could deadlock
+    global _reload_requested
+    _reload_requested = True
+
+
+def _install_reload_signal():
+    if not hasattr(signal, "SIGHUP"):
+        return
+    try:
+        signal.signal(signal.SIGHUP, _request_reload)
+    except ValueError:
+        # signal.signal only works from the main thread
+        logger.debug("SIGHUP reload not installed (not on the main thread)")
+
+
+_install_reload_signal()
@@ -0,0 +1,142 @@
+"""
+Lightweight per-request span tracing.
+Spans are collected per request (via a contextvar) into a timing breakdown,
+logged as one structured line, recorded in the metrics histograms, and
+mirrored to OpenTelemetry when installed.
+"""
+
+import json
+import time
+import logging
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+from metrics import REQUEST_LATENCY, REQUEST_TOKENS, observe_span
+
+logger = logging.getLogger(__name__)
+
+# Try to import OpenTelemetry, fall back to local spans only
+try:
+    from opentelemetry import trace as otel_trace
+    _tracer = otel_trace.get_tracer("rag-api")
+    HAS_OTEL = True
+except ImportError:
+    _tracer = None
+    HAS_OTEL = False
+
+# Prefix of the structured timing log line (see scripts/query_timing_logs.sh)
+TIMING_LOG_PREFIX = "TIMING "
+
+
+class Span:
+    """A timed stage of a request."""
+
+    __slots__ = ("name", "start", "end", "attributes")
+
+    def __init__(self, name: str, attributes: Optional[dict] = None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, route: str, record_metrics: bool = True):
+        self.route = route
+        self.record_metrics = record_metrics
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+        self.annotations: dict = {}
+
+    def annotate(self, **values):
+        """Attach request-level values (tokens, route, ...) to the timing log line."""
+        self.annotations.update(values)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def breakdown(self) -> dict:
+        """Stage name -> total milliseconds (repeated stages, e.g. tools, are summed)."""
+        stages: dict[str, float] = {}
+        for s in self.spans:
+            if s.end is not None:
+                stages[s.name] = stages.get(s.name, 0.0) + s.duration_ms
+        return {name: round(ms, 1) for name, ms in stages.items()}
+
+    def timing(self) -> dict:
+        """Timing block for API responses."""
+        return {
+            "total_ms": round(self.elapsed_ms()),
+            "stages": self.breakdown(),
+        }
+
+
+def _otel_span(name: str, attributes: dict):
+    """Matching OpenTelemetry span, or a no-op context when OTel is not installed."""
+    if HAS_OTEL:
+        return _tracer.start_as_current_span(name, attributes=attributes or None)
+    return nullcontext()
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(route: str, record_metrics: bool = True):
+    """
+    Collect spans for one request and log the breakdown when it ends.
+    record_metrics=False keeps background work (e.g. intent shadow runs) out of
+    the per-stage histograms; its end-to-end latency is still recorded under route.
+    """
+    trace = Trace(route, record_metrics)
+    token = _current_trace.set(trace)
+    try:
+        with _otel_span(f"http.{route}", {}):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        REQUEST_LATENCY.labels(route).observe(trace.elapsed_ms() / 1000)
+        if "total_tokens" in trace.annotations:
+            REQUEST_TOKENS.labels(route).observe(trace.annotations["total_tokens"])
+        logger.info(TIMING_LOG_PREFIX + json.dumps({
+            "route": route,
+            "total_ms": round(trace.elapsed_ms(), 1),
+            "stages": trace.breakdown(),
+            **trace.annotations,
+        }))
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a stage of the current request (no-op bookkeeping if there is no trace)."""
+    s = Span(name, attributes)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(s)
+
+    try:
+        with _otel_span(name, attributes):
+            yield s
+    finally:
+        s.end = time.perf_counter()
+        if trace is None or trace.record_metrics:
+            observe_span(name, s.end - s.start)
+
+
+def annotate(**values):
+    """Annotate the current request's trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotate(**values)
@@ -0,0 +1,134 @@
+"""
+Cold-start warm-up - builds clients, tokens and the agent kernel ahead of traffic.
+Runs from the Functions warmup trigger (Premium/Dedicated plans) or, with
+PREWARM_ON_START=true, in a background thread when the worker loads the app.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Start warming in the background as soon as the worker imports function_app
+PREWARM_ON_START = os.environ.get("PREWARM_ON_START", "false").lower() == "true"
+
+# Also import Semantic Kernel and build the agent kernel (the slowest step)
+PREWARM_AGENT = os.environ.get("PREWARM_AGENT", "true").lower() == "true"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# READINESS
+# ═══════════════════════════════════════════════════════════════════════════
+
+READINESS_COLD = "cold"
+READINESS_INITIALIZING = "initializing"
+READINESS_READY = "ready"
+READINESS_FAILED = "failed"
+
+
+class Readiness:
+    """
+    Initialization state of a component, readable without importing it
+    (so /health never pays for Semantic Kernel's import).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.state = READINESS_COLD
+        self.error: Optional[str] = None
+        self.init_seconds: Optional[float] = None
+        self._started_at: Optional[float] = None
+
+    def initializing(self):
+        with self._lock:
+            self.state = READINESS_INITIALIZING
+            self.error = None
+            self._started_at = time.perf_counter()
+
+    def ready(self):
+        with self._lock:
+            self.state = READINESS_READY
+            if self._started_at is not None:
+                self.init_seconds = round(time.perf_counter() - self._started_at, 3)
+
+    def failed(self, error: BaseException):
+        with self._lock:
+            self.state = READINESS_FAILED
+            self.error = str(error)[:200]
+
+    def reset(self):
+        with self._lock:
+            self.state = READINESS_COLD
+            self.error = None
+            self.init_seconds = None
+            self._started_at = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snap = {"state": self.state}
+            if self.init_seconds is not None:
+                snap["init_ms"] = round(self.init_seconds * 1000)
+            if self.error:
+                snap["error"] = self.error
+            return snap
+
+
+# Agent kernel/plugins (updated by AgentService)
+agent_readiness = Readiness("agent")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WARM-UP
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _warm_openai_pool():
+    from openai_pool import get_chat_pool
+    get_chat_pool().warm()
+
+
+def _warm_agent():
+    from agent import get_agent_service
+    get_agent_service().warm_up()
+
+
+def _warm_local_retrieval():
+    from local_retrieval import get_local_retriever
+    retriever = get_local_retriever()
+    # Fault in the coarse matrix pages (shared with other workers once resident)
+    retriever.search_vectors([[1.0] * retriever.snapshot.dims], 1)
+
+
+def prewarm() -> dict:
+    """Run each warm-up step once; returns step -> seconds (None if it failed)."""
+    from settings import get_settings
+
+    steps = [("openai_pool", _warm_openai_pool)]
+    if get_settings().retrieval_backend == "local":
+        steps.append(("local_retrieval", _warm_local_retrieval))
+    if PREWARM_AGENT:
+        steps.append(("agent", _warm_agent))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            timings[name] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            # Warm-up is best effort: the request path initializes lazily anyway
+            logger.warning(f"Warm-up step '{name}' failed: {e}")
+            timings[name] = None
+
+    logger.info(f"🔥 Warm-up finished: {timings}")
+    return timings
+
+
+def start_background_prewarm() -> threading.Thread:
+    """Warm up without blocking the worker's host handshake."""
+    thread = threading.Thread(target=prewarm, name="prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -50,7 +50,10 @@ try:
     print("=" * 70)
     print(f"  Total time:          {t['total_ms']:,}ms ({total_s:.2f}s)")
     print(f"  OpenAI + Search:     {t['openai_search_ms']:,}ms ({openai_pct:.1f}% of total)")
-    print(f"  Response processing: {t['processing_ms']:,}ms\n")
+    print(f"  Response processing: {t['processing_ms']:,}ms")
+    for stage, ms in t.get('stages', {}).items():
+        print(f"    · {stage:<18} {ms:,.1f}ms")
+    print()
 
     # Performance verdict
     if t['total_ms'] < 3000:
@@ -77,7 +80,7 @@ try:
     # Token-based recommendations
     if u['prompt_tokens'] > 6000:
         print("  💡 High prompt tokens detected!")
-        print("     → Consider reducing top_n_documents from 5 to 3")
+        print("     → Consider the 'fast' retrieval profile (top_n_documents 3)")
 
     # Citations
     citations = len(data['citations'])
@@ -106,18 +109,18 @@ try:
     if t['total_ms'] > 5000:
         print("  ⚠️  Response is slow (>5s). Try these optimizations:")
         print("")
-        print("  1. Reduce retrieved documents:")
-        print("     Edit api/function_app.py:")
-        print("     'top_n_documents': 3  # Changed from 5")
+        print("  1. Switch the retrieval profile (fewer documents, no semantic reranker):")
+        print("     Per request: {\"retrieval_profile\": \"fast\"}")
+        print("     Per route:   app setting RETRIEVAL_PROFILE_CHAT=fast")
         print("")
-        print("  2. Lower strictness:")
-        print("     'strictness': 2  # Changed from 3")
+        print("  2. Re-tune top_n_documents / strictness on the question set:")
+        print("     python scripts/eval_retrieval.py --sweep")
         print("")
         print("  3. Reduce max tokens:")
         print("     max_tokens=500  # Changed from 800")
     elif t['total_ms'] > 3000:
         print("  ✅ Performance is acceptable, but can be improved:")
-        print("     Consider reducing top_n_documents to 3 for faster responses")
+        print("     Consider the 'fast' retrieval profile (RETRIEVAL_PROFILE_CHAT=fast)")
     else:
         print("  🚀 Excellent performance! No optimization needed.")
 
@@ -126,7 +129,8 @@ try:
     print("=" * 70)
     print("  View Application Insights for detailed breakdown:")
     print("  → Portal: ai-rag-prod-3mktjtlolzx3q → Logs")
-    print("  → Query: traces | where message contains '⏱️'")
+    print("  → Query: traces | where message startswith 'TIMING '")
+    print("           | extend t = parse_json(substring(message, 7))")
     print("=" * 70 + "\n")
 
     # Cleanup
@@ -0,0 +1,158 @@
+"""
+Benchmark for reduced-dimension and quantized embeddings (EMBEDDING_DIMENSIONS,
+VECTOR_COMPRESSION).
+
+text-embedding-3 vectors are Matryoshka-trained: requesting `dimensions=N`
+returns the first N components of the full vector, renormalized. So one
+3072-dim corpus is enough to compare every size: each configuration
+truncates + renormalizes the stored vectors and queries, optionally
+quantizes them (int8 scalar or 1-bit binary, with oversampled float
+rescoring like the Search compression settings) and is scored against the
+exact 3072-dim ranking.
+
+Reports recall@k, brute-force latency per query and vector storage per
+chunk. The corpus is a local snapshot (scripts/export_snapshot.py) or a
+synthetic set; queries are perturbed copies of stored vectors, or real
+questions embedded at 3072 dims with --questions (needs AZURE_OPENAI_*).
+
+Usage:
+    python bench_embedding_dims.py [--snapshot=../api/snapshot] [--dims=3072,1024,256]
+                                   [--k=5] [--queries=200] [--oversampling=4]
+                                   [--questions=eval_questions.json] [--chunks=20000]
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from bench_local_retrieval import synthetic_corpus
+
+COMPRESSIONS = ("none", "scalar", "binary")
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def truncate(vectors: np.ndarray, dims: int) -> np.ndarray:
+    """Same result as asking the model for `dimensions=dims`."""
+    cut = np.ascontiguousarray(vectors[:, :dims], dtype=np.float32)
+    return cut / np.maximum(np.linalg.norm(cut, axis=1, keepdims=True), 1e-12)
+
+
+def quantize(vectors: np.ndarray, compression: str):
+    """(stored matrix, scale, bytes per vector) for one compression kind."""
+    dims = vectors.shape[1]
+    if compression == "scalar":
+        scale = np.abs(vectors).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(vectors / scale).astype(np.int8), scale, dims
+    if compression == "binary":
+        return np.packbits(vectors > 0, axis=1), None, (dims + 7) // 8
+    return vectors, None, dims * 4
+
+
+def search(corpus: np.ndarray, stored, scale, compression: str, query: np.ndarray,
+           k: int, oversampling: float) -> np.ndarray:
+    """Top-k rows for one query: quantized candidates, then float rescoring."""
+    if compression == "none":
+        scores = corpus @ query
+        return np.argpartition(-scores, k)[:k]
+
+    if compression == "scalar":
+        approx = stored.astype(np.float32) @ (query * scale)
+    else:
+        bits = np.packbits(query > 0)
+        # Hamming distance via popcount of XOR (lower = closer)
+        approx = -POPCOUNT[np.bitwise_xor(stored, bits)].sum(axis=1, dtype=np.int32)
+    candidates = np.argpartition(-approx, min(len(approx) - 1, int(k * oversampling)))[:int(k * oversampling)]
+    exact = corpus[candidates] @ query
+    return candidates[np.argpartition(-exact, k)[:k]]
+
+
+def load_queries(args: dict, full: np.ndarray, rng) -> np.ndarray:
+    if args["questions"]:
+        from openai_pool import get_chat_pool
+        from settings import get_settings
+
+        with open(args["questions"], encoding="utf-8") as f:
+            questions = [item["question"] for item in json.load(f)]
+        # Always full size: every configuration truncates from the same vectors
+        return np.asarray(get_chat_pool().embeddings(
+            questions, model=get_settings().embedding_deployment,
+        ), dtype=np.float32)
+
+    rows = rng.integers(0, len(full), args["queries"])
+    queries = full[rows].copy()
+    queries += 0.3 * rng.standard_normal(queries.shape, dtype=np.float32) * np.abs(queries).mean()
+    return queries
+
+
+def run(args: dict) -> int:
+    rng = np.random.default_rng(11)
+    if args["snapshot"]:
+        from local_retrieval import VectorSnapshot
+
+        snapshot = VectorSnapshot(args["snapshot"])
+        full = np.asarray(snapshot.vectors, dtype=np.float32)
+        source = "snapshot " + args["snapshot"]
+    else:
+        full = synthetic_corpus(args["chunks"], 3072)
+        source = "synthetic"
+
+    dims_list = [int(d) for d in args["dims"].split(",") if d]
+    if max(dims_list) > full.shape[1]:
+        print(f"❌ Corpus has {full.shape[1]} dims, cannot evaluate {max(dims_list)}")
+        return 1
+
+    k = args["k"]
+    queries = load_queries(args, full, rng)
+    reference = truncate(full, full.shape[1])
+    ref_queries = truncate(queries, full.shape[1])
+    truth = [set(np.argpartition(-(reference @ q), k)[:k]) for q in ref_queries]
+    del reference
+
+    print(f"\n📐 Embedding dims | {len(full)} chunks | {len(queries)} queries | "
+          f"recall@{k} vs exact {full.shape[1]} dims | {source}")
+    print(f"{'='*78}")
+    print(f"   {'dims':>6} {'compression':<12}{'recall@' + str(k):>10}{'ms/query':>10}"
+          f"{'bytes/vec':>11}{'index MB':>10}")
+
+    for dims in dims_list:
+        corpus = truncate(full, dims)
+        cut_queries = truncate(queries, dims)
+        for compression in COMPRESSIONS:
+            stored, scale, vector_bytes = quantize(corpus, compression)
+            start = time.perf_counter()
+            found = [search(corpus, stored, scale, compression, q, k, args["oversampling"]) for q in cut_queries]
+            per_query = (time.perf_counter() - start) / len(cut_queries) * 1000
+            recall = sum(len(truth[i] & set(rows)) for i, rows in enumerate(found)) / (len(found) * k)
+            size_mb = vector_bytes * len(corpus) / (1024 * 1024)
+            print(f"   {dims:>6} {compression:<12}{recall:>10.3f}{per_query:>10.2f}"
+                  f"{vector_bytes:>11}{size_mb:>10.1f}")
+
+    print(f"{'='*78}")
+    print("   Index MB counts the searchable vectors only; with rescoring the Search")
+    print("   index also keeps the float originals (preserveOriginals).")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(override=True)
+    except ImportError:
+        pass
+
+    args = {"snapshot": "", "dims": "3072,1024,256", "k": 5, "queries": 200,
+            "oversampling": 4.0, "questions": "", "chunks": 20000}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
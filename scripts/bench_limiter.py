@@ -0,0 +1,141 @@
+"""
+Simulation for the adaptive concurrency limiter (api/limiter.py).
+
+A fake upstream with a fixed capacity (a stand-in for the Azure OpenAI TPM
+quota) slows down as it fills and answers 429 past 1.5x capacity. A burst
+of requests arriving faster than it can serve, each with a deadline,
+calls it with retry on 429 - once unprotected (static host concurrency)
+and once through an AdaptiveLimiter that queues briefly and sheds the rest.
+
+Reports successes, 429s seen, timeouts, shed (fast 503) and latency of the
+successful requests, plus where the limit settled.
+
+Usage:
+    python bench_limiter.py [--rate=80] [--duration=5] [--capacity=16] [--latency=0.3]
+                            [--deadline=4] [--max-wait=1] [--rounds=2]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from limiter import AdaptiveLimiter, Overloaded
+
+
+class Throttled(Exception):
+    pass
+
+
+class FakeUpstream:
+    """Latency grows with load past capacity; 429 beyond 1.5x capacity."""
+
+    def __init__(self, capacity: int, latency: float):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def call(self):
+        with self._lock:
+            if self.in_flight >= self.capacity * 1.5:
+                self.throttled += 1
+                throttle = True
+            else:
+                self.in_flight += 1
+                throttle = False
+                load = self.in_flight
+        if throttle:
+            time.sleep(0.02)
+            raise Throttled()
+        try:
+            time.sleep(self.latency * max(1.0, load / self.capacity))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def classify(error: BaseException):
+    return "throttled" if isinstance(error, Throttled) else None
+
+
+def client(upstream: FakeUpstream, limiter, deadline: float) -> tuple[str, float]:
+    """One request: retry 429s until success or deadline (like the SDK's retries)."""
+    start = time.monotonic()
+    while time.monotonic() - start < deadline:
+        try:
+            if limiter is None:
+                upstream.call()
+            else:
+                with limiter.slot(classify):
+                    upstream.call()
+            elapsed = time.monotonic() - start
+            return ("ok" if elapsed <= deadline else "timeout"), elapsed
+        except Throttled:
+            time.sleep(0.1)
+        except Overloaded:
+            return "shed", time.monotonic() - start
+    return "timeout", time.monotonic() - start
+
+
+def run_once(args: dict, limiter) -> dict:
+    """Open-loop arrivals at --rate per second for --duration seconds."""
+    upstream = FakeUpstream(args["capacity"], args["latency"])
+    total = int(args["rate"] * args["duration"])
+    with ThreadPoolExecutor(min(total, int(args["rate"] * args["deadline"] * 2) + 1)) as pool:
+        start = time.monotonic()
+        futures = []
+        for i in range(total):
+            time.sleep(max(0.0, start + i / args["rate"] - time.monotonic()))
+            futures.append(pool.submit(client, upstream, limiter, args["deadline"]))
+        results = [f.result() for f in futures]
+    ok = sorted(t for r, t in results if r == "ok")
+    shed = [t for r, t in results if r == "shed"]
+    return {
+        "ok": len(ok),
+        "429": upstream.throttled,
+        "timeout": sum(1 for r, _ in results if r == "timeout"),
+        "shed": len(shed),
+        "p50": statistics.median(ok) if ok else 0.0,
+        "p95": ok[int(0.95 * (len(ok) - 1))] if ok else 0.0,
+        "shed_ms": statistics.median(shed) * 1000 if shed else 0.0,
+    }
+
+
+def run(args: dict) -> int:
+    print(f"\n🚦 Limiter simulation | {args['rate']:.0f} req/s for {args['duration']:.0f}s | "
+          f"capacity {args['capacity']} (~{args['capacity'] / args['latency']:.0f} req/s) | "
+          f"latency {args['latency']}s | deadline {args['deadline']}s")
+    print(f"{'='*84}")
+    print(f"   {'mode':<10}{'round':>6}{'ok':>6}{'429s':>7}{'timeout':>9}{'shed':>6}"
+          f"{'p50 s':>8}{'p95 s':>8}{'shed ms':>9}{'limit':>8}")
+
+    limiter = AdaptiveLimiter(name="bench", max_wait=args["max_wait"])
+    for mode in ("static", "adaptive"):
+        for i in range(args["rounds"]):
+            stats = run_once(args, limiter if mode == "adaptive" else None)
+            limit = f"{limiter.limit:.1f}" if mode == "adaptive" else "-"
+            print(f"   {mode:<10}{i + 1:>6}{stats['ok']:>6}{stats['429']:>7}{stats['timeout']:>9}{stats['shed']:>6}"
+                  f"{stats['p50']:>8.2f}{stats['p95']:>8.2f}{stats['shed_ms']:>9.0f}{limit:>8}")
+
+    print(f"{'='*84}")
+    print("   The adaptive limit carries over between rounds (it is learned per worker).")
+    return 0
+
+
+if __name__ == "__main__":
+    args = {"rate": 80.0, "duration": 5.0, "capacity": 16, "latency": 0.3, "deadline": 4.0,
+            "max_wait": 1.0, "rounds": 2}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
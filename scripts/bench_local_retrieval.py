@@ -0,0 +1,109 @@
+"""
+Benchmark for the local retrieval engine (api/local_retrieval.py).
+
+Measures per-query latency (batch 1 and batched) and recall@k against an
+exact float32 brute-force search, for the exact full-dimension scan
+(quantization none) and the float32 and int8 coarse shortlists.
+
+By default it builds a synthetic snapshot whose vectors concentrate energy
+in the leading dimensions, like text-embedding-3 (Matryoshka) embeddings.
+Pass --snapshot to measure a real export instead (queries are perturbed
+copies of stored vectors). Recall of the coarse stage depends on the data,
+so check the real snapshot before lowering --coarse-dims.
+
+Usage:
+    python bench_local_retrieval.py [--chunks=20000] [--dims=3072] [--coarse-dims=256]
+                                    [--k=5] [--queries=200] [--batch=8] [--snapshot=../api/snapshot]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from local_retrieval import QUANTIZATIONS, LocalRetriever, VectorSnapshot, write_snapshot
+
+
+def synthetic_corpus(chunks: int, dims: int, seed: int = 7) -> np.ndarray:
+    """Clustered vectors with decaying per-dimension scale (leading dims dominate)."""
+    rng = np.random.default_rng(seed)
+    scale = (1.0 / np.sqrt(1.0 + np.arange(dims) / 32.0)).astype(np.float32)
+    centers = rng.standard_normal((max(1, chunks // 50), dims), dtype=np.float32)
+    assignment = rng.integers(0, len(centers), chunks)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((chunks, dims), dtype=np.float32)
+    return vectors * scale
+
+
+def _timed(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(args: dict) -> int:
+    rng = np.random.default_rng(11)
+    tmp = None
+    if args["snapshot"]:
+        snapshot = VectorSnapshot(args["snapshot"])
+        source = "snapshot " + args["snapshot"]
+    else:
+        tmp = tempfile.mkdtemp(prefix="snapshot-bench-")
+        vectors = synthetic_corpus(args["chunks"], args["dims"])
+        docs = [{"id": f"doc-{i}", "title": f"paper{i % 40}.pdf", "source": f"paper{i % 40}.pdf",
+                 "chunk_id": i, "content": f"chunk {i}"} for i in range(len(vectors))]
+        write_snapshot(tmp, vectors, docs, coarse_dims=args["coarse_dims"])
+        snapshot = VectorSnapshot(tmp)
+        source = f"synthetic in {tmp}"
+
+    rows = rng.integers(0, snapshot.count, args["queries"])
+    queries = snapshot.vectors[rows].astype(np.float32)
+    queries += 0.3 * rng.standard_normal(queries.shape, dtype=np.float32) * np.abs(queries).mean()
+
+    # Exact ground truth
+    full = np.asarray(snapshot.vectors, dtype=np.float32)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(full @ q.T), axis=0)[:args["k"]].T
+    del full
+
+    k = args["k"]
+    size_mb = snapshot.count * snapshot.dims * 2 / (1024 * 1024)
+    print(f"\n📦 Local retrieval | {snapshot.count} chunks x {snapshot.dims} dims "
+          f"(coarse {snapshot.coarse_dims}) | {size_mb:.0f} MB float16 | {source}")
+    print(f"{'='*78}")
+    batch_label = f"batch {args['batch']} ms/q"
+    print(f"   {'quantization':<14}{'batch 1 ms':>12}{batch_label:>14}{f'recall@{k}':>11}")
+
+    for quantization in QUANTIZATIONS:
+        retriever = LocalRetriever(snapshot, quantization=quantization)
+        single = _timed(lambda: retriever.search_vectors(queries[:1], k), 20)
+        batch = args["batch"]
+        batched = _timed(lambda: retriever.search_vectors(queries[:batch], k), 5) / batch
+
+        found = retriever.search_vectors(queries, k)
+        hits = sum(len({row for row, _ in ranked} & set(truth[i])) for i, ranked in enumerate(found))
+        recall = hits / (len(queries) * k)
+        print(f"   {quantization:<14}{single:>12.2f}{batched:>14.2f}{recall:>11.3f}")
+
+    print(f"{'='*78}")
+    if tmp:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    args = {"chunks": 20000, "dims": 3072, "coarse_dims": 256, "k": 5, "queries": 200, "batch": 8, "snapshot": ""}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
@@ -0,0 +1,71 @@
+"""
+Deployment pool failover check against local Azure OpenAI stand-ins.
+
+Starts two fake deployments (one throttling heavily, one healthy), sends
+concurrent chat completions through api/openai_pool.py and reports how
+requests were spread and how many failed.
+
+Usage:
+    python bench_openai_pool.py [--requests=200] [--concurrency=16] [--throttle=0.5]
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from fake_upstreams import FakeAzureOpenAIServer, LatencyModel
+
+
+def run(requests: int, concurrency: int, throttle: float):
+    logging.basicConfig(level=logging.ERROR)
+    flaky = FakeAzureOpenAIServer(latency=LatencyModel(0.15, 0.05), throttle_rate=throttle, retry_after=1).start()
+    healthy = FakeAzureOpenAIServer(latency=LatencyModel(0.25, 0.05)).start()
+
+    os.environ["AZURE_OPENAI_API_KEY"] = "fake-key"
+    os.environ["AZURE_OPENAI_POOL"] = json.dumps([
+        {"name": "flaky", "endpoint": flaky.endpoint, "deployment": "gpt-4o", "weight": 2},
+        {"name": "healthy", "endpoint": healthy.endpoint, "deployment": "gpt-4o", "weight": 1},
+    ])
+
+    from openai_pool import get_chat_pool
+    pool = get_chat_pool()
+
+    def one(_):
+        try:
+            pool.chat_completion(messages=[{"role": "user", "content": "Who is Mert?"}], max_tokens=50)
+            return True
+        except Exception:
+            return False
+
+    print(f"\n🔁 {requests} requests | concurrency {concurrency} | flaky target throttles {throttle:.0%}")
+    print(f"{'='*60}")
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    elapsed = time.time() - start
+
+    print(f"   Succeeded:  {sum(results)}/{requests} in {elapsed:.1f}s ({requests / elapsed:.1f} req/s)")
+    print(f"   Flaky:      {flaky.status_counts}")
+    print(f"   Healthy:    {healthy.status_counts}")
+    for state in pool.state():
+        print(f"   {state['name']:8s} successes={state['successes']} failures={state['failures']} "
+              f"throttled={state['throttled']} healthy={state['healthy']}")
+
+    flaky.stop()
+    healthy.stop()
+
+
+if __name__ == "__main__":
+    args = {"requests": 200, "concurrency": 16, "throttle": 0.5}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    run(args["requests"], args["concurrency"], args["throttle"])
@@ -0,0 +1,101 @@
+"""
+Benchmark for chat request parsing (api/security.py).
+
+Compares the previous path (stdlib json on the whole body, then a separate
+walk that slices and sanitizes history character by character) with the
+current one (byte cap before parsing, orjson when installed, single-pass
+ChatRequestParser) on normal and adversarial payloads.
+
+Usage:
+    python bench_request_parsing.py [--repeat=200]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from security import HAS_ORJSON, MAX_REQUEST_BYTES, ChatRequestParser
+
+
+def legacy_validate(raw: bytes):
+    """The pre-cap implementation, kept here as the baseline."""
+    def sanitize(text, max_length):
+        text = text[:max_length]
+        return "".join(
+            char for char in text
+            if char == "\n" or char == "\t" or (ord(char) >= 32 and ord(char) != 127)
+        ).strip()
+
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        return "Invalid JSON body"
+    message = body.get("message", "")
+    if not message or not isinstance(message, str):
+        return "Message is required"
+    message = sanitize(message, 4000)
+    history = body.get("conversation_history", [])
+    if not isinstance(history, list):
+        return "Conversation history must be an array"
+    if len(history) > 20:
+        history = history[-20:]
+    sanitized = []
+    for msg in history:
+        if isinstance(msg, dict) and "role" in msg and "content" in msg:
+            if msg["role"] in ("user", "assistant"):
+                sanitized.append({"role": msg["role"], "content": sanitize(str(msg["content"]), 2000)})
+    return None
+
+
+def payloads() -> dict:
+    turn = {"role": "user", "content": "Mert'in son projesi hangi veri setini kullanıyor? " * 4}
+    return {
+        "normal": {"message": "Who is Mert?", "conversation_history": [turn] * 4},
+        "max history": {"message": "x" * 4000, "conversation_history": [{"role": "user", "content": "ğ" * 2000}] * 20},
+        "10k tiny turns": {"message": "hi", "conversation_history": [{}] * 10000},
+        "1 MB message": {"message": "a\x01" * 500_000},
+        "10 MB history": {"message": "hi", "conversation_history": [turn] * 40_000},
+    }
+
+
+def _timed(fn, raw: bytes, repeat: int) -> tuple[float, object]:
+    result = fn(raw)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(raw)
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def run(args: dict) -> int:
+    parser = ChatRequestParser()
+    print(f"\n🧾 Request parsing | byte cap {MAX_REQUEST_BYTES // 1024} KiB | "
+          f"decoder {'orjson' if HAS_ORJSON else 'json'} | repeat {args['repeat']}")
+    print(f"{'='*84}")
+    print(f"   {'payload':<16}{'bytes':>11}{'legacy µs':>12}{'current µs':>12}{'speedup':>9}  result")
+
+    for name, body in payloads().items():
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        repeat = args["repeat"] if len(raw) < 1_000_000 else max(1, args["repeat"] // 50)
+        legacy_us, _ = _timed(legacy_validate, raw, repeat)
+        current_us, (error, _) = _timed(parser.parse, raw, repeat)
+        print(f"   {name:<16}{len(raw):>11}{legacy_us:>12.1f}{current_us:>12.1f}"
+              f"{legacy_us / current_us:>8.1f}x  {error or 'ok'}")
+
+    print(f"{'='*84}")
+    print("   Oversized bodies are rejected by the admission check (413) before the handler runs.")
+    return 0
+
+
+if __name__ == "__main__":
+    args = {"repeat": 200}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
@@ -0,0 +1,89 @@
+"""
+Benchmark for the response layer (api/responses.py).
+
+Serializes a typical /api/chat payload (long answer, citations, timing
+breakdown) and an error body with the previous path (json.dumps per
+response) and the current one (orjson when installed, pre-encoded error
+bodies), then reports body size and encode time per Content-Encoding.
+
+Usage:
+    python bench_responses.py [--repeat=2000] [--citations=5]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from responses import (
+    HAS_BROTLI, HAS_ORJSON, RESPONSE_COMPRESS_MIN_BYTES, compress, dumps, error_body,
+)
+
+
+def chat_payload(citations: int) -> dict:
+    sentence = "Mert'in son projesi, açık kaynaklı veri setleri üzerinde retrieval kalitesini ölçüyor. "
+    return {
+        "answer": sentence * 40,
+        "citations": [
+            {"title": f"paper{i}.pdf", "filepath": f"papers/paper{i}.pdf", "url": "",
+             "content": ("Retrieval-augmented generation grounds answers in indexed chunks. " * 5)[:300]}
+            for i in range(citations)
+        ],
+        "retrieval_profile": "balanced",
+        "usage": {"prompt_tokens": 2410, "completion_tokens": 612, "total_tokens": 3022},
+        "timing": {"total_ms": 2314, "openai_search_ms": 2190, "processing_ms": 3,
+                   "stages": {"admission": 0.4, "upstream.openai": 2190.2, "citations": 2.8}},
+    }
+
+
+def _timed(fn, repeat: int) -> tuple[float, object]:
+    result = fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def run(args: dict) -> int:
+    repeat = args["repeat"]
+    payload = chat_payload(args["citations"])
+
+    print(f"\n📦 Response layer | encoder {'orjson' if HAS_ORJSON else 'json'} | "
+          f"brotli {'yes' if HAS_BROTLI else 'not installed'} | repeat {repeat}")
+    print(f"{'='*72}")
+
+    legacy_us, legacy = _timed(lambda: json.dumps(payload).encode("utf-8"), repeat)
+    current_us, body = _timed(lambda: dumps(payload), repeat)
+    print(f"   chat payload     json.dumps {legacy_us:>7.1f} µs ({len(legacy)} B) | "
+          f"current {current_us:>6.1f} µs ({len(body)} B) | {legacy_us / current_us:.1f}x")
+
+    message = "An error occurred processing your request"
+    legacy_us, _ = _timed(lambda: json.dumps({"error": message}).encode("utf-8"), repeat)
+    current_us, _ = _timed(lambda: error_body(message), repeat)
+    print(f"   error body       json.dumps {legacy_us:>7.1f} µs | pre-encoded {current_us:>6.2f} µs")
+
+    print(f"   {'encoding':<10}{'bytes':>10}{'ratio':>9}{'encode µs':>12}")
+    print(f"   {'identity':<10}{len(body):>10}{1.0:>9.2f}{0.0:>12.1f}")
+    for encoding in ("gzip", "br") if HAS_BROTLI else ("gzip",):
+        encode_us, wire = _timed(lambda: compress(body, encoding), max(1, repeat // 10))
+        print(f"   {encoding:<10}{len(wire):>10}{len(body) / len(wire):>9.2f}{encode_us:>12.1f}")
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+    print(f"{'='*72}")
+    print(f"   Bodies under {RESPONSE_COMPRESS_MIN_BYTES} B and error bodies are sent uncompressed.")
+    return 0
+
+
+if __name__ == "__main__":
+    args = {"repeat": 2000, "citations": 5}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
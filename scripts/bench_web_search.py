@@ -0,0 +1,53 @@
+"""
+WebSearchPlugin cache/coalescing benchmark against a fake Tavily client.
+
+Usage:
+    python bench_web_search.py [--users=20] [--latency=0.8] [--rounds=3]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from fake_upstreams import FakeTavilyClient, LatencyModel
+from agent.plugins.web_search_plugin import WebSearchPlugin
+
+
+def run(users: int, latency: float, rounds: int):
+    client = FakeTavilyClient(latency=LatencyModel(base=latency, jitter=latency * 0.1))
+    plugin = WebSearchPlugin(client=client)
+
+    # Same trending topic, slightly different spelling per user
+    queries = ["Latest AI news", "latest ai news?", "  LATEST AI   news "]
+
+    print(f"\n🌐 {users} concurrent users x {rounds} rounds | upstream latency ~{latency * 1000:.0f}ms")
+    print(f"{'='*60}")
+
+    for round_no in range(1, rounds + 1):
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            list(executor.map(lambda i: plugin.search_web(queries[i % len(queries)]), range(users)))
+        elapsed = time.time() - start
+        print(f"   Round {round_no}: {elapsed * 1000:7.0f}ms wall | Tavily calls so far: {client.calls}")
+
+    stats = plugin.cache_stats()
+    total = users * rounds
+    print(f"{'='*60}")
+    print(f"   Requests:          {total}")
+    print(f"   Outbound calls:    {client.calls} (without cache: {total})")
+    print(f"   Cache hits:        {stats['cache_hits']}")
+    print(f"   Coalesced waiters: {stats['coalesced']}")
+
+
+if __name__ == "__main__":
+    args = {"users": 20, "latency": 0.8, "rounds": 3}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    run(args["users"], args["latency"], args["rounds"])
@@ -0,0 +1,93 @@
+"""
+Concurrency check for AgentService initialization.
+
+Releases many threads at once against a cold worker (get_agent_service() +
+warm_up()) with a deliberately slow kernel build, then verifies that exactly
+one AgentService and one kernel were constructed and that readiness went
+cold -> initializing -> ready. Exits non-zero on any duplicate construction.
+
+Usage:
+    python check_agent_init.py [--threads=64] [--build-delay=0.5] [--rounds=3]
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://fake.openai.azure.com")
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "fake-key")
+
+import agent.agent_service as agent_service
+from warmup import agent_readiness
+
+
+def run_round(threads: int, build_delay: float) -> bool:
+    agent_service.reset_agent_service()
+    real_create_kernel = agent_service.create_kernel
+    kernels_built = []
+    states_seen = set()
+
+    def slow_create_kernel():
+        states_seen.add(agent_readiness.state)
+        time.sleep(build_delay)
+        kernel = real_create_kernel()
+        kernels_built.append(kernel)
+        return kernel
+
+    agent_service.create_kernel = slow_create_kernel
+    barrier = threading.Barrier(threads)
+    services = []
+    errors = []
+
+    def worker():
+        try:
+            barrier.wait()
+            service = agent_service.get_agent_service()
+            service.warm_up()
+            services.append(service)
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        start = time.perf_counter()
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        agent_service.create_kernel = real_create_kernel
+
+    distinct_services = len({id(s) for s in services})
+    ok = (
+        not errors
+        and distinct_services == 1
+        and len(kernels_built) == 1
+        and agent_readiness.state == "ready"
+        and "initializing" in states_seen
+    )
+    print(f"   {threads} threads | services: {distinct_services} | kernels built: {len(kernels_built)} | "
+          f"readiness: {agent_readiness.snapshot()} | errors: {len(errors)} | {elapsed * 1000:.0f}ms "
+          f"{'✅' if ok else '❌'}")
+    return ok
+
+
+if __name__ == "__main__":
+    args = {"threads": 64, "build_delay": 0.5, "rounds": 3}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    logging.basicConfig(level=logging.ERROR)
+    print(f"\n🔒 AgentService single-flight initialization ({args['rounds']} rounds)")
+    print(f"{'='*60}")
+    results = [run_round(args["threads"], args["build_delay"]) for _ in range(args["rounds"])]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,186 @@
+"""
+Equivalence check for DateTimePlugin's switch from pytz to stdlib zoneinfo.
+
+Runs get_current_time, calculate_date and days_until of the current plugin
+(api/agent/plugins/datetime_plugin.py) and of the previous pytz
+implementation (kept here as the baseline) with the clock frozen at a set
+of instants: both sides of DST transitions in the northern and southern
+hemisphere, half-hour and 45-minute offsets, year ends and a leap day.
+Timezone names include canonical, legacy-alias, lower-case, unknown and
+malformed names. Exits non-zero on any difference.
+
+Needs pytz for the baseline (pip install pytz).
+
+Usage:
+    python check_datetime_plugin.py [--verbose=0]
+"""
+
+import logging
+import os
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import agent.plugins.datetime_plugin as datetime_plugin
+
+# UTC instants around transitions (the frozen "now")
+INSTANTS = [
+    "2025-03-30T00:59:59", "2025-03-30T01:00:00",  # EU spring forward
+    "2025-10-26T00:59:59", "2025-10-26T01:00:00",  # EU fall back
+    "2025-03-09T06:59:59", "2025-03-09T07:00:00",  # US spring forward (New York)
+    "2025-11-02T05:59:59", "2025-11-02T06:00:00",  # US fall back (New York)
+    "2025-04-05T15:59:59", "2025-04-05T16:00:00",  # Sydney fall back
+    "2025-10-04T15:59:59", "2025-10-04T16:00:00",  # Sydney spring forward
+    "2025-04-05T14:59:59", "2025-04-05T15:00:00",  # Lord Howe (30 min DST)
+    "2024-12-31T20:59:59", "2024-12-31T21:00:00",  # New year in Istanbul
+    "2024-02-29T12:00:00", "2025-12-31T23:59:59",  # leap day, year end in UTC
+]
+
+TIMEZONES = [
+    None, "", "UTC", "Europe/Istanbul", "America/New_York", "Europe/London",
+    "Australia/Sydney", "Australia/Lord_Howe", "Asia/Kolkata", "Asia/Kathmandu",
+    "Pacific/Chatham", "America/St_Johns", "Pacific/Kiritimati", "Etc/GMT+12",
+    "US/Eastern", "Turkey", "europe/istanbul", "AMERICA/NEW_YORK", "utc",
+    "Mars/Olympus", "Not a zone", "Europe/../Istanbul", "../etc/passwd", "İstanbul",
+]
+
+DAY_OFFSETS = [0, 1, -1, 7, 8, -14, 30, 365, -400]
+TARGET_DATES = ["2025-03-30", "2025-10-26", "2025-12-25", "2024-02-29", "2023-02-29", "25-12-2025", "soon"]
+
+
+class FrozenDatetime(datetime):
+    """datetime whose now() returns a fixed UTC instant in the requested zone."""
+
+    instant = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.instant.astimezone(tz) if tz is not None else cls.instant.replace(tzinfo=None)
+
+
+class LegacyPytzPlugin:
+    """The pytz-based DateTimePlugin before the zoneinfo switch."""
+
+    DEFAULT_TIMEZONE = "Europe/Istanbul"
+
+    def _get_timezone(self, timezone_name=None):
+        tz_name = timezone_name or self.DEFAULT_TIMEZONE
+        try:
+            return pytz.timezone(tz_name)
+        except pytz.exceptions.UnknownTimeZoneError:
+            return pytz.UTC
+
+    def get_current_time(self, timezone=None):
+        try:
+            tz = self._get_timezone(timezone)
+            now = FrozenDatetime.now(tz)
+            return f"""**Current Date & Time:**
+- Date: {now.strftime('%A, %B %d, %Y')}
+- Time: {now.strftime('%I:%M %p')} ({now.strftime('%H:%M')})
+- Timezone: {tz.zone}
+- Week: {now.strftime('%W')} of {now.year}
+- Day of Year: {now.strftime('%j')}"""
+        except Exception as e:
+            return f"Error getting current time: {str(e)}"
+
+    def calculate_date(self, days, timezone=None):
+        try:
+            tz = self._get_timezone(timezone)
+            now = FrozenDatetime.now(tz)
+            target = now + timedelta(days=days)
+            if days > 0:
+                direction, verb = "from now", "will be"
+            elif days < 0:
+                direction, verb = "ago", "was"
+            else:
+                direction, verb = "(today)", "is"
+            abs_days = abs(days)
+            weeks = abs_days // 7
+            remaining_days = abs_days % 7
+            if weeks > 0 and remaining_days > 0:
+                duration = f"{weeks} week{'s' if weeks > 1 else ''} and {remaining_days} day{'s' if remaining_days > 1 else ''}"
+            elif weeks > 0:
+                duration = f"{weeks} week{'s' if weeks > 1 else ''}"
+            else:
+                duration = f"{abs_days} day{'s' if abs_days > 1 else ''}"
+            return f"""**Date Calculation:**
+- Today: {now.strftime('%A, %B %d, %Y')}
+- {duration} {direction} {verb}: **{target.strftime('%A, %B %d, %Y')}**
+- Days difference: {days:+d} days"""
+        except Exception as e:
+            return f"Error calculating date: {str(e)}"
+
+    def days_until(self, target_date, timezone=None):
+        try:
+            tz = self._get_timezone(timezone)
+            now = FrozenDatetime.now(tz)
+            target = tz.localize(datetime.strptime(target_date, "%Y-%m-%d"))
+            days = (target.date() - now.date()).days
+            if days > 0:
+                status = f"**{days} days** remaining"
+            elif days < 0:
+                status = f"**{abs(days)} days** ago (already passed)"
+            else:
+                status = "**Today!**"
+            return f"""**Days Until {target.strftime('%B %d, %Y')}:**
+- Today: {now.strftime('%A, %B %d, %Y')}
+- Target: {target.strftime('%A, %B %d, %Y')}
+- Status: {status}"""
+        except ValueError:
+            return f"Invalid date format. Please use YYYY-MM-DD format (e.g., '2025-12-25')"
+        except Exception as e:
+            return f"Error calculating days: {str(e)}"
+
+
+def cases():
+    for tz in TIMEZONES:
+        yield "get_current_time", (), tz
+        for days in DAY_OFFSETS:
+            yield "calculate_date", (days,), tz
+        for target in TARGET_DATES:
+            yield "days_until", (target,), tz
+
+
+def run(args: dict) -> int:
+    logging.getLogger(datetime_plugin.__name__).setLevel(logging.ERROR)
+    datetime_plugin.datetime = FrozenDatetime
+    current, legacy = datetime_plugin.DateTimePlugin(), LegacyPytzPlugin()
+
+    checked = mismatches = 0
+    for instant in INSTANTS:
+        FrozenDatetime.instant = datetime.fromisoformat(instant).replace(tzinfo=dt_timezone.utc)
+        for method, call_args, tz in cases():
+            expected = getattr(legacy, method)(*call_args, timezone=tz)
+            actual = getattr(current, method)(*call_args, timezone=tz)
+            checked += 1
+            if actual != expected:
+                mismatches += 1
+                if mismatches <= 10 or args["verbose"]:
+                    print(f"❌ {instant}Z {method}{call_args} timezone={tz!r}")
+                    print(f"   pytz:     {expected!r}")
+                    print(f"   zoneinfo: {actual!r}")
+
+    print(f"\n🕒 DateTimePlugin zoneinfo vs pytz {pytz.__version__} | {len(INSTANTS)} instants x "
+          f"{len(TIMEZONES)} timezone names | {checked} outputs compared")
+    print(f"{'='*78}")
+    print(f"   {'✅ identical' if not mismatches else f'❌ {mismatches} differences'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    try:
+        import pytz
+    except ImportError:
+        print("❌ pytz is needed for the baseline: pip install pytz")
+        sys.exit(1)
+
+    args = {"verbose": 0}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
@@ -0,0 +1,134 @@
+"""
+Interrupt/resume check for the indexing journal (index_documents.py --resume).
+
+Runs index_files() against in-memory fakes for the embedding and Search
+clients. The embedding client "crashes" (raises on every call) after N
+embeddings, which interrupts the run. The run is then resumed. Scenarios:
+
+  crash   fresh index, interrupted run, then --resume
+  force   populated index, interrupted --force run, then --resume (no --force):
+          the unfinished files are already in the index but must still be finished
+
+Each resume must re-embed only the chunks the journal did not keep, upload
+every chunk, and complete (delete) the journal. Exits non-zero on failure.
+
+Usage:
+    python check_index_resume.py [--files=3] [--chunks=4] [--crash-after=5]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import types
+
+import index_documents as ix
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+        self.crash_after = 0
+
+    def create(self, input, model, **kwargs):
+        if self.crash_after and self.calls >= self.crash_after:
+            raise RuntimeError("simulated crash (quota exhausted)")
+        self.calls += 1
+        return types.SimpleNamespace(data=[types.SimpleNamespace(embedding=[0.1, 0.2, 0.3])])
+
+
+class FakeSearch:
+    def __init__(self):
+        self.store = {}
+
+    def search(self, search_text, select, top=None):
+        return [{"id": k, "source": v["source"], "content": v["content"]} for k, v in self.store.items()]
+
+    def upload_documents(self, documents):
+        for doc in documents:
+            self.store[doc["id"]] = doc
+        return [types.SimpleNamespace(key=doc["id"], succeeded=True) for doc in documents]
+
+
+def paragraph_chunks(text, page_boundaries):
+    """One chunk per paragraph (keeps the chunk count predictable)."""
+    paragraphs = [p for p in text.split("\n\n") if p.strip()]
+    return [{"content": p, "chunk_id": i + 1, "page_num": 1, "token_count": len(p) // 4}
+            for i, p in enumerate(paragraphs)]
+
+
+def write_corpus(folder: str, files: int, chunks: int):
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(5000)]
+    for f in range(files):
+        with open(os.path.join(folder, f"doc{f}.txt"), "w", encoding="utf-8") as out:
+            out.write("\n\n".join(" ".join(rng.choice(words) for _ in range(60)) for _ in range(chunks)))
+
+
+def run_index(folder: str, embeddings: FakeEmbeddings, search: FakeSearch, **kwargs) -> int:
+    """index_files() with output captured; returns the embedding calls it made."""
+    before = embeddings.calls
+    with contextlib.redirect_stdout(io.StringIO()):
+        ix.index_files(folder, **kwargs)
+    return embeddings.calls - before
+
+
+def scenario(name: str, args: dict, populate: bool, force: bool) -> bool:
+    total = args["files"] * args["chunks"]
+    with tempfile.TemporaryDirectory(prefix="index-resume-") as tmp:
+        folder = os.path.join(tmp, "data")
+        os.makedirs(folder)
+        write_corpus(folder, args["files"], args["chunks"])
+        ix.INDEX_JOURNAL_PATH = os.path.join(tmp, "journal", "journal.jsonl")
+
+        embeddings, search = FakeEmbeddings(), FakeSearch()
+        ix.init_clients = lambda: (None, types.SimpleNamespace(embeddings=embeddings), search)
+
+        if populate:
+            run_index(folder, embeddings, search)
+
+        embeddings.crash_after = embeddings.calls + args["crash_after"]
+        interrupted = run_index(folder, embeddings, search, force_reindex=force)
+        journal_left = os.path.exists(ix.INDEX_JOURNAL_PATH)
+
+        embeddings.crash_after = 0
+        resumed = run_index(folder, embeddings, search, resume=True)
+        journal_done = not os.path.exists(ix.INDEX_JOURNAL_PATH)
+
+    expected = total - args["crash_after"]
+    ok = journal_left and journal_done and resumed == expected and len(search.store) == total
+    print(f"   {'✅' if ok else '❌'} {name:<6} interrupted after {interrupted} embeddings | "
+          f"resume embedded {resumed} (expected {expected}) | "
+          f"{len(search.store)}/{total} chunks in index | journal "
+          f"{'completed' if journal_done else 'left behind'}")
+    return ok
+
+
+def run(args: dict) -> int:
+    # No real chunker / rate-limit pauses needed for the check
+    ix.create_semantic_chunks = paragraph_chunks
+    ix.time.sleep = lambda seconds: None
+
+    print(f"\n♻️  Index resume check | {args['files']} files x {args['chunks']} chunks | "
+          f"crash after {args['crash_after']} embeddings")
+    print(f"{'='*78}")
+    results = [
+        scenario("crash", args, populate=False, force=False),
+        scenario("force", args, populate=True, force=True),
+    ]
+    print(f"{'='*78}")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    args = {"files": 3, "chunks": 4, "crash_after": 5}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
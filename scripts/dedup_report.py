@@ -0,0 +1,152 @@
+"""
+Savings report for near-duplicate elimination (api/dedup.py).
+
+Indexing: runs every chunk of a snapshot through the MinHash filter the
+indexer uses and reports how many chunks (and embedding tokens) would not
+have been embedded.
+
+Retrieval: for a set of queries, compares the plain top_n chunks with the
+MMR-diversified top_n the local backend returns, reporting redundancy (mean
+pairwise cosine), dropped repeats and prompt tokens.
+
+Usage:
+    python dedup_report.py --snapshot=../api/snapshot [--threshold=0.85] [--top-n=5]
+                           [--queries=200] [--lambda=0.7] [--duplicate-cosine=0.95]
+    python dedup_report.py [...]   # synthetic corpus with duplicated "versions"
+
+Token counts are estimated as characters / 4.
+"""
+
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from dedup import NearDuplicateIndex
+from local_retrieval import LocalRetriever, VectorSnapshot, write_snapshot
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def synthetic_snapshot(path: str, papers: int = 40, chunks_per_paper: int = 30, dims: int = 256) -> None:
+    """Papers whose chunks partly reappear in a second, lightly edited version."""
+    rng = np.random.default_rng(5)
+    words = [f"w{i}" for i in range(3000)]
+    pick = random.Random(5)
+    vectors, docs = [], []
+    for p in range(papers):
+        center = rng.standard_normal(dims, dtype=np.float32)
+        for c in range(chunks_per_paper):
+            text = " ".join(pick.choice(words) for _ in range(180))
+            vector = center + 0.8 * rng.standard_normal(dims, dtype=np.float32)
+            vectors.append(vector)
+            docs.append({"id": f"p{p}-c{c}", "title": f"paper{p}.pdf", "source": f"paper{p}.pdf",
+                         "chunk_id": c, "content": text})
+            if p % 4 == 0:
+                # Version 2 of every 4th paper: same chunk with a few words changed
+                tokens = text.split()
+                for i in pick.sample(range(len(tokens)), 2):
+                    tokens[i] = pick.choice(words)
+                vectors.append(vector + 0.05 * rng.standard_normal(dims, dtype=np.float32))
+                docs.append({"id": f"p{p}v2-c{c}", "title": f"paper{p}_v2.pdf", "source": f"paper{p}_v2.pdf",
+                             "chunk_id": c, "content": " ".join(tokens)})
+    write_snapshot(path, np.asarray(vectors), docs, coarse_dims=64)
+
+
+def redundancy(vectors: np.ndarray, duplicate_cosine: float) -> tuple[float, list]:
+    """Mean pairwise cosine, and which chunks repeat an earlier one."""
+    if len(vectors) < 2:
+        return 0.0, [False] * len(vectors)
+    sims = vectors @ vectors.T
+    repeats = [bool(i and sims[i, :i].max() >= duplicate_cosine) for i in range(len(vectors))]
+    return float(sims[np.triu_indices(len(vectors), 1)].mean()), repeats
+
+
+def run(args: dict) -> int:
+    tmp = None
+    if args["snapshot"]:
+        path = args["snapshot"]
+    else:
+        tmp = path = tempfile.mkdtemp(prefix="dedup-report-")
+        synthetic_snapshot(path)
+    snapshot = VectorSnapshot(path)
+    retriever = LocalRetriever(snapshot)
+
+    # ── Indexing: chunks the MinHash filter would skip ──
+    index = NearDuplicateIndex(threshold=args["threshold"])
+    start = time.perf_counter()
+    total_tokens = skipped_tokens = 0
+    for row in range(snapshot.count):
+        doc = snapshot.doc(row)
+        tokens = estimate_tokens(doc.get("content", ""))
+        total_tokens += tokens
+        if index.add(doc["id"], doc.get("content", "")) is not None:
+            skipped_tokens += tokens
+    elapsed = time.perf_counter() - start
+
+    print(f"\n🧬 Near-duplicate report | {snapshot.count} chunks | {'snapshot ' + path if not tmp else 'synthetic'}")
+    print(f"{'='*78}")
+    print(f"   Indexing (MinHash, Jaccard >= {args['threshold']})")
+    print(f"      skipped chunks : {index.duplicates}/{index.checked} ({100 * index.duplicates / max(1, index.checked):.1f}%)")
+    print(f"      embed tokens   : {skipped_tokens}/{total_tokens} saved ({100 * skipped_tokens / max(1, total_tokens):.1f}%)")
+    print(f"      filter cost    : {elapsed / max(1, snapshot.count) * 1000:.2f} ms/chunk")
+
+    # ── Retrieval: plain top_n vs MMR ──
+    rng = np.random.default_rng(3)
+    top_n = args["top_n"]
+    candidates = max(top_n * 4, 20)
+    rows = rng.integers(0, snapshot.count, args["queries"])
+    queries = snapshot.vectors[rows].astype(np.float32)
+    queries += 0.5 * rng.standard_normal(queries.shape, dtype=np.float32) * np.abs(queries).mean()
+
+    stats = {name: {"cosine": [], "tokens": [], "repeats": [], "repeat_tokens": []} for name in ("plain", "mmr")}
+    mmr_ms = []
+    for ranked in retriever.search_vectors(queries, candidates):
+        start = time.perf_counter()
+        chosen = retriever.diversify(ranked, top_n, args["lambda"], args["duplicate_cosine"])
+        mmr_ms.append((time.perf_counter() - start) * 1000)
+        for name, pairs in (("plain", ranked[:top_n]), ("mmr", chosen)):
+            tokens = [estimate_tokens(hit.content) for hit in retriever.hits(pairs)]
+            vectors = snapshot.vectors[[row for row, _ in pairs]].astype(np.float32)
+            cosine, repeats = redundancy(vectors, args["duplicate_cosine"])
+            stats[name]["cosine"].append(cosine)
+            stats[name]["tokens"].append(sum(tokens))
+            stats[name]["repeats"].append(sum(repeats))
+            stats[name]["repeat_tokens"].append(sum(t for t, r in zip(tokens, repeats) if r))
+
+    print(f"   Retrieval (top_n={top_n} of {candidates}, lambda={args['lambda']}, "
+          f"duplicate cosine >= {args['duplicate_cosine']})")
+    print(f"      {'':<16}{'plain':>10}{'mmr':>10}")
+    for label, key, fmt in (("mean pair cos", "cosine", ".3f"), ("repeated chunks", "repeats", ".2f"),
+                            ("prompt tokens", "tokens", ".0f"), ("  of which rep.", "repeat_tokens", ".0f")):
+        plain, mmr = statistics.mean(stats["plain"][key]), statistics.mean(stats["mmr"][key])
+        print(f"      {label:<16}{plain:>10{fmt}}{mmr:>10{fmt}}")
+    print(f"      MMR cost {statistics.median(mmr_ms):.2f} ms/query (per-query means; repeated = cosine "
+          f">= {args['duplicate_cosine']} to an earlier chunk)")
+    print(f"{'='*78}")
+
+    if tmp:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    args = {"snapshot": "", "threshold": 0.85, "top_n": 5, "queries": 200,
+            "lambda": 0.7, "duplicate_cosine": 0.95}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args))
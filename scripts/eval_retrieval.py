@@ -0,0 +1,222 @@
+"""
+Offline evaluation of retrieval profiles (top_n_documents / strictness / query type).
+
+Runs every question in a stored set through the same RAG call as /api/chat
+for each configuration and reports latency, prompt tokens, citations and
+answer overlap. Overlap is token F1 against the question's "reference"
+answer, or against the reference configuration's answer when none is stored.
+
+Configurations are the named profiles from api/settings.py, plus (with
+--sweep) a top_n x strictness grid on the balanced query type.
+
+Usage:
+    python eval_retrieval.py [--questions=eval_questions.json] [--profiles=fast,balanced,thorough]
+                             [--sweep] [--top-n=3,5,10] [--strictness=2,3,4]
+                             [--reference=thorough] [--repeat=1] [--min-overlap=0.8]
+                             [--json=eval_results.json]
+    python eval_retrieval.py --fake [...]   # dry run against fake_upstreams (no quota)
+
+Uses the API's environment (AZURE_OPENAI_*, AZURE_SEARCH_*), e.g. exported
+from local.settings.json.
+"""
+
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+DOC_MARKER = re.compile(r"\[doc\d+\]")
+
+
+def tokens(text: str) -> list:
+    return TOKEN.findall(DOC_MARKER.sub(" ", (text or "").lower()))
+
+
+def overlap(answer: str, reference: str) -> float:
+    """Token-level F1 between two answers (SQuAD style)."""
+    a, b = tokens(answer), tokens(reference)
+    if not a or not b:
+        return 0.0
+    counts = {}
+    for t in b:
+        counts[t] = counts.get(t, 0) + 1
+    common = 0
+    for t in a:
+        if counts.get(t, 0) > 0:
+            counts[t] -= 1
+            common += 1
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(a), common / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def configurations(args: dict) -> dict:
+    """Name -> RetrievalProfile for every configuration to evaluate."""
+    from settings import RETRIEVAL_PROFILES, RetrievalProfile
+
+    configs = {}
+    for name in args["profiles"].split(","):
+        if name:
+            configs[name] = RETRIEVAL_PROFILES[name]
+    if args["sweep"]:
+        for top_n in (int(v) for v in args["top_n"].split(",") if v):
+            for strictness in (int(v) for v in args["strictness"].split(",") if v):
+                name = f"top{top_n}-s{strictness}"
+                configs[name] = RetrievalProfile(name, top_n_documents=top_n, strictness=strictness)
+    return configs
+
+
+def ask(question: str, data_source: dict) -> dict:
+    """One /chat-equivalent RAG call; returns latency, tokens, citations and answer."""
+    from function_app import RAG_SYSTEM_PROMPT
+    from openai_pool import get_chat_pool
+
+    start = time.perf_counter()
+    response = get_chat_pool().chat_completion(
+        messages=[
+            {"role": "system", "content": RAG_SYSTEM_PROMPT},
+            {"role": "user", "content": question},
+        ],
+        max_tokens=800,
+        temperature=0.0,
+        extra_body={"data_sources": [data_source]},
+    )
+    latency_ms = (time.perf_counter() - start) * 1000
+    message = response.choices[0].message
+    context = getattr(message, "context", None) or {}
+    return {
+        "latency_ms": latency_ms,
+        "prompt_tokens": response.usage.prompt_tokens,
+        "citations": len(context.get("citations", [])),
+        "answer": message.content or "",
+    }
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(args: dict) -> int:
+    logging.basicConfig(level=logging.ERROR)
+    fake = None
+    if args["fake"]:
+        from fake_upstreams import FakeAzureOpenAIServer, LatencyModel
+
+        fake = FakeAzureOpenAIServer(latency=LatencyModel(0.05, 0.01), search_latency=LatencyModel(0.05, 0.01)).start()
+        os.environ.update({
+            "AZURE_OPENAI_ENDPOINT": fake.endpoint,
+            "AZURE_OPENAI_API_KEY": "fake-key",
+            "AZURE_SEARCH_ENDPOINT": "https://fake-search.search.windows.net",
+            "AZURE_SEARCH_KEY": "fake-key",
+        })
+
+    from settings import get_settings
+
+    with open(args["questions"], encoding="utf-8") as f:
+        questions = json.load(f)
+    configs = configurations(args)
+    if args["reference"] not in configs:
+        print(f"❌ Reference configuration '{args['reference']}' is not being evaluated")
+        return 1
+
+    settings = get_settings()
+    print(f"\n🔬 Retrieval evaluation | {len(questions)} questions x {len(configs)} configurations"
+          f" x {args['repeat']} | index {settings.search_index}")
+    print(f"{'='*96}")
+
+    # Reference first so the others can be scored against its answers
+    order = [args["reference"]] + [name for name in configs if name != args["reference"]]
+    answers = {}
+    results = []
+    for name in order:
+        profile = configs[name]
+        data_source = settings.build_data_source(profile)
+        samples = []
+        for i, item in enumerate(questions):
+            for _ in range(args["repeat"]):
+                try:
+                    sample = ask(item["question"], data_source)
+                except Exception as e:
+                    print(f"   ⚠️ {name} | q{i + 1}: {type(e).__name__}: {e}")
+                    continue
+                if name == args["reference"]:
+                    answers.setdefault(i, sample["answer"])
+                reference = item.get("reference") or answers.get(i, "")
+                sample["overlap"] = overlap(sample["answer"], reference)
+                samples.append(sample)
+
+        if not samples:
+            continue
+        latencies = [s["latency_ms"] for s in samples]
+        results.append({
+            "config": name,
+            "top_n_documents": profile.top_n_documents,
+            "strictness": profile.strictness,
+            "query_type": profile.query_type,
+            "samples": len(samples),
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": _percentile(latencies, 0.95),
+            "prompt_tokens": statistics.mean(s["prompt_tokens"] for s in samples),
+            "citations": statistics.mean(s["citations"] for s in samples),
+            "overlap": statistics.mean(s["overlap"] for s in samples),
+        })
+
+    print(f"   {'config':<12}{'top_n':>6}{'strict':>7} {'query_type':<22}{'p50 ms':>8}{'p95 ms':>8}"
+          f"{'prompt tok':>11}{'cites':>6}{'overlap':>8}")
+    for r in sorted(results, key=lambda r: r["p50_ms"]):
+        print(f"   {r['config']:<12}{r['top_n_documents']:>6}{r['strictness']:>7} {r['query_type']:<22}"
+              f"{r['p50_ms']:>8.0f}{r['p95_ms']:>8.0f}{r['prompt_tokens']:>11.0f}{r['citations']:>6.1f}"
+              f"{r['overlap']:>8.2f}")
+    print(f"{'='*96}")
+
+    # Cheapest configuration that stays close enough to the reference answers
+    reference_overlap = next(r["overlap"] for r in results if r["config"] == args["reference"])
+    floor = args["min_overlap"] * (reference_overlap or 1.0)
+    candidates = [r for r in results if r["overlap"] >= floor]
+    if candidates:
+        best = min(candidates, key=lambda r: (r["prompt_tokens"], r["p50_ms"]))
+        print(f"   💡 Cheapest config with overlap >= {floor:.2f}: {best['config']} "
+              f"(top_n={best['top_n_documents']}, strictness={best['strictness']}, "
+              f"{best['prompt_tokens']:.0f} prompt tokens, p50 {best['p50_ms']:.0f}ms)")
+
+    if args["json"]:
+        with open(args["json"], "w", encoding="utf-8") as f:
+            json.dump({"settings": args, "results": results}, f, indent=2)
+        print(f"   📝 Results saved to {args['json']}")
+
+    if fake is not None:
+        fake.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    args = {
+        "questions": os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_questions.json"),
+        "profiles": "fast,balanced,thorough",
+        "sweep": False,
+        "top_n": "3,5,10",
+        "strictness": "2,3,4",
+        "reference": "thorough",
+        "repeat": 1,
+        "min_overlap": 0.8,
+        "json": "",
+        "fake": False,
+    }
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+        elif arg in ("--sweep", "--fake"):
+            args[arg[2:]] = True
+
+    sys.exit(run(args))
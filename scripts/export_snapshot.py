@@ -0,0 +1,92 @@
+"""
+Export documents-index into a local retrieval snapshot (RETRIEVAL_BACKEND=local).
+
+Reads every chunk's id/title/source/chunk_id/content and content_vector from
+Azure AI Search and writes the memory-mapped layout described in
+api/local_retrieval.py (float16 vectors, float32 + int8 coarse matrices and a
+JSONL sidecar with byte offsets). Deploy the output directory with the
+Function App, or point LOCAL_SNAPSHOT_PATH at it.
+
+Usage:
+    python export_snapshot.py [--output=../api/snapshot] [--coarse-dims=256]
+
+Uses the API settings (AZURE_SEARCH_ENDPOINT, AZURE_SEARCH_INDEX,
+AZURE_SEARCH_KEY or managed identity) from the environment or .env.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+FIELDS = ["id", "title", "source", "chunk_id", "content", "content_vector"]
+
+
+def export(output: str, coarse_dims: int) -> int:
+    from azure.search.documents import SearchClient
+    from local_retrieval import write_snapshot
+    from settings import get_settings
+
+    settings = get_settings()
+    if not settings.search_endpoint:
+        print("❌ AZURE_SEARCH_ENDPOINT is not set")
+        return 1
+
+    client = SearchClient(
+        endpoint=settings.search_endpoint,
+        index_name=settings.search_index,
+        credential=settings.search_credential(),
+    )
+
+    print(f"\n📦 Exporting '{settings.search_index}' → {output}")
+    start = time.perf_counter()
+    vectors, docs = [], []
+    skipped = 0
+    for result in client.search(search_text="*", select=FIELDS):
+        vector = result.get("content_vector")
+        if not vector:
+            skipped += 1
+            continue
+        vectors.append(vector)
+        docs.append({name: result.get(name) for name in FIELDS if name != "content_vector"})
+        if len(docs) % 1000 == 0:
+            print(f"   ... {len(docs)} chunks")
+
+    if not docs:
+        print("❌ No chunks with content_vector found (is the field retrievable?)")
+        return 1
+
+    info = write_snapshot(
+        output, vectors, docs, coarse_dims=coarse_dims,
+        index=settings.search_index, embedding_deployment=settings.embedding_deployment,
+    )
+    size_mb = sum(
+        os.path.getsize(os.path.join(output, name)) for name in os.listdir(output)
+    ) / (1024 * 1024)
+    print(f"   ✅ {info['count']} chunks x {info['dims']} dims (coarse {info['coarse_dims']}), "
+          f"{size_mb:.1f} MB in {time.perf_counter() - start:.1f}s")
+    if skipped:
+        print(f"   ⚠️  {skipped} chunks without content_vector skipped")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(override=True)
+    except ImportError:
+        pass
+
+    args = {
+        "output": os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api", "snapshot"),
+        "coarse_dims": 256,
+    }
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(export(args["output"], args["coarse_dims"]))
@@ -0,0 +1,270 @@
+"""
+Fake upstream backends for local performance testing.
+Lets the API code run without Azure/Tavily quota, with injectable latency.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LatencyModel:
+    """Latency distribution: fixed base plus optional log-normal jitter (seconds)."""
+
+    def __init__(self, base: float = 0.0, jitter: float = 0.0):
+        self.base = base
+        self.jitter = jitter
+
+    def sample(self) -> float:
+        if self.jitter <= 0:
+            return self.base
+        return self.base + random.lognormvariate(0, 1) * self.jitter
+
+    def sleep(self):
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeTavilyClient:
+    """Drop-in stand-in for tavily.TavilyClient.search with call counting."""
+
+    def __init__(self, latency: LatencyModel = None, fail_rate: float = 0.0):
+        self.latency = latency or LatencyModel()
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, search_depth: str = "basic", max_results: int = 5, include_answer: bool = False, **kwargs) -> dict:
+        with self._lock:
+            self.calls += 1
+        self.latency.sleep()
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise RuntimeError("Fake Tavily failure")
+
+        return {
+            "answer": f"Fake answer for: {query}" if include_answer else None,
+            "results": [
+                {
+                    "title": f"Result {i} for {query}",
+                    "url": f"https://example.com/{i}",
+                    "content": f"Snippet {i} about {query}. " * 5,
+                }
+                for i in range(1, max_results + 1)
+            ],
+        }
+
+
+class _FakeHTTPServer:
+    """Threaded local HTTP server with latency and 429/5xx injection."""
+
+    def __init__(self, latency: LatencyModel = None, throttle_rate: float = 0.0, error_rate: float = 0.0,
+                 retry_after: float = 2.0, port: int = 0):
+        self.latency = latency or LatencyModel()
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.calls = 0
+        self.status_counts: dict = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, status: int):
+        with self._lock:
+            self.calls += 1
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def _extra_latency(self, path: str, request: dict) -> float:
+        """Additional delay for specific requests (seconds)."""
+        return 0.0
+
+    def handle(self, path: str, request: dict) -> dict:
+        """Successful response body for a POST."""
+        raise NotImplementedError
+
+    def handle_get(self, path: str):
+        """Response body for a GET (health probes), or None for 404."""
+        return None
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict, headers: dict = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                fake.latency.sleep()
+                extra = fake._extra_latency(self.path, request)
+                if extra > 0:
+                    time.sleep(extra)
+
+                roll = random.random()
+                if roll < fake.throttle_rate:
+                    fake._count(429)
+                    return self._send(429, {"error": {"code": "429", "message": "Rate limit"}},
+                                      {"retry-after": str(fake.retry_after)})
+                if roll < fake.throttle_rate + fake.error_rate:
+                    fake._count(500)
+                    return self._send(500, {"error": {"code": "500", "message": "Fake failure"}})
+
+                fake._count(200)
+                return self._send(200, fake.handle(self.path, request))
+
+            def do_GET(self):
+                body = fake.handle_get(self.path)
+                if body is None:
+                    return self._send(404, {"error": {"code": "404", "message": "Not found"}})
+                return self._send(200, body)
+
+        return Handler
+
+
+class FakeAzureOpenAIServer(_FakeHTTPServer):
+    """
+    Local HTTP stand-in for an Azure OpenAI deployment.
+    Serves /openai/deployments/<name>/chat/completions and /embeddings with
+    configurable latency and 429/5xx injection. 'On Your Data' requests get
+    fake citations after an extra Azure AI Search delay; requests that offer
+    tools get a tool call for research/web questions, then a final answer.
+    """
+
+    # Keyword -> tool the fake model calls when that tool is offered
+    TOOL_TRIGGERS = [
+        ("latest", "WebSearch-search_web", "query"),
+        ("news", "WebSearch-search_web", "query"),
+        ("paper", "RAG-search_documents", "query"),
+        ("research", "RAG-search_documents", "query"),
+    ]
+
+    def __init__(self, latency: LatencyModel = None, throttle_rate: float = 0.0, error_rate: float = 0.0,
+                 retry_after: float = 2.0, port: int = 0, search_latency: LatencyModel = None):
+        super().__init__(latency, throttle_rate, error_rate, retry_after, port)
+        self.search_latency = search_latency or LatencyModel()
+
+    def _extra_latency(self, path: str, request: dict) -> float:
+        return self.search_latency.sample() if request.get("data_sources") else 0.0
+
+    def handle(self, path: str, request: dict) -> dict:
+        deployment = path.split("/deployments/")[-1].split("/")[0]
+        if "/embeddings" in path:
+            return self._embedding_response(request)
+        return self._chat_response(deployment, request)
+
+    def handle_get(self, path: str):
+        if path.split("?")[0].endswith("/models"):
+            return {"object": "list", "data": [{"id": "gpt-4o", "object": "model"}]}
+        return None
+
+    def _embedding_response(self, request: dict) -> dict:
+        inputs = request.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dims = request.get("dimensions") or 3072
+        data = []
+        for i, text in enumerate(inputs):
+            rng = random.Random(hash(text))
+            data.append({"object": "embedding", "index": i, "embedding": [rng.uniform(-1, 1) for _ in range(dims)]})
+        return {"object": "list", "data": data, "model": "fake-embedding",
+                "usage": {"prompt_tokens": 8, "total_tokens": 8}}
+
+    def _chat_response(self, deployment: str, request: dict) -> dict:
+        messages = request.get("messages", [])
+        question = messages[-1].get("content", "") if messages else ""
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        message = {"role": "assistant", "content": f"[{deployment}] Fake answer to: {question[:80]}"}
+
+        tool_call = self._pick_tool(request, messages)
+        if tool_call is not None:
+            message = {"role": "assistant", "content": None, "tool_calls": [tool_call]}
+
+        if request.get("data_sources"):
+            # More documents / lower strictness -> more chunks in the prompt
+            parameters = request["data_sources"][0].get("parameters", {})
+            top_n = parameters.get("top_n_documents", 5)
+            strictness = parameters.get("strictness", 3)
+            kept = max(1, round(top_n * (1 - 0.1 * (strictness - 1))))
+            excerpts = [f"Excerpt {i} relevant to {question[:40]}" for i in range(1, kept + 1)]
+            message["context"] = {"citations": [
+                {"title": f"paper{i}.pdf", "content": excerpt, "filepath": f"paper{i}.pdf"}
+                for i, excerpt in enumerate(excerpts, 1)
+            ]}
+            if message.get("content"):
+                message["content"] += " " + " ".join(f"{e} [doc{i}]." for i, e in enumerate(excerpts, 1))
+            prompt_tokens += 600 * kept
+
+        return {
+            "id": f"chatcmpl-fake-{random.randrange(1 << 30)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [{"index": 0, "finish_reason": "tool_calls" if tool_call else "stop", "message": message}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 60,
+                      "total_tokens": prompt_tokens + 60},
+        }
+
+    def _pick_tool(self, request: dict, messages: list):
+        """Tool call for the first turn of a tool-enabled request, else None."""
+        if not request.get("tools") or not messages or messages[-1].get("role") != "user":
+            return None
+        offered = {t.get("function", {}).get("name") for t in request["tools"]}
+        question = str(messages[-1].get("content", ""))
+        for keyword, tool, argument in self.TOOL_TRIGGERS:
+            if tool in offered and keyword in question.lower():
+                return {
+                    "id": f"call_{random.randrange(1 << 30)}",
+                    "type": "function",
+                    "function": {"name": tool, "arguments": json.dumps({argument: question[:200]})},
+                }
+        return None
+
+
+class FakeTavilyServer(_FakeHTTPServer):
+    """Local HTTP stand-in for the Tavily API (point TAVILY_API_BASE_URL at .endpoint)."""
+
+    def handle(self, path: str, request: dict) -> dict:
+        query = request.get("query", "")
+        max_results = int(request.get("max_results", 5))
+        return {
+            "query": query,
+            "answer": f"Fake answer for: {query}" if request.get("include_answer") else None,
+            "results": [
+                {
+                    "title": f"Result {i} for {query}",
+                    "url": f"https://example.com/{i}",
+                    "content": f"Snippet {i} about {query}. " * 5,
+                    "score": 1.0 / i,
+                }
+                for i in range(1, max_results + 1)
+            ],
+            "response_time": 0.1,
+        }
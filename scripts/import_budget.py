@@ -0,0 +1,134 @@
+"""
+Cold-start import budget report for the Function App.
+
+Runs each scenario in a fresh interpreter with `python -X importtime`, then
+reports wall-clock import time and the heaviest top-level packages.
+Scenarios follow the routes: the app module alone (what every cold start
+pays), then the extra imports made on first use of the chat, agent and
+init-index routes.
+
+Usage:
+    python import_budget.py [--top=8] [--budget-ms=400] [--runs=3]
+
+Exits non-zero if the app-module import exceeds --budget-ms (median of runs).
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+# Scenario -> statements run after `import function_app`
+SCENARIOS = {
+    "app module (every cold start)": "",
+    "+ chat / chat-simple (openai client)": "import openai",
+    "+ agent / agent-stream (semantic kernel)": "import agent",
+    "+ init-index (search index models)": (
+        "import azure.search.documents.indexes.models, azure.identity"
+    ),
+}
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _package(name: str) -> str:
+    """Distribution-level name (azure.* is a namespace, so keep two components)."""
+    parts = name.split(".")
+    return ".".join(parts[:2]) if parts[0] == "azure" and len(parts) > 1 else parts[0]
+
+
+def measure(extra: str) -> tuple[float, float, dict]:
+    """Return (app ms, extra ms, top-level package -> cumulative ms for the extra step)."""
+    code = (
+        "import time\n"
+        "t0 = time.perf_counter()\n"
+        "import function_app\n"
+        "t1 = time.perf_counter()\n"
+        f"{extra}\n"
+        "t2 = time.perf_counter()\n"
+        "print(f'{(t1 - t0) * 1000:.1f} {(t2 - t1) * 1000:.1f}')\n"
+    )
+    env = {**os.environ, "PREWARM_ON_START": "false"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=API_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    app_ms, extra_ms = (float(v) for v in proc.stdout.strip().splitlines()[-1].split())
+
+    # Top-level entries imported after function_app finished
+    packages: dict = {}
+    after_app = False
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if len(indent) != 1:
+            continue
+        if name == "function_app":
+            after_app = True
+        elif after_app and name != "azure":
+            package = _package(name)
+            packages[package] = packages.get(package, 0) + int(cumulative) / 1000
+    return app_ms, extra_ms, packages
+
+
+def app_breakdown() -> dict:
+    """Top-level imports made while importing function_app itself."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import function_app"],
+        cwd=API_DIR, env={**os.environ, "PREWARM_ON_START": "false"},
+        capture_output=True, text=True, check=True,
+    )
+    packages: dict = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        # Direct children of function_app are indented one level (3 spaces)
+        if match and len(match.group(3)) == 3 and match.group(4) != "azure":
+            name = _package(match.group(4))
+            packages[name] = packages.get(name, 0) + int(match.group(2)) / 1000
+    return packages
+
+
+def run(top: int, budget_ms: float, runs: int) -> int:
+    print(f"\n🧊 Import budget (median of {runs} fresh interpreters)")
+    print(f"{'='*70}")
+
+    app_samples = []
+    for scenario, extra in SCENARIOS.items():
+        results = [measure(extra) for _ in range(runs)]
+        app_ms = statistics.median(r[0] for r in results)
+        extra_ms = statistics.median(r[1] for r in results)
+        app_samples.append(app_ms)
+        ms = app_ms if not extra else extra_ms
+        print(f"   {scenario:<44} {ms:8.0f} ms")
+        if extra:
+            heaviest = sorted(results[-1][2].items(), key=lambda kv: -kv[1])[:top]
+            print("      " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in heaviest))
+
+    print(f"{'='*70}")
+    print("   function_app imports (cumulative ms):")
+    for name, ms in sorted(app_breakdown().items(), key=lambda kv: -kv[1])[:top]:
+        print(f"      {name:<24} {ms:8.1f}")
+
+    app_median = statistics.median(app_samples)
+    if budget_ms and app_median > budget_ms:
+        print(f"\n   ❌ App import {app_median:.0f}ms exceeds budget {budget_ms:.0f}ms")
+        return 1
+    print(f"\n   ✅ App import {app_median:.0f}ms (budget {budget_ms:.0f}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    args = {"top": 8, "budget_ms": 400.0, "runs": 3}
+    for arg in sys.argv[1:]:
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg[2:].split("=", 1)
+            name = name.replace("-", "_")
+            if name in args:
+                args[name] = type(args[name])(value)
+
+    sys.exit(run(args["top"], args["budget_ms"], args["runs"]))
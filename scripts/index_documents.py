@@ -1,7 +1,12 @@
 import os
+import sys
+import json
 import glob
 import time
 import re
+import zipfile
+from html.parser import HTMLParser
+from xml.etree import ElementTree
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from threading import Lock
 from dotenv import load_dotenv
@@ -12,6 +17,15 @@ from openai import AzureOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 import tiktoken
 
+try:
+    from pypdf import PdfReader
+    HAS_PYPDF = True
+except ImportError:
+    HAS_PYPDF = False
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+from dedup import NearDuplicateIndex, DEFAULT_DUPLICATE_THRESHOLD
+
 # .env dosyasını yükle (API anahtarları için)
 load_dotenv(override=True)
 
@@ -27,12 +41,29 @@ DOC_INTEL_KEY = os.getenv("AZURE_FORM_RECOGNIZER_KEY")
 OPENAI_ENDPOINT = "https://vectorizervascularr.cognitiveservices.azure.com"
 OPENAI_KEY = os.getenv("AZURE_OPENAI_API_KEY") # 84ga... olan
 EMBEDDING_DEPLOYMENT = "text-embedding-3-large-957047"
+# Boş = modelin varsayılan boyutu (3072); API ile aynı EMBEDDING_DIMENSIONS olmalı
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
 
 # 3. Azure AI Search
 SEARCH_ENDPOINT = "https://search-rag-prod-3mktjtlo.search.windows.net"
 SEARCH_KEY = os.getenv("AZURE_SEARCH_KEY")
 INDEX_NAME = "documents-index"
 
+# 4. Near-duplicate eleme (MinHash, tahmini Jaccard >= eşik olan chunk embed edilmez)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", DEFAULT_DUPLICATE_THRESHOLD))
+dedup_stats = {"chunks": 0, "duplicates": 0, "tokens_saved": 0}
+dedup_stats_lock = Lock()
+
+# 5. Metin çıkarma: text layer'ı olan sayfalar lokal okunur, gerisi OCR
+SUPPORTED_EXTENSIONS = (".pdf", ".md", ".txt", ".docx", ".html", ".htm")
+# Bu kadar karakterden az metni olan PDF sayfası "taranmış" sayılır
+MIN_PAGE_CHARS = int(os.getenv("MIN_PAGE_CHARS", "100"))
+extraction_stats = {"files": 0, "pages": 0, "ocr_pages": 0, "seconds": 0.0}
+extraction_stats_lock = Lock()
+
+# 6. Checkpoint: tamamlanan dosya/chunk/batch'ler burada tutulur (--resume)
+INDEX_JOURNAL_PATH = os.getenv("INDEX_JOURNAL_PATH", os.path.join(".index_journal", "journal.jsonl"))
+
 def sanitize_key(text):
     """
     Azure AI Search document key'i için geçerli karakterlere dönüştürür.
@@ -52,15 +83,19 @@ def sanitize_key(text):
 
 def init_clients():
     """Tüm client'ları başlat."""
-    if not all([DOC_INTEL_ENDPOINT, DOC_INTEL_KEY, OPENAI_KEY, SEARCH_KEY]):
+    if not all([OPENAI_KEY, SEARCH_KEY]) or not (HAS_PYPDF or all([DOC_INTEL_ENDPOINT, DOC_INTEL_KEY])):
         print("HATA: Lütfen .env dosyasını tüm anahtarlarla doldurun!")
         return None, None, None
 
-    # Document Intelligence Client
-    doc_client = DocumentAnalysisClient(
-        endpoint=DOC_INTEL_ENDPOINT, 
-        credential=AzureKeyCredential(DOC_INTEL_KEY)
-    )
+    # Document Intelligence Client (sadece taranmış sayfalar için)
+    doc_client = None
+    if DOC_INTEL_ENDPOINT and DOC_INTEL_KEY:
+        doc_client = DocumentAnalysisClient(
+            endpoint=DOC_INTEL_ENDPOINT, 
+            credential=AzureKeyCredential(DOC_INTEL_KEY)
+        )
+    else:
+        print("⚠️  Document Intelligence ayarlı değil - taranmış PDF sayfaları atlanacak")
 
     # OpenAI Client
     openai_client = AzureOpenAI(
@@ -78,29 +113,157 @@ def init_clients():
 
     return doc_client, openai_client, search_client
 
-def extract_text_from_pdf(doc_client, file_path):
-    """PDF'ten metin çıkarır (Tüm döküman birleştirilmiş)."""
-    print(f"📄 Okunuyor: {file_path}...")
-    with open(file_path, "rb") as f:
-        poller = doc_client.begin_analyze_document("prebuilt-read", document=f)
-        result = poller.result()
-
-    # Tüm sayfaları birleştir (semantic chunking için)
+def _usable_text(text):
+    """Sayfada gerçek bir text layer var mı? (taranmış sayfalar boş ya da çöp döner)"""
+    compact = "".join(text.split())
+    if len(compact) < MIN_PAGE_CHARS:
+        return False
+    letters = sum(ch.isalnum() for ch in compact)
+    return letters / len(compact) >= 0.6
+
+def _page_ranges(page_numbers):
+    """[1, 2, 3, 7] -> "1-3,7" (Document Intelligence `pages` parametresi)."""
+    ranges = []
+    start = prev = page_numbers[0]
+    for num in page_numbers[1:] + [None]:
+        if num is not None and num == prev + 1:
+            prev = num
+            continue
+        ranges.append(f"{start}-{prev}" if prev > start else str(start))
+        if num is not None:
+            start = prev = num
+    return ",".join(ranges)
+
+def _join_pages(pages):
+    """Sayfa metinlerini birleştirir, her sayfanın başlangıç pozisyonunu tutar."""
     full_text = ""
-    page_boundaries = []  # Her sayfanın başlangıç pozisyonunu tut
-
-    for page in result.pages:
-        page_start = len(full_text)
+    page_boundaries = []
+    for page_num, page_text in pages:
         page_boundaries.append({
-            "page_num": page.page_number,
-            "start_pos": page_start
+            "page_num": page_num,
+            "start_pos": len(full_text)
         })
-
-        # Sayfanın metnini ekle
-        page_text = " ".join([line.content for line in page.lines])
         full_text += page_text + "\n\n"  # Sayfa aralarına boşluk
+    return full_text, page_boundaries
+
+def _record_extraction(filename, pages, ocr_pages, elapsed):
+    with extraction_stats_lock:
+        extraction_stats["files"] += 1
+        extraction_stats["pages"] += pages
+        extraction_stats["ocr_pages"] += ocr_pages
+        extraction_stats["seconds"] += elapsed
+    print(f"   ⏱️  {filename}: {elapsed:.2f}s, {pages} sayfa ({ocr_pages} OCR)")
 
-    print(f"   ✅ {len(result.pages)} sayfa okundu, toplam {len(full_text)} karakter.")
+def extract_text_from_pdf(doc_client, file_path):
+    """
+    PDF'ten metin çıkarır (Tüm döküman birleştirilmiş).
+
+    Text layer'ı olan sayfalar lokal olarak (pypdf) okunur; sadece metni
+    olmayan (taranmış) sayfalar Document Intelligence OCR'a gönderilir.
+    """
+    print(f"📄 Okunuyor: {file_path}...")
+    start = time.perf_counter()
+    filename = os.path.basename(file_path)
+
+    page_texts = {}
+    if HAS_PYPDF:
+        try:
+            reader = PdfReader(file_path)
+            for page_num, page in enumerate(reader.pages, 1):
+                try:
+                    text = page.extract_text() or ""
+                except Exception:
+                    text = ""
+                page_texts[page_num] = " ".join(line.strip() for line in text.splitlines() if line.strip())
+        except Exception as e:
+            print(f"   ⚠️  Lokal PDF okuma başarısız, tüm döküman OCR'a gidiyor: {e}")
+            page_texts = {}
+
+    ocr_pages = [num for num, text in page_texts.items() if not _usable_text(text)]
+    if page_texts and not ocr_pages:
+        ocr_result_pages = []
+    elif doc_client is None:
+        print(f"   ⚠️  {len(ocr_pages) or 'Tüm'} sayfa OCR gerektiriyor ama Document Intelligence ayarlı değil")
+        ocr_result_pages = []
+    else:
+        # Sadece taranmış sayfalar (ya da pypdf yoksa tüm döküman)
+        kwargs = {"pages": _page_ranges(ocr_pages)} if page_texts else {}
+        with open(file_path, "rb") as f:
+            poller = doc_client.begin_analyze_document("prebuilt-read", document=f, **kwargs)
+            result = poller.result()
+        ocr_result_pages = result.pages
+
+    for page in ocr_result_pages:
+        page_texts[page.page_number] = " ".join([line.content for line in page.lines])
+
+    full_text, page_boundaries = _join_pages(sorted(page_texts.items()))
+    ocr_count = len(ocr_result_pages)
+    print(f"   ✅ {len(page_texts)} sayfa okundu ({ocr_count} OCR), toplam {len(full_text)} karakter.")
+    _record_extraction(filename, len(page_texts), ocr_count, time.perf_counter() - start)
+    return full_text, page_boundaries
+
+class _HTMLTextExtractor(HTMLParser):
+    """HTML'den görünen metni çıkarır (script/style hariç, block tag'ler paragraf olur)."""
+
+    BLOCK_TAGS = {"p", "div", "section", "article", "li", "br", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote"}
+    SKIP_TAGS = {"script", "style", "noscript", "head", "svg"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+def _docx_text(file_path):
+    """DOCX paragraflarını okur (word/document.xml, ek bağımlılık yok)."""
+    namespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(file_path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{namespace}p"):
+        text = "".join(node.text or "" for node in paragraph.iter(f"{namespace}t"))
+        if text.strip():
+            paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+def extract_text(doc_client, file_path):
+    """Dosya tipine göre metin çıkarır: PDF (lokal + OCR), .md/.txt, .docx, .html."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".pdf":
+        return extract_text_from_pdf(doc_client, file_path)
+
+    print(f"📄 Okunuyor: {file_path}...")
+    start = time.perf_counter()
+    if extension == ".docx":
+        text = _docx_text(file_path)
+    else:
+        with open(file_path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        if extension in (".html", ".htm"):
+            parser = _HTMLTextExtractor()
+            parser.feed(text)
+            text = "".join(parser.parts)
+    # Tek "sayfa"; fazla boş satırları sadeleştir (chunking paragraf sınırlarını kullanır)
+    text = re.sub(r"\n\s*\n\s*", "\n\n", text).strip()
+
+    full_text, page_boundaries = _join_pages([(1, text)])
+    print(f"   ✅ {len(full_text)} karakter okundu.")
+    _record_extraction(os.path.basename(file_path), 1, 0, time.perf_counter() - start)
     return full_text, page_boundaries
 
 def create_semantic_chunks(text, page_boundaries):
@@ -160,6 +323,48 @@ def create_semantic_chunks(text, page_boundaries):
 
     return chunks_with_metadata
 
+def drop_near_duplicates(chunks, filename, dedup):
+    """
+    Daha önce görülen bir chunk'ın (aynı makalenin başka versiyonu, tekrar eden
+    başlık/footer) near-duplicate'i olan chunk'ları embedding'den önce atar.
+    """
+    kept = []
+    skipped_tokens = 0
+    for chunk in chunks:
+        original = dedup.add(f"{filename}#{chunk['chunk_id']}", chunk["content"])
+        if original is None:
+            kept.append(chunk)
+        else:
+            skipped_tokens += chunk["token_count"]
+
+    with dedup_stats_lock:
+        dedup_stats["chunks"] += len(chunks)
+        dedup_stats["duplicates"] += len(chunks) - len(kept)
+        dedup_stats["tokens_saved"] += skipped_tokens
+
+    if len(kept) < len(chunks):
+        print(f"   🧬 {filename}: {len(chunks) - len(kept)}/{len(chunks)} near-duplicate chunk atlandı (~{skipped_tokens} token)")
+    return kept
+
+def seed_dedup_index(search_client, dedup, exclude_sources=()):
+    """
+    Index'teki mevcut chunk'ları dedup index'ine ekler (incremental modda versiyonları yakalamak için).
+    exclude_sources: yeniden işlenecek dosyalar (kendi chunk'larının duplicate sayılmaması için)
+    """
+    try:
+        seeded = 0
+        for result in search_client.search(search_text="*", select="id,source,content"):
+            if result.get("source") in exclude_sources:
+                continue
+            dedup.add(f"index#{result['id']}", result.get("content") or "")
+            seeded += 1
+        # Mevcut chunk'lar tasarruf istatistiğine sayılmaz
+        dedup.checked = dedup.duplicates = 0
+        return seeded
+    except Exception as e:
+        print(f"   ⚠️  Dedup için mevcut chunk'lar alınamadı: {e}")
+        return 0
+
 def get_indexed_sources(search_client):
     """
     Azure AI Search'te zaten indexlenmiş PDF'lerin listesini döndürür.
@@ -187,20 +392,169 @@ def get_indexed_sources(search_client):
 
 def generate_embedding(openai_client, text):
     """Metni vektöre çevirir."""
+    kwargs = {"dimensions": EMBEDDING_DIMENSIONS} if EMBEDDING_DIMENSIONS else {}
     response = openai_client.embeddings.create(
         input=text,
-        model=EMBEDDING_DEPLOYMENT
+        model=EMBEDDING_DEPLOYMENT,
+        **kwargs
     )
     return response.data[0].embedding
 
-def process_single_pdf(pdf_file, doc_client, openai_client, indexed_sources, force_reindex):
+def file_fingerprint(path):
+    """Dosya değişti mi? (boyut + mtime)"""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+class IndexJournal:
+    """
+    Indexleme çalışmasının append-only JSONL journal'ı (her kayıt fsync'lenir).
+    Çökme ya da quota duvarından sonra --resume ile kalınan yerden devam edilir.
+
+    Kayıtlar:
+        run       çalışma ayarları (index, embedding deployment, boyut)
+        file      dosya işlenmeye başladı (fingerprint = boyut + mtime)
+        chunk     embed edilmiş chunk dokümanı (vektörüyle birlikte)
+        done      dosyanın tüm chunk'ları embed edildi (son chunk id listesiyle)
+        uploaded  Azure AI Search'ün kabul ettiği id'ler
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.run_info = None
+        self.files = {}       # source -> {"fingerprint", "done"}
+        self.chunks = {}      # source -> {id: doc}
+        self.uploaded = set()
+        self._lock = Lock()
+        self._file = None
+
+    def load(self):
+        """Journal'ı okur; yoksa False döner."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Çökme sırasında yarım yazılmış son satır
+                self._apply(record)
+        return True
+
+    def _apply(self, record):
+        kind = record["type"]
+        if kind == "run":
+            self.run_info = record["settings"]
+        elif kind == "file":
+            previous = self.files.get(record["source"])
+            if previous is None or previous["fingerprint"] != record["fingerprint"]:
+                # Dosya değişmiş: eski chunk'lar (ve yüklendi bilgileri) geçersiz
+                stale = self.chunks.pop(record["source"], {})
+                self.uploaded.difference_update(stale)
+            self.files[record["source"]] = {"fingerprint": record["fingerprint"], "done": False}
+        elif kind == "chunk":
+            self.chunks.setdefault(record["source"], {})[record["doc"]["id"]] = record["doc"]
+        elif kind == "done":
+            self.files[record["source"]]["done"] = True
+            # Bu çalışmada dedup'ın attığı eski chunk'lar artık bekleyen iş değil
+            keep = set(record["ids"])
+            chunks = self.chunks.get(record["source"], {})
+            for doc_id in [doc_id for doc_id in chunks if doc_id not in keep]:
+                del chunks[doc_id]
+        elif kind == "uploaded":
+            self.uploaded.update(record["ids"])
+
+    def _write(self, record):
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def open(self, settings, resume):
+        """Yeni çalışma başlatır ya da (resume) mevcut journal'a devam eder."""
+        if not resume and os.path.exists(self.path):
+            os.replace(self.path, self.path + ".prev")
+            self.__init__(self.path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self.run_info is None:
+            self._write({"type": "run", "settings": settings, "started": time.time()})
+
+    def has_pending_work(self):
+        """Yarım kalan dosya ya da yüklenmemiş chunk var mı?"""
+        if any(not entry["done"] for entry in self.files.values()):
+            return True
+        return any(doc_id not in self.uploaded for docs in self.chunks.values() for doc_id in docs)
+
+    def is_complete(self, source, fingerprint):
+        entry = self.files.get(source)
+        return entry is not None and entry["done"] and entry["fingerprint"] == fingerprint
+
+    def begin_file(self, source, fingerprint):
+        """Dosyanın daha önce embed edilmiş chunk'larını döndürür (id -> doc)."""
+        entry = self.files.get(source)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            self._write({"type": "file", "source": source, "fingerprint": fingerprint})
+        return dict(self.chunks.get(source, {}))
+
+    def add_chunk(self, source, doc):
+        self._write({"type": "chunk", "source": source, "doc": doc})
+
+    def finish_file(self, source, ids):
+        self._write({"type": "done", "source": source, "ids": ids})
+
+    def pending_documents(self, source):
+        return [doc for doc_id, doc in self.chunks.get(source, {}).items() if doc_id not in self.uploaded]
+
+    def mark_uploaded(self, ids):
+        if ids:
+            self._write({"type": "uploaded", "ids": list(ids)})
+
+    def close(self, completed):
+        """Tüm chunk'lar yüklendiyse journal silinir."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if completed:
+            os.remove(self.path)
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+class IndexProgress:
+    """Dosya bazlı ilerleme; ETA ölçülen throughput'tan (işlenen byte/s) hesaplanır."""
+
+    def __init__(self, files):
+        self.sizes = {path: os.path.getsize(path) for path in files}
+        self.total_bytes = sum(self.sizes.values()) or 1
+        self.done_files = 0
+        self.done_bytes = 0
+        self.chunks = 0
+        self.start = time.perf_counter()
+        self._lock = Lock()
+
+    def file_done(self, path, chunks):
+        with self._lock:
+            self.done_files += 1
+            self.done_bytes += self.sizes.get(path, 0)
+            self.chunks += chunks
+            elapsed = max(time.perf_counter() - self.start, 1e-6)
+            remaining = self.total_bytes - self.done_bytes
+            eta = remaining / (self.done_bytes / elapsed) if self.done_bytes else 0
+            print(f"   📈 [{self.done_files}/{len(self.sizes)}] %{100 * self.done_bytes / self.total_bytes:.0f} | "
+                  f"{self.chunks / elapsed:.2f} chunk/s | geçen {_format_duration(elapsed)} | "
+                  f"ETA {_format_duration(eta)}")
+
+def process_single_file(source_file, doc_client, openai_client, indexed_sources, force_reindex, dedup=None, journal=None):
     """
-    Tek bir PDF'i işler (paralel execution için).
+    Tek bir dökümanı işler (paralel execution için).
 
     Returns:
         tuple: (filename, documents_list, success, error_message)
     """
-    filename = os.path.basename(pdf_file)
+    filename = os.path.basename(source_file)
 
     try:
         # Skip if already indexed
@@ -209,30 +563,40 @@ def process_single_pdf(pdf_file, doc_client, openai_client, indexed_sources, for
 
         print(f"📚 İşleniyor: {filename}")
 
-        # 1. PDF'ten Metin Çıkar (Document Intelligence)
-        full_text, page_boundaries = extract_text_from_pdf(doc_client, pdf_file)
+        # 1. Metin Çıkar (lokal text layer, gerekirse Document Intelligence)
+        full_text, page_boundaries = extract_text(doc_client, source_file)
 
         if not full_text.strip():
             return (filename, [], False, "Döküman boş")
 
         # 2. Semantic Chunking
         chunks = create_semantic_chunks(full_text, page_boundaries)
+        if dedup is not None:
+            chunks = drop_near_duplicates(chunks, filename, dedup)
 
-        # 3. Her Chunk için Embedding Oluştur
+        # 3. Her Chunk için Embedding Oluştur (journal'da olanlar tekrar embed edilmez)
+        embedded = journal.begin_file(filename, file_fingerprint(source_file)) if journal else {}
         documents = []
-        print(f"   🔄 {filename}: {len(chunks)} chunk için embedding oluşturuluyor...")
+        print(f"   🔄 {filename}: {len(chunks)} chunk için embedding oluşturuluyor..."
+              + (f" ({len(embedded)} journal'dan)" if embedded else ""))
+
+        # Sanitize the key to remove invalid characters
+        # (PDF id'leri önceki indexlerle aynı kalsın diye .pdf atılır)
+        safe_filename = sanitize_key(filename[:-4] if filename.lower().endswith(".pdf") else filename)
 
         for chunk in chunks:
             content = chunk["content"]
+            doc_id = f"{safe_filename}-chunk{chunk['chunk_id']}"
+            if doc_id in embedded:
+                documents.append(embedded[doc_id])
+                continue
 
             # Embedding al
             vector = generate_embedding(openai_client, content)
 
             # Search Dokümanı Yapısı
-            # Sanitize the key to remove invalid characters
-            safe_filename = sanitize_key(filename.replace(".pdf", ""))
             doc = {
-                "id": f"{safe_filename}-chunk{chunk['chunk_id']}",
+                "id": doc_id,
                 "content": content,
                 "title": filename,
                 "source": filename,
@@ -240,10 +604,14 @@ def process_single_pdf(pdf_file, doc_client, openai_client, indexed_sources, for
                 "content_vector": vector
             }
             documents.append(doc)
+            if journal:
+                journal.add_chunk(filename, doc)
 
             # Rate limiting (daha agresif - paralel olduğu için)
             time.sleep(0.5)
 
+        if journal:
+            journal.finish_file(filename, [doc["id"] for doc in documents])
         print(f"   ✅ {filename}: {len(documents)} chunk hazır")
         return (filename, documents, True, None)
 
@@ -251,76 +619,130 @@ def process_single_pdf(pdf_file, doc_client, openai_client, indexed_sources, for
         print(f"   ❌ {filename}: Hata - {str(e)}")
         return (filename, [], False, str(e))
 
-def index_files(folder_path="data", force_reindex=False, parallel=False, max_workers=2):
+def index_files(folder_path="data", force_reindex=False, parallel=False, max_workers=2, deduplicate=True, resume=False):
     """
-    PDF dosyalarını indexler (semantic chunking ile).
+    Dökümanları (PDF, Markdown, TXT, DOCX, HTML) indexler (semantic chunking ile).
 
     Args:
-        folder_path: PDF'lerin bulunduğu klasör
+        folder_path: Dökümanların bulunduğu klasör
         force_reindex: True ise tüm dosyaları yeniden indexler
         parallel: True ise paralel processing kullan
         max_workers: Paralel processing için worker sayısı (default: 2)
+        deduplicate: True ise near-duplicate chunk'lar embed edilmeden atlanır
+        resume: True ise yarım kalan çalışmaya journal'dan devam edilir
     """
     doc_client, openai_client, search_client = init_clients()
-    if not doc_client:
+    if not openai_client:
         return
 
-    pdf_files = glob.glob(os.path.join(folder_path, "*.pdf"))
-    if not pdf_files:
-        print(f"📂 '{folder_path}' klasöründe PDF bulunamadı.")
+    source_files = sorted(
+        path for path in glob.glob(os.path.join(folder_path, "*"))
+        if path.lower().endswith(SUPPORTED_EXTENSIONS)
+    )
+    if not source_files:
+        print(f"📂 '{folder_path}' klasöründe döküman bulunamadı ({', '.join(SUPPORTED_EXTENSIONS)}).")
         return
 
+    # Journal: önceki çalışmanın embed ettiği / yüklediği chunk'lar
+    journal = IndexJournal(INDEX_JOURNAL_PATH)
+    run_settings = {"index": INDEX_NAME, "embedding": EMBEDDING_DEPLOYMENT, "dimensions": EMBEDDING_DIMENSIONS}
+    if journal.load():
+        if resume and journal.run_info != run_settings:
+            print(f"❌ Journal farklı ayarlarla oluşturulmuş ({journal.run_info}); --resume olmadan yeniden başlatın.")
+            return
+        if not resume and journal.has_pending_work():
+            print(f"⚠️  Yarım kalmış bir çalışma var ({INDEX_JOURNAL_PATH}); devam etmek için --resume kullanın.")
+            print(f"   Yeni çalışma başlatılıyor, eski journal {INDEX_JOURNAL_PATH}.prev olarak saklandı.")
+    elif resume:
+        print(f"ℹ️  Journal bulunamadı ({INDEX_JOURNAL_PATH}), yeni çalışma başlatılıyor.")
+    journal.open(run_settings, resume)
+
+    # Journal'da tamamlanmış dosyalar: tekrar işlenmez, bekleyen chunk'ları yüklenir
+    resumed = {
+        os.path.basename(f) for f in source_files
+        if resume and journal.is_complete(os.path.basename(f), file_fingerprint(f))
+    }
+    # Journal'da yarım kalan dosyalar, chunk'larının bir kısmı index'te olsa da işlenir
+    unfinished = {source for source in journal.files if source not in resumed} if resume else set()
+
     # Zaten indexlenmiş dosyaları al
     if not force_reindex:
         print(f"🔍 Mevcut index kontrol ediliyor...")
         indexed_sources = get_indexed_sources(search_client)
         print(f"   ℹ️  {len(indexed_sources)} döküman zaten indexlenmiş")
+        # Yarım kalanlar index'te görünse de "indexlenmiş" sayılmaz (process_single_file atlamasın)
+        indexed_sources -= unfinished
     else:
         indexed_sources = set()
         print(f"🔄 Force reindex modu - tüm dosyalar yeniden işlenecek")
 
     # Filter out already indexed files
     files_to_process = [
-        f for f in pdf_files
-        if force_reindex or os.path.basename(f) not in indexed_sources
+        f for f in source_files
+        if os.path.basename(f) not in resumed
+        and (force_reindex or os.path.basename(f) not in indexed_sources)
     ]
 
-    skipped_count = len(pdf_files) - len(files_to_process)
+    skipped_count = len(source_files) - len(files_to_process) - len(resumed)
+
+    documents_to_upload = []
+    for source in sorted(resumed):
+        documents_to_upload.extend(journal.pending_documents(source))
+    if resumed:
+        print(f"♻️  {len(resumed)} döküman journal'dan devam ediyor ({len(documents_to_upload)} chunk yüklenmeyi bekliyor)")
+
+    dedup = None
+    if deduplicate and files_to_process:
+        dedup = NearDuplicateIndex(threshold=DEDUP_THRESHOLD)
+        processing = {os.path.basename(f) for f in files_to_process}
+        if not force_reindex:
+            seeded = seed_dedup_index(search_client, dedup, exclude_sources=processing)
+            print(f"   🧬 Dedup: {seeded} mevcut chunk yüklendi (eşik {DEDUP_THRESHOLD})")
+        # Journal'da tamamlanmış (ama belki henüz yüklenmemiş) dosyaların chunk'ları
+        for source in sorted(resumed):
+            for doc in journal.chunks.get(source, {}).values():
+                dedup.add(f"{source}#{doc['chunk_id']}", doc["content"])
+        dedup.checked = dedup.duplicates = 0
 
     if skipped_count > 0:
         print(f"⏭️  {skipped_count} döküman atlanıyor (zaten indexlenmiş)")
 
-    documents_to_upload = []
     processed_count = 0
     failed_count = 0
 
-    if not files_to_process:
+    if not files_to_process and not documents_to_upload:
+        journal.close(completed=not journal.has_pending_work())
         print(f"\n✅ Hiç yeni döküman yok - tüm PDF'ler zaten indexlenmiş!")
         print(f"   💡 Yeniden indexlemek için: python index_documents.py --force")
         return
 
+    progress = IndexProgress(files_to_process)
+
     # PARALEL İŞLEM
     if parallel and len(files_to_process) > 1:
-        print(f"\n⚡ PARALEL MOD: {max_workers} worker ile {len(files_to_process)} PDF işleniyor...")
+        print(f"\n⚡ PARALEL MOD: {max_workers} worker ile {len(files_to_process)} döküman işleniyor...")
         print(f"{'='*60}\n")
 
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Submit all tasks
-            future_to_pdf = {
+            future_to_file = {
                 executor.submit(
-                    process_single_pdf,
-                    pdf_file,
+                    process_single_file,
+                    source_file,
                     doc_client,
                     openai_client,
                     indexed_sources,
-                    force_reindex
-                ): pdf_file
-                for pdf_file in files_to_process
+                    force_reindex,
+                    dedup,
+                    journal
+                ): source_file
+                for source_file in files_to_process
             }
 
             # Collect results as they complete
-            for future in as_completed(future_to_pdf):
+            for future in as_completed(future_to_file):
                 filename, documents, success, error = future.result()
+                progress.file_done(future_to_file[future], len(documents))
 
                 if error == "skipped":
                     skipped_count += 1
@@ -334,19 +756,20 @@ def index_files(folder_path="data", force_reindex=False, parallel=False, max_wor
     # SERI İŞLEM (Default)
     else:
         if parallel:
-            print(f"\n📝 SERI MOD: Tek PDF var, paralel gerek yok")
+            print(f"\n📝 SERI MOD: Tek döküman var, paralel gerek yok")
 
         print(f"\n{'='*60}")
 
-        for pdf_file in files_to_process:
-            filename = os.path.basename(pdf_file)
+        for source_file in files_to_process:
+            filename = os.path.basename(source_file)
 
             print(f"\n📚 İşleniyor ({processed_count + 1}/{len(files_to_process)}): {filename}")
             print(f"{'='*60}")
 
-            result_filename, documents, success, error = process_single_pdf(
-                pdf_file, doc_client, openai_client, indexed_sources, force_reindex
+            result_filename, documents, success, error = process_single_file(
+                source_file, doc_client, openai_client, indexed_sources, force_reindex, dedup, journal
             )
+            progress.file_done(source_file, len(documents))
 
             if error == "skipped":
                 skipped_count += 1
@@ -356,40 +779,67 @@ def index_files(folder_path="data", force_reindex=False, parallel=False, max_wor
             else:
                 failed_count += 1
 
+    # Daha önceki bir çalışmada yüklenmiş chunk'lar tekrar gönderilmez
+    documents_to_upload = [doc for doc in documents_to_upload if doc["id"] not in journal.uploaded]
+
     # 4. Toplu Yükleme
     print(f"\n{'='*60}")
     print(f"📊 İşlem Özeti")
     print(f"{'='*60}")
     print(f"   ✅ Başarılı: {processed_count} döküman")
     print(f"   ⏭️  Atlanan: {skipped_count} döküman")
+    if resumed:
+        print(f"   ♻️  Journal'dan: {len(resumed)} döküman")
     if failed_count > 0:
         print(f"   ❌ Başarısız: {failed_count} döküman")
     print(f"   📦 Yeni chunk: {len(documents_to_upload)}")
+    if extraction_stats["files"]:
+        print(f"   ⏱️  Metin çıkarma: {extraction_stats['seconds']:.1f}s, {extraction_stats['pages']} sayfa "
+              f"({extraction_stats['ocr_pages']} OCR, "
+              f"%{100 * extraction_stats['ocr_pages'] / max(1, extraction_stats['pages']):.0f})")
+    if dedup is not None and dedup_stats["chunks"]:
+        print(f"   🧬 Near-duplicate: {dedup_stats['duplicates']}/{dedup_stats['chunks']} chunk atlandı "
+              f"(%{100 * dedup_stats['duplicates'] / dedup_stats['chunks']:.1f}, "
+              f"~{dedup_stats['tokens_saved']} embedding token tasarrufu)")
 
     if documents_to_upload:
         print(f"\n{'='*60}")
         print(f"🚀 {len(documents_to_upload)} chunk Azure AI Search'e yükleniyor...")
         print(f"{'='*60}")
 
-        # Batch upload (100'lük gruplar halinde)
+        # Batch upload (100'lük gruplar halinde), kabul edilen id'ler journal'a yazılır
         batch_size = 100
+        batch_count = (len(documents_to_upload) + batch_size - 1) // batch_size
+        failed_uploads = 0
         for i in range(0, len(documents_to_upload), batch_size):
             batch = documents_to_upload[i:i + batch_size]
             result = search_client.upload_documents(documents=batch)
-            print(f"   📦 Batch {i//batch_size + 1}: {len(batch)} chunk yüklendi")
+            succeeded = [r.key for r in result if r.succeeded]
+            journal.mark_uploaded(succeeded)
+            failed_uploads += len(batch) - len(succeeded)
+            print(f"   📦 Batch {i//batch_size + 1}/{batch_count}: {len(succeeded)}/{len(batch)} chunk yüklendi")
 
-        print(f"\n✅ Yeni dökümanlar başarıyla indexlendi!")
-        print(f"   📊 Toplam yeni chunk: {len(documents_to_upload)}")
+        if failed_uploads:
+            print(f"\n⚠️  {failed_uploads} chunk yüklenemedi; tekrar denemek için: python index_documents.py --resume")
+        else:
+            print(f"\n✅ Yeni dökümanlar başarıyla indexlendi!")
+        print(f"   📊 Toplam yeni chunk: {len(documents_to_upload) - failed_uploads}")
     elif processed_count == 0 and skipped_count > 0:
         print(f"\n✅ Hiç yeni döküman yok - tüm PDF'ler zaten indexlenmiş!")
         print(f"   💡 Yeniden indexlemek için: python index_documents.py --force")
 
-if __name__ == "__main__":
-    import sys
+    # Her şey işlenip yüklendiyse journal silinir; yoksa --resume ile devam edilir
+    completed = failed_count == 0 and not journal.has_pending_work()
+    journal.close(completed)
+    if not completed:
+        print(f"   💾 İlerleme kaydedildi: {INDEX_JOURNAL_PATH} (devam: python index_documents.py --resume)")
 
+if __name__ == "__main__":
     # Parse command line arguments
     force_reindex = "--force" in sys.argv or "-f" in sys.argv
     parallel = "--parallel" in sys.argv or "-p" in sys.argv
+    deduplicate = "--no-dedup" not in sys.argv
+    resume = "--resume" in sys.argv
 
     # Get max workers if specified
     max_workers = 2  # default
@@ -408,6 +858,8 @@ if __name__ == "__main__":
     else:
         print(f"\n🚀 PDF Indexing Script")
         print(f"{'='*60}")
+        if resume:
+            print(f"♻️  RESUME MODE: Journal'dan devam ediliyor")
         if force_reindex:
             print(f"⚠️  FORCE REINDEX MODE: Tüm dosyalar yeniden işlenecek")
         else:
@@ -419,7 +871,7 @@ if __name__ == "__main__":
             print(f"📝 SEQUENTIAL MODE")
         print(f"{'='*60}\n")
 
-        index_files("data", force_reindex=force_reindex, parallel=parallel, max_workers=max_workers)
+        index_files("data", force_reindex=force_reindex, parallel=parallel, max_workers=max_workers, deduplicate=deduplicate, resume=resume)
 
         print(f"\n{'='*60}")
         print(f"✨ İşlem tamamlandı!")
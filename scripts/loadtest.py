@@ -0,0 +1,354 @@
+"""
+Load test for the Function endpoints against fake Azure OpenAI, Search and Tavily backends.
+
+Drives chat, chat-simple, agent and agent-stream either in-process (handlers
+are called directly with azure.functions.HttpRequest objects) or over HTTP
+against a local host (`func start`), sweeps concurrency levels and reports
+throughput, p50/p95/p99 latency and 429/503/504 counts per endpoint.
+
+In-process mode starts the fake upstreams itself. For HTTP mode start them
+with --serve-fakes and point the Functions host at the printed settings.
+
+Usage:
+    python loadtest.py [--endpoints=chat,chat_simple,agent,agent_stream] [--concurrency=1,4,16]
+                       [--requests=100] [--openai-latency=0.8] [--search-latency=0.4]
+                       [--tavily-latency=0.6] [--jitter=0.2] [--throttle=0.0] [--error-rate=0.0]
+                       [--clients=50] [--rate-limit=0] [--unique[=true|false]] [--json=results.json]
+                       [--baseline=results.json] [--max-regression=0.2]
+    python loadtest.py --base-url=http://localhost:7071/api [...]
+    python loadtest.py --serve-fakes [--openai-latency=0.8 ...]
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from fake_upstreams import FakeAzureOpenAIServer, FakeTavilyServer, LatencyModel
+
+# Endpoint -> (route, Function handler name)
+ENDPOINTS = {
+    "chat": ("chat", "chat"),
+    "chat_simple": ("chat-simple", "chat_simple"),
+    "agent": ("agent", "agent_chat"),
+    "agent_stream": ("agent-stream", "agent_chat_stream"),
+}
+
+# Message mix per endpoint (agent messages cover fast path, light route and tool calls)
+MESSAGES = {
+    "chat": [
+        "What does the paper say about protein folding?",
+        "Summarize the methods section",
+        "Which datasets were used for evaluation?",
+    ],
+    "chat_simple": [
+        "Hello!",
+        "Explain retrieval augmented generation in one sentence",
+    ],
+    "agent": [
+        "what time is it?",
+        "who is Mert?",
+        "hi there",
+        "What are the latest AI news?",
+        "What does Mert's research paper say about transformers?",
+    ],
+}
+MESSAGES["agent_stream"] = MESSAGES["agent"]
+
+STATUSES = (200, 429, 503, 504, 500)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FAKE BACKENDS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def start_fakes(args: dict) -> tuple[FakeAzureOpenAIServer, FakeTavilyServer, dict]:
+    """Start the fake upstreams and return the app settings that point at them."""
+    jitter = args["jitter"]
+    openai = FakeAzureOpenAIServer(
+        latency=LatencyModel(args["openai_latency"], args["openai_latency"] * jitter),
+        search_latency=LatencyModel(args["search_latency"], args["search_latency"] * jitter),
+        throttle_rate=args["throttle"],
+        error_rate=args["error_rate"],
+        retry_after=1,
+    ).start()
+    tavily = FakeTavilyServer(
+        latency=LatencyModel(args["tavily_latency"], args["tavily_latency"] * jitter),
+    ).start()
+
+    settings = {
+        "AZURE_OPENAI_ENDPOINT": openai.endpoint,
+        "AZURE_OPENAI_API_KEY": "fake-key",
+        "AZURE_SEARCH_ENDPOINT": "https://fake-search.search.windows.net",
+        "AZURE_SEARCH_INDEX": "documents",
+        "AZURE_SEARCH_KEY": "fake-key",
+        "TAVILY_API_KEY": "fake-key",
+        "TAVILY_API_BASE_URL": tavily.endpoint,
+    }
+    return openai, tavily, settings
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DRIVERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class InProcessDriver:
+    """Calls the Function handlers directly (includes the secure_endpoint wrapper)."""
+
+    def __init__(self):
+        import azure.functions as func
+        import function_app
+
+        self._func = func
+        self._handlers = {
+            name: getattr(function_app, handler).build().get_user_function()
+            for name, (_, handler) in ENDPOINTS.items()
+        }
+
+    def send(self, endpoint: str, body: bytes, headers: dict) -> int:
+        route = ENDPOINTS[endpoint][0]
+        req = self._func.HttpRequest("POST", f"/api/{route}", body=body, headers=headers)
+        return self._handlers[endpoint](req).status_code
+
+
+class HttpDriver:
+    """Sends real HTTP requests to a running Functions host."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, endpoint: str, body: bytes, headers: dict) -> int:
+        req = urllib.request.Request(f"{self.base_url}/{ENDPOINTS[endpoint][0]}", data=body,
+                                     headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=120) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RUNNER
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_level(driver, endpoint: str, concurrency: int, requests: int, clients: int, unique: bool) -> dict:
+    """Closed-loop run: `concurrency` workers send `requests` in total."""
+    messages = MESSAGES[endpoint]
+    sequence = count()
+
+    def one(i: int) -> tuple[int, float]:
+        message = messages[i % len(messages)]
+        if unique:
+            message = f"{message} (#{next(sequence)})"
+        headers = {
+            "Content-Type": "application/json",
+            # Spread requests over virtual clients so the per-IP limiter sees realistic traffic
+            "X-Forwarded-For": f"10.0.{i % clients // 256}.{i % clients % 256}",
+        }
+        body = json.dumps({"message": message, "conversation_history": []}).encode()
+        start = time.perf_counter()
+        status = driver.send(endpoint, body, headers)
+        return status, time.perf_counter() - start
+
+    order = list(range(requests))
+    random.shuffle(order)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, order))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    statuses: dict = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    ok = statuses.get(200, 0)
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "throughput_rps": round(ok / wall, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def print_result(result: dict):
+    statuses = result["statuses"]
+    other = sum(v for k, v in statuses.items() if int(k) not in STATUSES)
+    print(
+        f"   {result['endpoint']:<13}{result['concurrency']:>5} {result['throughput_rps']:>9.1f} "
+        f"{result['p50_ms']:>9.0f} {result['p95_ms']:>9.0f} {result['p99_ms']:>9.0f} "
+        + " ".join(f"{statuses.get(str(s), 0):>5}" for s in STATUSES)
+        + f" {other:>5}"
+    )
+
+
+def compare(results: list, baseline_path: str, max_regression: float) -> list:
+    """Regressions vs a previous --json run: lower throughput or higher p95 beyond the tolerance."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{result['endpoint']}@{result['concurrency']}: throughput "
+                               f"{before['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{result['endpoint']}@{result['concurrency']}: p95 "
+                               f"{before['p95_ms']} -> {result['p95_ms']} ms")
+    return regressions
+
+
+def run(args: dict) -> int:
+    logging.basicConfig(level=logging.ERROR)
+    endpoints = [e for e in args["endpoints"].split(",") if e]
+    levels = [int(c) for c in args["concurrency"].split(",") if c]
+
+    fakes = ()
+    if args["base_url"]:
+        driver = HttpDriver(args["base_url"])
+        target = args["base_url"]
+    else:
+        openai, tavily, settings = start_fakes(args)
+        fakes = (openai, tavily)
+        os.environ.update(settings)
+        if args["rate_limit"] <= 0:
+            # Measure the app, not the per-IP limiter (set --rate-limit to exercise it)
+            os.environ["RATE_LIMIT_CHAT_MAX"] = os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(10 ** 9)
+        else:
+            os.environ["RATE_LIMIT_CHAT_MAX"] = os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(args["rate_limit"])
+        driver = InProcessDriver()
+        target = "in-process"
+
+    print(f"\n🏋️  Load test ({target}) | {args['requests']} requests per level | {args['clients']} clients")
+    print(f"   Fake latency: OpenAI {args['openai_latency'] * 1000:.0f}ms | Search {args['search_latency'] * 1000:.0f}ms"
+          f" | Tavily {args['tavily_latency'] * 1000:.0f}ms | jitter {args['jitter']:.0%}"
+          f" | throttle {args['throttle']:.0%} | errors {args['error_rate']:.0%}")
+    print(f"{'='*100}")
+    print(f"   {'endpoint':<13}{'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          + " ".join(f"{s:>5}" for s in STATUSES) + f" {'other':>5}")
+
+    results = []
+    for endpoint in endpoints:
+        # Warm-up request so imports and kernel setup don't skew the first level
+        run_level(driver, endpoint, 1, 1, args["clients"], args["unique"])
+        for level in levels:
+            result = run_level(driver, endpoint, level, args["requests"], args["clients"], args["unique"])
+            results.append(result)
+            print_result(result)
+
+    print(f"{'='*100}")
+    if fakes:
+        openai, tavily = fakes
+        print(f"   Fake OpenAI responses: {openai.status_counts} | Fake Tavily responses: {tavily.status_counts}")
+        from deadline import upstream_stats
+        print(f"   Upstream events:       {upstream_stats.snapshot()}")
+        for fake in fakes:
+            fake.stop()
+
+    if args["json"]:
+        with open(args["json"], "w", encoding="utf-8") as f:
+            json.dump({"settings": args, "results": results}, f, indent=2)
+        print(f"   📝 Results saved to {args['json']}")
+
+    if args["baseline"]:
+        regressions = compare(results, args["baseline"], args["max_regression"])
+        if regressions:
+            print(f"   ❌ {len(regressions)} regression(s) vs {args['baseline']}:")
+            for line in regressions:
+                print(f"      - {line}")
+            return 1
+        print(f"   ✅ No regressions vs {args['baseline']} (tolerance {args['max_regression']:.0%})")
+    return 0
+
+
+def serve_fakes(args: dict):
+    """Run the fake upstreams until interrupted (for a local Functions host)."""
+    openai, tavily, settings = start_fakes(args)
+    print("🧪 Fake upstreams running. Add to local.settings.json 'Values' (or export):")
+    for name, value in settings.items():
+        print(f"   {name}={value}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        openai.stop()
+        tavily.stop()
+
+
+def _parse_value(default, value):
+    """Convert a --name=value string to the type of its default; bare flags are booleans."""
+    if isinstance(default, bool):
+        if value is None or value.lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(value)
+    if value is None:
+        raise ValueError(value)
+    return type(default)(value)
+
+
+if __name__ == "__main__":
+    args = {
+        "endpoints": "chat,chat_simple,agent,agent_stream",
+        "concurrency": "1,4,16",
+        "requests": 100,
+        "openai_latency": 0.8,
+        "search_latency": 0.4,
+        "tavily_latency": 0.6,
+        "jitter": 0.2,
+        "throttle": 0.0,
+        "error_rate": 0.0,
+        "clients": 50,
+        "rate_limit": 0,
+        "unique": False,
+        "base_url": "",
+        "json": "",
+        "baseline": "",
+        "max_regression": 0.2,
+    }
+    serve = False
+    for arg in sys.argv[1:]:
+        if arg in ("-h", "--help"):
+            print(__doc__)
+            sys.exit(0)
+        if arg == "--serve-fakes":
+            serve = True
+            continue
+        name, _, value = arg[2:].partition("=") if arg.startswith("--") else ("", "", "")
+        name = name.replace("-", "_")
+        if name not in args:
+            sys.exit(f"loadtest.py: unknown argument {arg!r} (see --help)")
+        try:
+            args[name] = _parse_value(args[name], value if "=" in arg else None)
+        except ValueError:
+            sys.exit(f"loadtest.py: invalid value for --{name.replace('_', '-')}: {value!r}")
+
+    if serve:
+        serve_fakes(args)
+    else:
+        sys.exit(run(args))
@@ -14,10 +14,18 @@ az monitor app-insights query \
   --analytics-query '
 traces
 | where timestamp > ago(1h)
-| where message contains "⏱️" or message contains "📊"
+| where message startswith "TIMING "
+| extend t = parse_json(substring(message, 7))
 | project
     timestamp,
-    message,
+    route = tostring(t.route),
+    total_ms = todouble(t.total_ms),
+    admission_ms = todouble(t.stages.admission),
+    validation_ms = todouble(t.stages.validation),
+    openai_ms = todouble(t.stages["upstream.openai"]),
+    tavily_ms = todouble(t.stages["upstream.tavily"]),
+    tokens = toint(t.total_tokens),
+    stages = t.stages,
     operation_Id
 | order by timestamp desc
 | take 50
@@ -22,6 +22,7 @@ echo "$RESPONSE" | jq -r '
   "  Total time:         \(.timing.total_ms)ms",
   "  OpenAI + Search:    \(.timing.openai_search_ms)ms",
   "  Response processing: \(.timing.processing_ms)ms",
+  "  Stages:             \(.timing.stages | to_entries | map("\(.key)=\(.value)ms") | join(", "))",
   "",
   "📊 TOKEN USAGE:",
   "  Prompt tokens:      \(.usage.prompt_tokens)",
@@ -48,8 +49,9 @@ az monitor app-insights query \
   --analytics-query '
 traces
 | where timestamp > ago(5m)
-| where message contains "⏱️" or message contains "📊"
-| project timestamp, message
+| where message startswith "TIMING "
+| extend t = parse_json(substring(message, 7))
+| project timestamp, route = tostring(t.route), total_ms = todouble(t.total_ms), stages = t.stages
 | order by timestamp desc
 | take 10
 ' \